@@ -0,0 +1,1294 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import settings
+import template_engine
+from groq_client import GroqAPIError, GroqClient, iter_sse_tokens
+from metrics import CallMetrics, status_of
+from model_router import ModelRouter, should_fall_back
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache, SingleFlight, key_scope, make_cache_key
+from settings import GROQ_MODEL
+from structured_output import RecordStreamParser, parse_records, records_to_text, schema_instructions
+from token_budget import budget_max_tokens, count_message_tokens, fit_to_context
+
+SYSTEM_PROMPT = "You are an expert social media content creator. Generate engaging, creative, and platform-optimized content."
+
+CONTINUE_PROMPT = "Continue exactly where your previous message stopped. Do not repeat anything or add any preamble."
+
+FANOUT_PLATFORMS = ["Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok"]
+
+PLAN_PHASES = [
+    "Awareness & introduction",
+    "Education & value",
+    "Community & engagement",
+    "Conversion & recap"
+]
+
+DEFAULT_BRAND_INFO = {
+    'name': '',
+    'industry': '',
+    'tone': 'Professional',
+    'target_audience': ''
+}
+
+# =========================
+# SHARED SERVICES
+# =========================
+class Services:
+    """Process-wide HTTP client, response cache, in-flight request registry, rate-limit scheduler and model router"""
+
+    def __init__(self, client=None, cache=None, scheduler=None, metrics=None, inflight=None, router=None):
+        self.client = client or GroqClient()
+        self.cache = cache or ResponseCache(
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.CACHE_TTL_SECONDS,
+            db_path=settings.CACHE_DB_PATH or None
+        )
+        self.scheduler = scheduler or RateLimitScheduler(
+            requests_per_minute=settings.RATE_LIMIT_RPM,
+            tokens_per_minute=settings.RATE_LIMIT_TPM,
+            max_retries=settings.RETRY_MAX_ATTEMPTS,
+            base_delay=settings.RETRY_BASE_DELAY,
+            max_delay=settings.RETRY_MAX_DELAY
+        )
+        self.metrics = metrics or CallMetrics(
+            max_records=settings.METRICS_BUFFER_SIZE,
+            jsonl_path=settings.METRICS_JSONL_PATH or None
+        )
+        self.inflight = inflight or SingleFlight()
+        self.router = router or ModelRouter()
+
+_services = None
+_services_lock = threading.Lock()
+
+def get_services():
+    """Return the process-wide Services, creating them on first use"""
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = Services()
+        return _services
+
+# =========================
+# GROQ REQUESTS
+# =========================
+def build_groq_request(prompt, api_key, max_tokens, temperature, stream=False, json_mode=False, partial=None, model=None):
+    """Build headers and payload for a Groq Chat Completions call
+
+    With partial (text of a response cut off at max_tokens) the request asks
+    the model to continue it instead of starting over.
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key.strip()}",
+        "Content-Type": "application/json"
+    }
+
+    # Ensure parameters are correct types
+    payload = {
+        "model": model or GROQ_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": str(prompt)
+            }
+        ],
+        "temperature": float(temperature),
+        "max_tokens": fit_to_context(estimate_prompt_tokens(prompt, partial), max_tokens),
+        "top_p": 1,
+        "stream": stream
+    }
+    if partial:
+        payload["messages"] += [
+            {"role": "assistant", "content": partial},
+            {"role": "user", "content": CONTINUE_PROMPT}
+        ]
+    elif json_mode:
+        # Continuations extend the JSON text already received, so only the first request uses JSON mode
+        payload["response_format"] = {"type": "json_object"}
+    return headers, payload
+
+def request_cache_key(prompt, max_tokens, temperature, json_mode=False, model=GROQ_MODEL, api_key=None):
+    """Cache key for a completion request answered by model, scoped to the API key"""
+    return make_cache_key(
+        model, SYSTEM_PROMPT, str(prompt), temperature, max_tokens,
+        response_format="json_object" if json_mode else None,
+        scope=key_scope(api_key) if api_key else None
+    )
+
+def request_cache_keys(router, generator, prompt, max_tokens, temperature, json_mode, api_key):
+    """Cache key per model of the generator's route, in route order
+
+    Text is cached under the model that actually answered, so a fallback
+    model's answer is never passed off as the primary model's. The first
+    key also identifies the request for coalescing.
+    """
+    return {
+        model: request_cache_key(prompt, max_tokens, temperature, json_mode, model, api_key)
+        for model in router.routes[router.task(generator)]
+    }
+
+def cached_completion(cache, cache_keys):
+    """Cached text of a request from the first route model that has it, or None (counted as one miss)"""
+    primary, *fallbacks = cache_keys.values()
+    if not cache.contains(primary):
+        for key in fallbacks:
+            if cache.contains(key):
+                return cache.get(key)
+    return cache.get(primary)
+
+def estimate_prompt_tokens(prompt, partial=None):
+    """Prompt tokens of a request, counted locally"""
+    if partial:
+        return count_message_tokens(SYSTEM_PROMPT, prompt, partial, CONTINUE_PROMPT)
+    return count_message_tokens(SYSTEM_PROMPT, prompt)
+
+def estimate_request_tokens(prompt, max_tokens, partial=None):
+    """Token cost of a request for rate limiting: prompt plus the completion budget"""
+    return estimate_prompt_tokens(prompt, partial) + int(max_tokens)
+
+def add_usage(total, usage):
+    """Accumulate one response's token usage and keep its finish_reason"""
+    for key in ("prompt_tokens", "completion_tokens"):
+        if key in usage:
+            total[key] = total.get(key, 0) + usage[key]
+    total["finish_reason"] = usage.get("finish_reason")
+    return total
+
+def is_json(text):
+    """True when a JSON-mode response parses as JSON"""
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+def check_api_key(api_key):
+    """Raise ValueError for a missing or blank API key"""
+    if not api_key or len(api_key.strip()) == 0:
+        raise ValueError("API key is empty. Please enter a valid Groq API key.")
+
+def join_flight(services, cache_key, use_cache=True):
+    """(future, leader) for an identical in-flight request, or (None, False) when coalescing is off
+
+    A caller that bypasses the cache wants a fresh response, so it never shares one.
+    """
+    if not (use_cache and settings.COALESCE_REQUESTS):
+        return None, False
+    return services.inflight.join(cache_key)
+
+def shared_result(outcome):
+    """Text from a leader's settled future, or None when the caller should send its own request
+
+    Auth failures are not shared: the leader's API key may differ from the caller's.
+    """
+    try:
+        return outcome.result()
+    except GroqAPIError as e:
+        if e.status_code in (401, 403):
+            return None
+        raise
+
+def fetch_completion(prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, services=None, json_mode=False, generator=None):
+    """Cached, rate-limited completion; safe to call from worker threads
+
+    The task's models are tried in turn while a failure is one another model could avoid.
+    """
+    check_api_key(api_key)
+    services = services or get_services()
+    router = services.router
+    timer = services.metrics.start(generator)
+
+    cache_keys = request_cache_keys(router, generator, prompt, max_tokens, temperature, json_mode, api_key)
+    cache_key = next(iter(cache_keys.values()))
+    if use_cache:
+        cached = cached_completion(services.cache, cache_keys)
+        if cached is not None:
+            timer.finish(200, cache_hit=True)
+            return cached
+
+    flight, leader = join_flight(services, cache_key, use_cache)
+    if flight is not None and not leader:
+        try:
+            content = shared_result(flight)
+        except Exception as e:
+            timer.finish(status_of(e), coalesced=True)
+            raise
+        if content is not None:
+            timer.finish(200, coalesced=True)
+            return content
+
+    def send(model, partial, sent_at):
+        headers, payload = build_groq_request(
+            prompt, api_key, max_tokens, temperature, json_mode=json_mode, partial=partial, model=model
+        )
+
+        def attempt():
+            timer.sent()
+            sent_at.setdefault(model, time.perf_counter())
+            return services.client.send(headers, payload)
+        return services.scheduler.call(attempt, estimate_request_tokens(prompt, max_tokens, partial))
+
+    def complete(model):
+        # A response cut off at max_tokens is continued rather than regenerated
+        parts = []
+        usage = {}
+        sent_at = {}
+        for _ in range(settings.MAX_CONTINUATIONS + 1):
+            response = send(model, ''.join(parts) or None, sent_at)
+            if not parts:
+                connect = services.client.connect_time()
+            step = {}
+            parts.append(services.client.parse_completion(response, step))
+            if add_usage(usage, step)["finish_reason"] != "length":
+                break
+        return ''.join(parts), usage, connect, len(parts) - 1, time.perf_counter() - sent_at[model]
+
+    def call():
+        models = router.models(generator)
+        for position, model in enumerate(models):
+            try:
+                content, usage, connect, continuations, latency = complete(model)
+            except Exception as e:
+                fall_back = position + 1 < len(models) and should_fall_back(e)
+                router.record(model, generator, error=e, fell_back=fall_back)
+                if fall_back:
+                    continue
+                timer.finish(status_of(e), model=model)
+                raise
+            router.record(
+                model, generator, latency,
+                finish_reason=usage.get("finish_reason"),
+                completion_tokens=usage.get("completion_tokens"),
+                invalid_json=json_mode and not is_json(content)
+            )
+            timer.finish(200, connect=connect, continuations=continuations, model=model, **usage)
+            services.cache.set(cache_keys[model], content)
+            return content
+
+    if leader:
+        return services.inflight.lead(cache_key, call)
+    return call()
+
+def stream_completion(prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, services=None, json_mode=False, generator=None):
+    """Yield completion tokens as they arrive (SSE), caching the assembled text
+
+    Until the first response starts, failures move on to the task's next model.
+    """
+    check_api_key(api_key)
+    services = services or get_services()
+    router = services.router
+    timer = services.metrics.start(generator)
+
+    cache_keys = request_cache_keys(router, generator, prompt, max_tokens, temperature, json_mode, api_key)
+    cache_key = next(iter(cache_keys.values()))
+    if use_cache:
+        cached = cached_completion(services.cache, cache_keys)
+        if cached is not None:
+            timer.finish(200, cache_hit=True)
+            yield cached
+            return
+
+    # Followers of an identical in-flight request get its full text as one chunk
+    flight, leader = join_flight(services, cache_key, use_cache)
+    if flight is not None and not leader:
+        try:
+            content = shared_result(flight)
+        except Exception as e:
+            timer.finish(status_of(e), coalesced=True)
+            raise
+        if content is not None:
+            timer.finish(200, coalesced=True)
+            yield content
+            return
+
+    started = time.perf_counter()
+    sent_at = {}
+
+    def send(model, partial):
+        headers, payload = build_groq_request(
+            prompt, api_key, max_tokens, temperature, stream=True, json_mode=json_mode, partial=partial, model=model
+        )
+
+        def attempt():
+            timer.sent()
+            sent_at.setdefault(model, time.perf_counter())
+            return services.client.send(headers, payload, stream=True)
+        return services.scheduler.call(attempt, estimate_request_tokens(prompt, max_tokens, partial))
+
+    usage = {}
+    tokens = []
+    continuations = 0
+    model = None
+    recorded = False
+    try:
+        models = router.models(generator)
+        for position, model in enumerate(models):
+            try:
+                response = send(model, None)
+                break
+            except Exception as e:
+                fall_back = position + 1 < len(models) and should_fall_back(e)
+                router.record(model, generator, error=e, fell_back=fall_back)
+                if not fall_back:
+                    recorded = True
+                    raise
+        connect = services.client.connect_time()
+        while True:
+            step = {}
+            with response:
+                for token in iter_sse_tokens(response, step):
+                    if not tokens:
+                        services.client.record_ttft(time.perf_counter() - started)
+                        timer.first_token()
+                    tokens.append(token)
+                    yield token
+            # Cut off at max_tokens: stream the continuation onto the same output
+            if add_usage(usage, step)["finish_reason"] != "length" or continuations >= settings.MAX_CONTINUATIONS:
+                break
+            continuations += 1
+            response = send(model, ''.join(tokens))
+    except GeneratorExit:
+        timer.finish("cancelled", model=model)
+        # A cancelled stream releases its waiters to send their own request
+        if leader:
+            services.inflight.settle(cache_key)
+        raise
+    except Exception as e:
+        if not recorded and model is not None:
+            router.record(model, generator, error=e)
+        timer.finish(status_of(e), model=model)
+        if leader:
+            services.inflight.settle(cache_key, error=e)
+        raise
+    except BaseException:
+        if leader:
+            services.inflight.settle(cache_key)
+        raise
+
+    content = ''.join(tokens)
+    router.record(
+        model, generator, time.perf_counter() - sent_at[model],
+        finish_reason=usage.get("finish_reason"),
+        completion_tokens=usage.get("completion_tokens"),
+        invalid_json=json_mode and not is_json(content)
+    )
+    timer.finish(200, connect=connect, continuations=continuations, model=model, **usage)
+
+    services.cache.set(cache_keys[model], content)
+    if leader:
+        services.inflight.settle(cache_key, content)
+
+def fetch_records(kind, request, api_key, use_cache=True, services=None):
+    """Run a structured request and return its normalized records"""
+    text = fetch_completion(api_key=api_key, use_cache=use_cache, services=services, **request)
+    return parse_records(kind, text)
+
+def stream_records(kind, request, api_key, use_cache=True, services=None):
+    """Yield records from a structured request as soon as each one is complete
+
+    Falls back to a single non-streamed call if the API rejects streaming in JSON mode.
+    """
+    parser = RecordStreamParser(kind)
+    tokens = stream_completion(api_key=api_key, use_cache=use_cache, services=services, **request)
+    try:
+        first = next(tokens, '')
+    except GroqAPIError as e:
+        if e.status_code != 400:
+            raise
+        yield from fetch_records(kind, request, api_key, use_cache, services)
+        return
+
+    # The text is kept for responses shaped so that no record streams (e.g. one
+    # bare record where a collection was asked for); parse_records reads those
+    parts = []
+    emitted = False
+    for token in itertools.chain([first], tokens):
+        parts.append(token)
+        for record in parser.feed(token):
+            emitted = True
+            yield record
+    if not emitted:
+        yield from parse_records(kind, ''.join(parts))
+
+# =========================
+# PROMPTS
+# =========================
+def avoid_block(avoid):
+    """Prompt lines listing existing ideas the response must not repeat"""
+    if not avoid:
+        return ""
+    listed = '\n'.join(f"- {summarize_item(item)}" for item in avoid)
+    return f"\nDo not repeat or closely resemble any of these existing ideas:\n{listed}\n"
+
+def summarize_item(text, max_chars=160):
+    """One line of an idea or slot, shortened for prompts and messages"""
+    line = ' '.join(str(text).split())
+    return line if len(line) <= max_chars else line[:max_chars - 1].rstrip() + '…'
+
+def build_ideas_prompt(topic, platform, count, brand_info, structured=False, avoid=None):
+    """Prompt asking for content ideas on one platform"""
+    if structured:
+        output_format = schema_instructions('idea') + f'\nSet "platform" to "{platform}".'
+    else:
+        output_format = "Format as a numbered list with clear separation between ideas."
+    output_format = avoid_block(avoid) + output_format
+    return f"""Generate {count} creative social media content ideas for {platform}.
+
+Topic: {topic}
+Brand: {brand_info['name'] or 'Your Brand'}
+Industry: {brand_info['industry']}
+Tone: {brand_info['tone']}
+Target Audience: {brand_info['target_audience'] or 'General audience'}
+
+For each idea, provide:
+1. A catchy title
+2. Main concept/angle
+3. Content type (carousel, video, image, text)
+4. Engagement hook
+
+{output_format}"""
+
+def build_caption_prompt(idea, platform, brand_info, structured=False):
+    """Prompt asking for a caption for one content idea"""
+    output_format = f"\n\n{schema_instructions('caption')}" if structured else ""
+    return f"""Create an engaging {platform} caption for this content idea:
+
+{idea}
+
+Brand: {brand_info['name'] or 'Your Brand'}
+Tone: {brand_info['tone']}
+Target Audience: {brand_info['target_audience'] or 'General audience'}
+
+Requirements:
+- Platform-optimized length
+- Include call-to-action
+- Add relevant emojis
+- Suggest 5-10 hashtags
+- Engaging and on-brand{output_format}"""
+
+def build_bulk_caption_prompt(ideas, platform, brand_info):
+    """Prompt asking for one caption per numbered content idea, as JSON records"""
+    numbered = '\n'.join(f"{number}. {idea}" for number, idea in enumerate(ideas, start=1))
+    return f"""Create an engaging {platform} caption for each of these {len(ideas)} content ideas:
+
+{numbered}
+
+Brand: {brand_info['name'] or 'Your Brand'}
+Tone: {brand_info['tone']}
+Target Audience: {brand_info['target_audience'] or 'General audience'}
+
+Requirements for every caption:
+- Platform-optimized length
+- Include call-to-action
+- Add relevant emojis
+- Suggest 5-10 hashtags
+- Engaging and on-brand
+
+Write exactly one caption per idea and set "idea" to the idea's number.
+{schema_instructions('bulk_caption')}"""
+
+def build_slot_ideas_prompt(topic, platforms, count, brand_info, avoid=None):
+    """Prompt asking for fresh one-line post ideas to replace calendar slots"""
+    return f"""Suggest {count} fresh social media post ideas for a content calendar.
+
+Topic/Theme: {topic}
+Platforms: {', '.join(platforms)}
+Brand: {brand_info['name'] or 'Your Brand'}
+Tone: {brand_info['tone']}
+{avoid_block(avoid)}
+Write each idea as one sentence with its key message.
+Format as a numbered list with one idea per line and nothing else."""
+
+def build_calendar_prompt(topic, platforms, brand_info, structured=False, start_date=None, end_date=None):
+    """Prompt asking for a content calendar, 7 days by default or for the given dates"""
+    if structured and start_date is None:
+        start_date = datetime.now().date()
+
+    if start_date is None:
+        period = "a 7-day social media content calendar"
+        dates = ""
+        day_label = "Day"
+    else:
+        days = calendar_dates(start_date, end_date or start_date + timedelta(days=6))
+        period = f"a {len(days)}-day social media content calendar"
+        dates = "\nDates:\n" + '\n'.join(f"- {day.strftime('%A')} {day.isoformat()}" for day in days) + "\n"
+        day_label = "Date"
+
+    if structured:
+        output_format = "Give one entry per post, using the dates above.\n" + schema_instructions('calendar_entry')
+    else:
+        output_format = f"Format as: {day_label} | Platform | Time | Content Type | Idea"
+    return f"""Create {period}.
+
+Topic/Theme: {topic}
+Platforms: {', '.join(platforms)}
+Brand: {brand_info['name'] or 'Your Brand'}
+Industry: {brand_info['industry']}
+{dates}
+For each day, provide:
+- {day_label} and best posting time
+- Platform
+- Content type
+- Post idea (brief)
+- Key message
+
+{output_format}"""
+
+def build_plan_prompt(num_days, platform, brand_voice, content_focus, posting_frequency, topic, window=None):
+    """Prompt for a full content plan, or for one day-window of it"""
+    prompt = f"""
+Generate a comprehensive {num_days}-day social media content plan for {platform}.
+
+Requirements:
+- Brand Voice: {brand_voice}
+- Content Focus: {', '.join(content_focus)}
+- Daily Posting Frequency: {posting_frequency}
+- Main Topic: {topic if topic else 'General social media content'}
+
+For each day, provide:
+1. Content idea with brief description
+2. Recommended caption (200-300 characters)
+3. Hashtags (5-10 relevant)
+4. Best posting time
+5. Engagement tips
+
+Format the output clearly with day numbers and sections.
+"""
+    if window is None:
+        return prompt
+
+    # Consistency context so chunks generated in parallel don't repeat themes
+    focus_areas = content_focus or ['General']
+    day_focus = '\n'.join(
+        f"- Day {day}: {focus_areas[(day - 1) % len(focus_areas)]}"
+        for day in range(window['start_day'], window['end_day'] + 1)
+    )
+    other_windows = '\n'.join(
+        f"- Days {other['start_day']}-{other['end_day']}: {other['phase']}"
+        for other in window['all_windows'] if other['index'] != window['index']
+    )
+    return prompt + f"""
+This request covers only Days {window['start_day']}-{window['end_day']} (part {window['index'] + 1} of {len(window['all_windows'])}).
+Number the days {window['start_day']} to {window['end_day']} and write nothing for other days.
+
+Phase of the campaign for these days: {window['phase']}
+Daily focus assignments:
+{day_focus}
+
+Other parts of the plan are written separately and cover:
+{other_windows}
+Do not repeat themes, formats or hooks that belong to those days; where a part shares your phase, take a different angle.
+"""
+
+# =========================
+# REQUEST SPECS
+# =========================
+def ideas_request(topic, platform, count, brand_info, structured=False, avoid=None):
+    """Prompt and sampling parameters for an ideas request"""
+    return structured_request({
+        'prompt': build_ideas_prompt(topic, platform, count, brand_info, structured, avoid),
+        'max_tokens': budget_max_tokens('ideas', count, platform, structured),
+        'temperature': 0.8,
+        'generator': 'ideas'
+    }, structured)
+
+def caption_request(idea, platform, brand_info, structured=False):
+    """Prompt and sampling parameters for a caption request"""
+    return structured_request({
+        'prompt': build_caption_prompt(idea, platform, brand_info, structured),
+        'max_tokens': budget_max_tokens('caption', 1, platform, structured),
+        'temperature': 0.8,
+        'generator': 'caption'
+    }, structured)
+
+def bulk_caption_request(ideas, platform, brand_info):
+    """Prompt and sampling parameters for captions of several ideas in one structured request"""
+    return structured_request({
+        'prompt': build_bulk_caption_prompt(ideas, platform, brand_info),
+        'max_tokens': budget_max_tokens('caption', len(ideas), platform, structured=True),
+        'temperature': 0.8,
+        'generator': 'caption'
+    }, True)
+
+def slot_ideas_request(topic, platforms, count, brand_info, avoid=None):
+    """Prompt and sampling parameters for replacement calendar slot ideas"""
+    return {
+        'prompt': build_slot_ideas_prompt(topic, platforms, count, brand_info, avoid),
+        'max_tokens': budget_max_tokens('calendar', count),
+        'temperature': 0.9,
+        'generator': 'calendar'
+    }
+
+def calendar_request(topic, platforms, brand_info, structured=False, start_date=None, end_date=None):
+    """Prompt and sampling parameters for a calendar request (at most one week of dates)"""
+    days = 7 if start_date is None else ((end_date or start_date + timedelta(days=6)) - start_date).days + 1
+    return structured_request({
+        'prompt': build_calendar_prompt(topic, platforms, brand_info, structured, start_date, end_date),
+        'max_tokens': budget_max_tokens('calendar', days * max(len(platforms), 1), structured=structured),
+        'temperature': 0.7,
+        'generator': 'calendar'
+    }, structured)
+
+def structured_request(request, structured):
+    """Switch a request spec to JSON mode when structured output is wanted"""
+    if structured:
+        request['json_mode'] = True
+    return request
+
+def plan_request(num_days, platform, brand_voice, content_focus, posting_frequency, topic, window=None):
+    """Prompt and sampling parameters for a full plan or one plan window"""
+    days = num_days if window is None else window['end_day'] - window['start_day'] + 1
+    return {
+        'prompt': build_plan_prompt(num_days, platform, brand_voice, content_focus, posting_frequency, topic, window),
+        'max_tokens': budget_max_tokens('plan', days, platform),
+        'temperature': 0.7,
+        'generator': 'plan'
+    }
+
+# =========================
+# FALLBACK TEMPLATES
+# =========================
+def fallback_idea_records(topic, platform, count, brand_info=None, seed=None):
+    """Template idea records used when the API is unavailable; "All Platforms" covers every platform"""
+    if platform not in template_engine.PLATFORMS:
+        return [r for p in FANOUT_PLATFORMS for r in template_engine.idea_records(topic, p, count, brand_info, seed)]
+    return template_engine.idea_records(topic, platform, count, brand_info, seed)
+
+def fallback_ideas(topic, platform, count, brand_info=None, seed=None):
+    """Template content ideas used when the API is unavailable"""
+    if platform not in template_engine.PLATFORMS:
+        return merge_fanout_ideas({p: fallback_ideas(topic, p, count, brand_info, seed) for p in FANOUT_PLATFORMS})
+    return records_to_text('idea', template_engine.idea_records(topic, platform, count, brand_info, seed))
+
+def fallback_caption_record(idea, platform, brand_info=None, seed=None):
+    """Template caption record used when the API is unavailable"""
+    if platform not in template_engine.PLATFORMS:
+        platform = 'Instagram'
+    return template_engine.caption_record(idea, platform, brand_info, seed)
+
+def create_fallback_caption(idea, platform, brand_info=None, seed=None):
+    """Template caption used when the API is unavailable"""
+    return records_to_text('caption', [fallback_caption_record(idea, platform, brand_info, seed)])
+
+def fallback_calendar_records(topic, platforms, start_date=None, end_date=None, brand_info=None, seed=None):
+    """Template calendar entries, 7 days from today by default"""
+    start_date = start_date or datetime.now().date()
+    days = calendar_dates(start_date, end_date or start_date + timedelta(days=6))
+    platforms = [p for p in platforms if p in template_engine.PLATFORMS] or ['Instagram']
+    return template_engine.calendar_records(topic, platforms, days, brand_info, seed)
+
+def create_fallback_calendar(topic, platforms, start_date=None, end_date=None, brand_info=None, seed=None):
+    """Template calendar used when the API is unavailable (7 days from today by default)"""
+    records = fallback_calendar_records(topic, platforms, start_date, end_date, brand_info, seed)
+    calendar = f"{len({record['date'] for record in records})}-Day Content Calendar: {topic}\n\n"
+    for record in records:
+        day = datetime.strptime(record['date'], '%Y-%m-%d')
+        calendar += f"📅 {day.strftime('%A, %b %d')} | {record['platform']} | {record['time']}\n"
+        calendar += f"   Type: {record['type']}\n"
+        calendar += f"   Idea: {record['idea']}\n"
+        calendar += f"   Goal: {template_engine.calendar_goal(record)}\n\n"
+    return calendar
+
+# =========================
+# GENERATION FUNCTIONS
+# =========================
+def generate_content_ideas(topic, platform, count, api_key, brand_info, use_cache=True, services=None):
+    """Generate content ideas; "All Platforms" fans out one request per platform
+
+    A platform whose request fails gets template ideas, as in the ideas tab;
+    only a fan-out where every platform failed raises.
+    """
+    if platform == "All Platforms" and settings.IDEAS_FANOUT:
+        results, errors = {}, {}
+        for fanout_platform, text, error in iter_ideas_fanout(topic, count, api_key, brand_info, use_cache, services):
+            if error is not None:
+                errors[fanout_platform] = error
+            else:
+                results[fanout_platform] = text
+        if not results:
+            raise next(iter(errors.values()))
+        for failed_platform in errors:
+            results[failed_platform] = fallback_ideas(topic, failed_platform, count, brand_info)
+        return merge_fanout_ideas(results)
+
+    request = ideas_request(topic, platform, count, brand_info)
+    return fetch_completion(api_key=api_key, use_cache=use_cache, services=services, **request)
+
+def iter_ideas_fanout(topic, count, api_key, brand_info, use_cache=True, services=None, platforms=None, engine=None, structured=False):
+    """Yield (platform, ideas, error) for every platform as each request finishes
+
+    With an AsyncEngine the requests run on its event loop instead of a thread pool.
+    """
+    services = services or get_services()
+    platforms = platforms or FANOUT_PLATFORMS
+
+    pool = None
+    if engine is None:
+        pool = ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENCY)
+        submit = lambda request: pool.submit(
+            fetch_completion, api_key=api_key, use_cache=use_cache, services=services, **request
+        )
+    else:
+        submit = lambda request: engine.submit(api_key=api_key, use_cache=use_cache, **request)
+
+    try:
+        futures = {
+            submit(ideas_request(topic, platform, count, brand_info, structured)): platform
+            for platform in platforms
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+def merge_fanout_ideas(results, platforms=None):
+    """Merge per-platform ideas into one text, in platform order"""
+    return '\n\n'.join(
+        f"**{platform}**\n\n{results[platform]}"
+        for platform in (platforms or FANOUT_PLATFORMS) if platform in results
+    )
+
+def generate_caption(idea, platform, api_key, brand_info, use_cache=True, services=None):
+    """Generate caption for specific content idea"""
+    request = caption_request(idea, platform, brand_info)
+    return fetch_completion(api_key=api_key, use_cache=use_cache, services=services, **request)
+
+def generate_weekly_plan(topic, platforms, api_key, brand_info, use_cache=True, services=None, start_date=None, end_date=None):
+    """Generate a content calendar; date ranges are generated week by week in parallel"""
+    if start_date is None:
+        request = calendar_request(topic, platforms, brand_info)
+        return fetch_completion(api_key=api_key, use_cache=use_cache, services=services, **request)
+
+    results = {}
+    for week, text, error in iter_calendar_weeks(
+        topic, platforms, api_key, brand_info, start_date, end_date, use_cache, services
+    ):
+        if error is not None:
+            raise error
+        results[week['index']] = (week, text)
+    return stitch_calendar([results[index] for index in sorted(results)])
+
+# =========================
+# CONTENT CALENDARS
+# =========================
+def calendar_dates(start_date, end_date):
+    """Every date from start_date to end_date inclusive"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+def split_calendar_weeks(start_date, end_date):
+    """Split a date range into 7-day windows starting at start_date, the last one clipped to the range
+
+    A range of up to 7 days is a single window, so an ordinary week is one
+    request whatever weekday it starts on.
+    """
+    weeks = []
+    week_start = start_date
+    while week_start <= end_date:
+        week_end = min(week_start + timedelta(days=6), end_date)
+        weeks.append({'index': len(weeks), 'start_date': week_start, 'end_date': week_end})
+        week_start = week_end + timedelta(days=1)
+    return weeks
+
+def week_label(week):
+    """Human-readable label for a calendar week"""
+    return f"{week['start_date'].strftime('%b %d')} - {week['end_date'].strftime('%b %d, %Y')}"
+
+def iter_calendar_weeks(topic, platforms, api_key, brand_info, start_date, end_date, use_cache=True, services=None, engine=None, structured=False):
+    """Yield (week, calendar, error) for every week of a date range as each request finishes
+
+    Each week is its own request. Repeating the same range with the same
+    theme and platforms is answered from the response cache while its
+    entries last (GROQ_CACHE_TTL); calendars stored in history are not
+    looked up.
+    """
+    services = services or get_services()
+
+    pool = None
+    if engine is None:
+        pool = ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENCY)
+        submit = lambda request: pool.submit(
+            fetch_completion, api_key=api_key, use_cache=use_cache, services=services, **request
+        )
+    else:
+        submit = lambda request: engine.submit(api_key=api_key, use_cache=use_cache, **request)
+
+    try:
+        futures = {
+            submit(calendar_request(topic, platforms, brand_info, structured, week['start_date'], week['end_date'])): week
+            for week in split_calendar_weeks(start_date, end_date)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+def stitch_calendar(weeks):
+    """Join (week, calendar) pairs in date order, with a heading per week"""
+    if len(weeks) == 1:
+        return weeks[0][1]
+    return '\n\n'.join(f"**🗓️ Week of {week_label(week)}**\n\n{text}" for week, text in weeks)
+
+# =========================
+# BULK CAPTIONS
+# =========================
+BULK_CAPTION_FIELDS = ('idea_number', 'idea', 'platform', 'caption', 'cta', 'hashtags', 'error')
+
+def split_ideas(text):
+    """Individual ideas from a generated idea list: one per top-level numbered item"""
+    ideas = []
+    current = None
+    for line in str(text or '').splitlines():
+        if re.match(r"\d+[.)]\s", line):
+            if current:
+                ideas.append('\n'.join(current).strip())
+            current = [line]
+        elif re.fullmatch(r"\s*\*\*[^*]+\*\*\s*", line):
+            # Platform headings of an "All Platforms" list end the previous idea
+            if current:
+                ideas.append('\n'.join(current).strip())
+            current = None
+        elif current is not None:
+            current.append(line)
+    if current:
+        ideas.append('\n'.join(current).strip())
+    return ideas or ([str(text).strip()] if str(text or '').strip() else [])
+
+def idea_list(text, records=None):
+    """Ideas of a stored idea set, from its structured records when it has them"""
+    if records:
+        return [
+            f"{r['title']}: {r['concept']}" + (f" Hook: {r['hook']}" if r.get('hook') else '')
+            for r in records
+        ]
+    return split_ideas(text)
+
+def caption_row(number, idea, platform, record=None, error=None):
+    """One row of a bulk captioning result"""
+    return {
+        'idea_number': number,
+        'idea': idea,
+        'platform': platform,
+        'caption': record['body'] if record else '',
+        'cta': record['cta'] if record else '',
+        'hashtags': ' '.join(record['hashtags']) if record else '',
+        'error': f"{type(error).__name__}: {error}" if error else ''
+    }
+
+def iter_bulk_captions(ideas, platforms, api_key, brand_info, use_cache=True, services=None, engine=None, batch_size=None):
+    """Yield a caption row for every (idea, platform) pair as requests finish
+
+    With batch_size > 1 several ideas share one structured request per platform;
+    ideas a batch response leaves out, or whose batch fails, are captioned one
+    request each, as is a lone idea left over after full batches. batch_size 1
+    sends one request per caption.
+    """
+    services = services or get_services()
+    batch_size = max(int(batch_size or settings.BULK_CAPTION_BATCH), 1)
+
+    pool = None
+    if engine is None:
+        pool = ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENCY)
+        submit = lambda request: pool.submit(
+            fetch_completion, api_key=api_key, use_cache=use_cache, services=services, **request
+        )
+    else:
+        submit = lambda request: engine.submit(api_key=api_key, use_cache=use_cache, **request)
+
+    pending = {}
+
+    def submit_single(index, platform):
+        pending[submit(caption_request(ideas[index], platform, brand_info, True))] = (platform, [index])
+
+    try:
+        for platform in platforms:
+            if batch_size == 1:
+                for index in range(len(ideas)):
+                    submit_single(index, platform)
+                continue
+            for start in range(0, len(ideas), batch_size):
+                indexes = list(range(start, min(start + batch_size, len(ideas))))
+                if len(indexes) == 1:
+                    # A lone idea left over gets the plain caption prompt
+                    submit_single(indexes[0], platform)
+                    continue
+                request = bulk_caption_request([ideas[i] for i in indexes], platform, brand_info)
+                pending[submit(request)] = (platform, indexes)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                platform, indexes = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    if len(indexes) > 1:
+                        for index in indexes:
+                            submit_single(index, platform)
+                    else:
+                        yield caption_row(indexes[0] + 1, ideas[indexes[0]], platform, error=e)
+                    continue
+
+                if len(indexes) == 1:
+                    records = parse_records('caption', text)
+                    # A model that ignored JSON mode still produced a usable caption
+                    record = records[0] if records else {'body': text.strip(), 'cta': '', 'hashtags': []}
+                    yield caption_row(indexes[0] + 1, ideas[indexes[0]], platform, record)
+                    continue
+
+                by_number = {}
+                for record in parse_records('bulk_caption', text):
+                    number = re.match(r"\d+", record['idea'])
+                    if number and 1 <= int(number.group()) <= len(indexes):
+                        by_number.setdefault(int(number.group()), record)
+                for number, index in enumerate(indexes, start=1):
+                    if number in by_number:
+                        yield caption_row(index + 1, ideas[index], platform, by_number[number])
+                    else:
+                        submit_single(index, platform)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+def sort_caption_rows(rows, platforms):
+    """Order rows by idea, then by the selected platform order"""
+    order = {platform: position for position, platform in enumerate(platforms)}
+    return sorted(rows, key=lambda row: (row['idea_number'], order.get(row['platform'], len(order))))
+
+def caption_rows_to_csv(rows):
+    """Bulk caption rows as CSV text"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BULK_CAPTION_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+def caption_rows_to_jsonl(rows):
+    """Bulk caption rows as JSON lines"""
+    return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+# =========================
+# CAPTION PREFETCH
+# =========================
+PREFETCH_POLL_SECONDS = 0.25
+
+def caption_platform(platform):
+    """Platform a caption is written for ("All Platforms" ideas get the first fan-out platform)"""
+    return platform if platform in FANOUT_PLATFORMS else FANOUT_PLATFORMS[0]
+
+def idea_targets(text, records=None, platform=None):
+    """(idea, platform) pairs of an idea set, with each idea's own platform for "All Platforms" sets"""
+    if records:
+        return [(idea, caption_platform(r.get('platform') or platform)) for idea, r in zip(idea_list(text, records), records)]
+    parts = re.split(r"^\*\*([^*]+)\*\*\s*$", str(text or ''), flags=re.M)
+    if len(parts) == 1:
+        return [(idea, caption_platform(platform)) for idea in split_ideas(text)]
+    # Merged fan-out lists have one "**Platform**" heading per platform
+    return [
+        (idea, caption_platform(section_platform.strip()))
+        for section_platform, section in zip(parts[1::2], parts[2::2])
+        for idea in split_ideas(section)
+    ]
+
+def prefetch_order(targets, limit):
+    """First limit targets, taking one idea from each platform in turn"""
+    by_platform = {}
+    for target in targets:
+        by_platform.setdefault(target[1], []).append(target)
+    rounds = itertools.zip_longest(*by_platform.values())
+    return [target for group in rounds for target in group if target is not None][:max(int(limit), 0)]
+
+def prefetch_captions(targets, api_key, brand_info, structured=False, services=None, reserve=None, max_wait=None):
+    """Warm the response cache with a caption for every (idea, platform) target, at low priority
+
+    Targets run one at a time, and each waits until the rate limiter would
+    still have more than reserve of its per-minute budget left, so prefetching
+    only spends capacity foreground calls are not using. Once a target has
+    waited max_wait seconds the remaining ones are skipped. Returns counts of
+    warmed, already cached, skipped and failed captions.
+    """
+    services = services or get_services()
+    reserve = settings.CAPTION_PREFETCH_RESERVE if reserve is None else reserve
+    max_wait = settings.CAPTION_PREFETCH_MAX_WAIT if max_wait is None else max_wait
+    outcome = {'warmed': 0, 'cached': 0, 'skipped': 0, 'failed': 0}
+
+    for position, (idea, platform) in enumerate(targets):
+        # Same request as the caption tab sends, so its call is answered from the cache
+        request = caption_request(idea, platform, brand_info, structured)
+        cache_keys = request_cache_keys(
+            services.router, 'prefetch', request['prompt'], request['max_tokens'], request['temperature'], structured, api_key
+        )
+        if any(services.cache.contains(key) for key in cache_keys.values()):
+            outcome['cached'] += 1
+            continue
+
+        estimate = estimate_request_tokens(request['prompt'], request['max_tokens'])
+        deadline = time.monotonic() + max_wait
+        while not services.scheduler.has_headroom(estimate, reserve):
+            if time.monotonic() >= deadline:
+                outcome['skipped'] += len(targets) - position
+                return outcome
+            time.sleep(PREFETCH_POLL_SECONDS)
+
+        try:
+            fetch_completion(api_key=api_key, services=services, **dict(request, generator='prefetch'))
+        except Exception:
+            outcome['failed'] += 1
+        else:
+            outcome['warmed'] += 1
+    return outcome
+
+# =========================
+# NEAR-DUPLICATES
+# =========================
+DEDUP_KINDS = ('ideas', 'calendar')
+
+def calendar_slots(text, records=None):
+    """The post idea of every calendar slot, as it appears in the calendar text"""
+    if records:
+        return [r['idea'] for r in records]
+    slots = []
+    for line in str(text or '').splitlines():
+        idea = re.match(r"\s*(?:[-*]\s*)?\**Idea\**:\**\s*(.+)", line)
+        if idea:
+            slots.append(idea.group(1).strip())
+            continue
+        fields = [field.strip(' *') for field in line.strip().strip('|').split('|')]
+        # "Date | Platform | Time | Content Type | Idea" rows, skipping the header and separators
+        if len(fields) >= 4 and fields[-1] and not set(fields[-1]) <= set('-: ') and fields[-1].lower() != 'idea':
+            slots.append(fields[-1])
+    return slots or split_ideas(text)
+
+def content_items(kind, text, records=None):
+    """Ideas or calendar slots of a generated result, in order"""
+    if kind == 'ideas':
+        return idea_list(text, records)
+    return calendar_slots(text, records)
+
+def index_history_entry(index, entry, body):
+    """Add the items of an ideas or calendar history entry to a near-duplicate index"""
+    if entry.kind not in DEDUP_KINDS:
+        return
+    for number, item in enumerate(content_items(entry.kind, body, entry.meta.get('records')), start=1):
+        index.add(
+            item,
+            group=entry.entry_id,
+            kind=entry.kind,
+            topic=entry.topic,
+            date=entry.timestamp.strftime('%Y-%m-%d'),
+            number=number
+        )
+
+def sync_history_index(index, history):
+    """Bring a near-duplicate index in line with a history store and return it
+
+    Entries evicted or deleted since the last sync are forgotten and entries
+    added elsewhere (another session or replica sharing the store) are indexed;
+    only ids are listed, and only new entries are read.
+    """
+    current = [entry_id for kind in DEDUP_KINDS for entry_id in history.entry_ids(kind)]
+    indexed = index.groups()
+    for entry_id in indexed - set(current):
+        index.remove(entry_id)
+    for entry_id in current:
+        entry = None if entry_id in indexed else history.get(entry_id)
+        if entry is not None:
+            index_history_entry(index, entry, history.body(entry))
+    return index
+
+def replace_items(text, old_items, new_items):
+    """Swap items inside text in place, keeping the list number of each replaced item"""
+    for old, new in zip(old_items, new_items):
+        number = re.match(r"(\d+[.)])\s", old)
+        if number:
+            new = re.sub(r"^\s*\d+[.)]\s*", '', new)
+            new = f"{number.group(1)} {new}"
+        text = text.replace(old, new, 1)
+    return text
+
+def ideas_text(records, platform):
+    """Display text of idea records, grouped per platform for "All Platforms" sets"""
+    if platform != "All Platforms":
+        return records_to_text('idea', records)
+    return merge_fanout_ideas({
+        p: records_to_text('idea', [r for r in records if r['platform'] == p])
+        for p in FANOUT_PLATFORMS if any(r['platform'] == p for r in records)
+    })
+
+def regenerate_duplicates(kind, topic, platforms, text, records, positions, api_key, brand_info, services=None, avoid=()):
+    """Replace only the duplicated ideas or calendar slots (0-based positions)
+
+    The new items are asked to differ from the whole result and from avoid
+    (e.g. the earlier items they duplicated). Returns (text, records, replaced) where replaced lists the positions that got a new item.
+    """
+    items = content_items(kind, text, records)
+    positions = [p for p in positions if p < len(items)]
+    if not positions:
+        return text, records, []
+    avoid = items + [item for item in avoid if item not in items]
+
+    if kind == 'ideas':
+        request = ideas_request(topic, platforms[0], len(positions), brand_info, bool(records), avoid)
+        response = fetch_completion(api_key=api_key, use_cache=False, services=services, **request)
+        if records:
+            fresh = parse_records('idea', response)
+            records = list(records)
+            for position, record in zip(positions, fresh):
+                records[position] = dict(record, platform=record['platform'] or records[position]['platform'])
+            return ideas_text(records, platforms[0]), records, positions[:len(fresh)]
+        fresh = split_ideas(response)
+    else:
+        request = slot_ideas_request(topic, platforms, len(positions), brand_info, avoid)
+        response = fetch_completion(api_key=api_key, use_cache=False, services=services, **request)
+        # One line each, so they fit a table cell or an "Idea:" line
+        fresh = [' '.join(re.sub(r"^\s*\d+[.)]\s*", '', idea).split()) for idea in split_ideas(response)]
+        if records:
+            records = list(records)
+            for position, idea in zip(positions, fresh):
+                records[position] = dict(records[position], idea=idea)
+
+    replaced = positions[:len(fresh)]
+    text = replace_items(text, [items[p] for p in replaced], fresh)
+    return text, records, replaced
+
+# =========================
+# CONTENT PLANS
+# =========================
+def split_plan_windows(num_days, chunk_days):
+    """Split a plan into consecutive day windows, each tagged with a campaign phase"""
+    windows = []
+    for index, start_day in enumerate(range(1, num_days + 1, chunk_days)):
+        windows.append({
+            'index': index,
+            'start_day': start_day,
+            'end_day': min(start_day + chunk_days - 1, num_days)
+        })
+    for window in windows:
+        window['phase'] = PLAN_PHASES[window['index'] * len(PLAN_PHASES) // len(windows)]
+        window['all_windows'] = windows
+    return windows
+
+def run_plan_chunk(window, request, api_key, retries, services=None):
+    """Generate one plan window, re-running only this window if it ends on a transient failure"""
+    services = services or get_services()
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            text = fetch_completion(api_key=api_key, services=services, **request)
+        except Exception as e:
+            delay = plan_chunk_retry_delay(e, attempt, retries, services.scheduler.retryable)
+            if delay is None:
+                return plan_chunk_report(window, None, started, attempt, e)
+            time.sleep(delay)
+            continue
+        return plan_chunk_report(window, text, started, attempt)
+
+async def arun_plan_chunk(engine, window, request, api_key, retries):
+    """Async twin of run_plan_chunk for an AsyncEngine"""
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            text = await engine.acomplete(api_key=api_key, **request)
+        except Exception as e:
+            delay = plan_chunk_retry_delay(e, attempt, retries, engine.retryable)
+            if delay is None:
+                return plan_chunk_report(window, None, started, attempt, e)
+            await asyncio.sleep(delay)
+            continue
+        return plan_chunk_report(window, text, started, attempt)
+
+def plan_chunk_retry_delay(error, attempt, retries, retryable):
+    """Seconds to wait before re-running a failed plan chunk, or None to give up
+
+    Every request already goes through the scheduler, which retries rate
+    limits, server errors and dropped connections with backoff. A chunk is
+    only re-run when it still ended on one of those; auth errors and other
+    rejected requests would fail the same way again.
+    """
+    if attempt > retries or not retryable(error):
+        return None
+    return min(2 ** attempt, 16)
+
+def plan_chunk_report(window, text, started, attempts, error=None):
+    """Per-chunk result with latency and attempt count"""
+    return {
+        'index': window['index'],
+        'start_day': window['start_day'],
+        'end_day': window['end_day'],
+        'text': text,
+        'latency': time.perf_counter() - started,
+        'attempts': attempts,
+        'error': str(error) if error else None
+    }
+
+def iter_plan_chunks(num_days, platform, brand_voice, content_focus, posting_frequency, topic, api_key, services=None, engine=None):
+    """Generate plan day-windows in parallel, yielding each chunk report as it finishes"""
+    services = services or get_services()
+    windows = split_plan_windows(num_days, max(settings.PLAN_CHUNK_DAYS, 1))
+    requests = [
+        plan_request(num_days, platform, brand_voice, content_focus, posting_frequency, topic, window)
+        for window in windows
+    ]
+
+    if engine is not None:
+        futures = [
+            engine.run(arun_plan_chunk(engine, window, request, api_key, settings.PLAN_CHUNK_RETRIES))
+            for window, request in zip(windows, requests)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+        return
+
+    with ThreadPoolExecutor(max_workers=settings.MAX_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(run_plan_chunk, window, request, api_key, settings.PLAN_CHUNK_RETRIES, services)
+            for window, request in zip(windows, requests)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+def stitch_plan(reports):
+    """Join chunk reports back into one plan in day order"""
+    return '\n\n'.join(
+        r['text'] if r['text'] else f"**Days {r['start_day']}-{r['end_day']}:** _not generated_"
+        for r in sorted(reports, key=lambda r: r['index'])
+    )
+
+def generate_content_plan(num_days, platform, brand_voice, content_focus, posting_frequency, topic, api_key, services=None, engine=None):
+    """Generate a full content plan; returns (plan_text, chunk_reports)"""
+    if num_days <= max(settings.PLAN_CHUNK_DAYS, 1):
+        request = plan_request(num_days, platform, brand_voice, content_focus, posting_frequency, topic)
+        if engine is not None:
+            return engine.complete(api_key=api_key, **request), []
+        return fetch_completion(api_key=api_key, services=services, **request), []
+
+    reports = list(iter_plan_chunks(
+        num_days, platform, brand_voice, content_focus, posting_frequency, topic, api_key, services, engine
+    ))
+    if not any(r['text'] for r in reports):
+        raise RuntimeError(f"Could not generate the content plan: {reports[0]['error']}")
+    return stitch_plan(reports), sorted(reports, key=lambda r: r['index'])
@@ -0,0 +1,250 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+import agent_core as core
+import settings
+from groq_client import GroqAPIError, error_message_from
+from metrics import status_of
+from model_router import should_fall_back
+from rate_limiter import RETRY_STATUSES
+
+
+def is_retryable(exc):
+    """True for rate limits, transient server errors and httpx transport failures"""
+    if getattr(exc, "status_code", None) in RETRY_STATUSES:
+        return True
+    return isinstance(exc, httpx.TransportError)
+
+
+class AsyncEngine:
+    """Async Groq requests on a shared httpx client and a background event loop
+
+    Calls take the same arguments and return the same text as call_groq_api,
+    and share the process-wide response cache and rate-limit scheduler.
+    """
+
+    def __init__(
+        self,
+        services=None,
+        api_url=settings.GROQ_API_URL,
+        max_connections=settings.HTTP_POOL_MAXSIZE,
+        max_concurrency=settings.MAX_CONCURRENCY,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+    ):
+        self.services = services or core.get_services()
+        self.api_url = api_url
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="groq-async-engine", daemon=True)
+        self._thread.start()
+
+        # The client and semaphore must be created on the loop that uses them
+        self._client = None
+        self._semaphore = None
+        self.run(self._setup(max_connections, max_concurrency, connect_timeout, read_timeout)).result()
+
+    async def _setup(self, max_connections, max_concurrency, connect_timeout, read_timeout):
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(max_connections),
+                max_keepalive_connections=int(max_connections),
+            ),
+            timeout=httpx.Timeout(float(read_timeout), connect=float(connect_timeout)),
+        )
+        self._semaphore = asyncio.Semaphore(max(int(max_concurrency), 1))
+
+    def retryable(self, exc):
+        """True for failures the engine retries with backoff (see is_retryable)"""
+        return is_retryable(exc)
+
+    def run(self, coro):
+        """Schedule a coroutine on the engine loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _post(self, headers, payload, timing=None):
+        extensions = {}
+        if timing is not None:
+            # httpcore trace events time TCP connect and TLS handshake on new connections
+            async def trace(event, info):
+                name = event.rsplit(".", 1)[0]
+                if name in ("connection.connect_tcp", "connection.start_tls"):
+                    if event.endswith(".started"):
+                        timing[name] = time.perf_counter()
+                    elif event.endswith(".complete") and name in timing:
+                        timing["connect"] = timing.get("connect", 0.0) + time.perf_counter() - timing.pop(name)
+            extensions["trace"] = trace
+
+        response = await self._client.post(self.api_url, headers=headers, json=payload, extensions=extensions)
+        if response.status_code != 200:
+            raise GroqAPIError(response.status_code, error_message_from(response), response.headers)
+        return response
+
+    async def acomplete(self, prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, json_mode=False, generator=None):
+        """Cached, rate-limited completion; retries 429/5xx and transport errors with backoff"""
+        core.check_api_key(api_key)
+        cache = self.services.cache
+        timer = self.services.metrics.start(generator)
+
+        router = self.services.router
+        cache_keys = core.request_cache_keys(router, generator, prompt, max_tokens, temperature, json_mode, api_key)
+        cache_key = next(iter(cache_keys.values()))
+        if use_cache:
+            cached = core.cached_completion(cache, cache_keys)
+            if cached is not None:
+                timer.finish(200, cache_hit=True)
+                return cached
+
+        flight, leader = core.join_flight(self.services, cache_key, use_cache)
+        if flight is not None and not leader:
+            # Shielded so a cancelled waiter does not cancel the leader's future
+            await asyncio.wait([asyncio.shield(asyncio.wrap_future(flight))])
+            try:
+                content = core.shared_result(flight)
+            except Exception as exc:
+                timer.finish(status_of(exc), coalesced=True)
+                raise
+            if content is not None:
+                timer.finish(200, coalesced=True)
+                return content
+
+        if not leader:
+            return await self._route(prompt, api_key, max_tokens, temperature, json_mode, cache_keys, timer, generator)
+        try:
+            content = await self._route(prompt, api_key, max_tokens, temperature, json_mode, cache_keys, timer, generator)
+        except Exception as exc:
+            self.services.inflight.settle(cache_key, error=exc)
+            raise
+        except BaseException:
+            self.services.inflight.settle(cache_key)
+            raise
+        self.services.inflight.settle(cache_key, content)
+        return content
+
+    async def _route(self, prompt, api_key, max_tokens, temperature, json_mode, cache_keys, timer, generator):
+        """Try the task's models in turn while a failure is one another model could avoid"""
+        router = self.services.router
+        models = router.models(generator)
+        for position, model in enumerate(models):
+            try:
+                return await self._request(prompt, api_key, max_tokens, temperature, json_mode, cache_keys, timer, model, generator)
+            except Exception as exc:
+                fall_back = position + 1 < len(models) and should_fall_back(exc)
+                router.record(model, generator, error=exc, fell_back=fall_back)
+                if not fall_back:
+                    timer.finish(status_of(exc), model=model)
+                    raise
+
+    async def _request(self, prompt, api_key, max_tokens, temperature, json_mode, cache_keys, timer, model=None, generator=None):
+        """Send one uncached request with retries, record its metrics and cache the text
+
+        A response cut off at max_tokens is continued rather than regenerated.
+        """
+        parts = []
+        usage = {}
+        sent_at = {}
+        for _ in range(settings.MAX_CONTINUATIONS + 1):
+            response, timing = await self._send(
+                prompt, api_key, max_tokens, temperature, json_mode, ''.join(parts) or None, timer, model, sent_at
+            )
+            if not parts:
+                connect = timing.get("connect", 0.0)
+            step = {}
+            parts.append(self.services.client.parse_completion(response, step))
+            if core.add_usage(usage, step)["finish_reason"] != "length":
+                break
+
+        content = ''.join(parts)
+        self.services.router.record(
+            model, generator, time.perf_counter() - sent_at["first"],
+            finish_reason=usage.get("finish_reason"),
+            completion_tokens=usage.get("completion_tokens"),
+            invalid_json=json_mode and not core.is_json(content)
+        )
+        timer.finish(200, connect=connect, continuations=len(parts) - 1, model=model, **usage)
+        self.services.cache.set(cache_keys[model], content)
+        return content
+
+    async def _send(self, prompt, api_key, max_tokens, temperature, json_mode, partial, timer, model=None, sent_at=None):
+        """POST one request under the rate limits, retrying 429/5xx; returns (response, timing)"""
+        scheduler = self.services.scheduler
+        headers, payload = core.build_groq_request(
+            prompt, api_key, max_tokens, temperature, json_mode=json_mode, partial=partial, model=model
+        )
+        estimated_tokens = core.estimate_request_tokens(prompt, max_tokens, partial)
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                wait = scheduler.reserve(estimated_tokens)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                timing = {}
+                timer.sent()
+                if sent_at is not None:
+                    sent_at.setdefault("first", time.perf_counter())
+                try:
+                    response = await self._post(headers, payload, timing)
+                except Exception as exc:
+                    scheduler.observe_headers(getattr(exc, "headers", None))
+                    if not is_retryable(exc) or attempt >= scheduler.max_retries:
+                        scheduler.record("failures")
+                        raise
+                    scheduler.record("retries")
+                    await asyncio.sleep(scheduler.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+
+                scheduler.observe_headers(response.headers)
+                return response, timing
+
+    def submit(self, prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, json_mode=False, generator=None):
+        """Start a completion from any thread; returns a concurrent.futures.Future"""
+        return self.run(self.acomplete(prompt, api_key, max_tokens, temperature, use_cache, json_mode, generator))
+
+    def complete(self, prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, json_mode=False, generator=None):
+        """Blocking completion, same shape as call_groq_api"""
+        return self.submit(prompt, api_key, max_tokens, temperature, use_cache, json_mode, generator).result()
+
+    async def agather(self, requests, api_key, use_cache=True, return_exceptions=True):
+        """Run many requests concurrently; each is a prompt string or a dict of acomplete arguments"""
+        return await asyncio.gather(
+            *(
+                self.acomplete(api_key=api_key, use_cache=use_cache, **_as_request(request))
+                for request in requests
+            ),
+            return_exceptions=return_exceptions,
+        )
+
+    def gather(self, requests, api_key, use_cache=True, return_exceptions=True):
+        """Blocking gather: results (or exceptions) in request order"""
+        return self.run(self.agather(requests, api_key, use_cache, return_exceptions)).result()
+
+    def close(self):
+        """Close the HTTP client and stop the event loop"""
+        if self._loop.is_closed():
+            return
+        self.run(self._client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _as_request(request):
+    if isinstance(request, str):
+        return {"prompt": request}
+    return dict(request)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_async_engine():
+    """Return the process-wide AsyncEngine, creating it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncEngine()
+        return _engine
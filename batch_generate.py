@@ -0,0 +1,367 @@
+"""Headless batch generation for the Social Media Agent.
+
+Reads topics/brands from a CSV or JSONL file and writes ideas, captions,
+calendars or plans as JSONL, one line per input row:
+
+    python batch_generate.py topics.csv -o results.jsonl --task ideas --concurrency 4
+    python batch_generate.py topics.csv -o results.jsonl --resume
+
+Each row may set its own ``task`` (ideas, caption, calendar, plan) and any of
+``id, topic, platform, count, idea, platforms, start_date, end_date, days,
+brand_voice, content_focus, posting_frequency, brand_name, industry, tone,
+target_audience``. The output file doubles as the checkpoint: with
+``--resume`` rows that already succeeded are skipped. With ``--structured``
+ideas, captions and calendars are written as lists of JSON records.
+
+``--offline`` fills ideas, captions and calendars from the template engine
+instead of the API (no key needed, thousands of rows per second), e.g. to
+pre-populate calendars:
+
+    python batch_generate.py topics.csv -o drafts.jsonl --task calendar --offline
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date, timedelta
+
+import agent_core as core
+import settings
+from async_engine import AsyncEngine
+from structured_output import parse_records
+
+TASKS = ("ideas", "caption", "calendar", "plan")
+
+
+# =========================
+# INPUT / CHECKPOINT
+# =========================
+def read_rows(path):
+    """Yield input rows from a CSV or JSONL file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def completed_ids(output_path):
+    """Ids that already have a successful result in the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def split_list(value, default):
+    """Split "a, b; c" style cells into a list"""
+    if isinstance(value, list):
+        return value or default
+    items = [item.strip() for item in str(value or "").replace(";", ",").split(",")]
+    return [item for item in items if item] or default
+
+
+# =========================
+# GENERATION
+# =========================
+def row_brand_info(row):
+    """Brand fields of an input row"""
+    return {
+        'name': row.get('brand_name') or row.get('brand') or '',
+        'industry': row.get('industry') or '',
+        'tone': row.get('tone') or core.DEFAULT_BRAND_INFO['tone'],
+        'target_audience': row.get('target_audience') or ''
+    }
+
+
+def row_dates(row):
+    """(start_date, end_date) of a calendar row; end defaults to a week after start"""
+    if not row.get('start_date'):
+        return None, None
+    start_date = date.fromisoformat(str(row['start_date']))
+    end_date = date.fromisoformat(str(row['end_date'])) if row.get('end_date') else start_date + timedelta(days=6)
+    return start_date, end_date
+
+
+async def arun_row(row, task, api_key, engine, structured=False):
+    """Generate the output for one input row on the async engine"""
+    brand_info = row_brand_info(row)
+    topic = row.get('topic') or ''
+    platform = row.get('platform') or 'Instagram'
+
+    if task == "ideas":
+        count = int(row.get('count') or 5)
+        if platform == "All Platforms":
+            results = await engine.agather(
+                [core.ideas_request(topic, p, count, brand_info, structured) for p in core.FANOUT_PLATFORMS],
+                api_key,
+                return_exceptions=True
+            )
+            # Platforms that failed are reported on the row instead of failing the whole row
+            ideas = {p: text for p, text in zip(core.FANOUT_PLATFORMS, results) if not isinstance(text, Exception)}
+            failed = {p: str(error) for p, error in zip(core.FANOUT_PLATFORMS, results) if isinstance(error, Exception)}
+            if not ideas:
+                raise next(error for error in results if isinstance(error, Exception))
+            meta = {'failed_platforms': failed} if failed else None
+            if structured:
+                return [
+                    dict(record, platform=record['platform'] or p)
+                    for p, text in ideas.items()
+                    for record in parse_records('idea', text)
+                ], meta
+            return core.merge_fanout_ideas(ideas), meta
+        text = await engine.acomplete(api_key=api_key, **core.ideas_request(topic, platform, count, brand_info, structured))
+        return (parse_records('idea', text) if structured else text), None
+    if task == "caption":
+        idea = row.get('idea') or topic
+        text = await engine.acomplete(api_key=api_key, **core.caption_request(idea, platform, brand_info, structured))
+        return (parse_records('caption', text) if structured else text), None
+    if task == "calendar":
+        platforms = split_list(row.get('platforms'), ["Instagram", "Twitter"])
+        if not row.get('start_date'):
+            text = await engine.acomplete(api_key=api_key, **core.calendar_request(topic, platforms, brand_info, structured))
+            return (parse_records('calendar_entry', text) if structured else text), None
+
+        start_date, end_date = row_dates(row)
+        weeks = core.split_calendar_weeks(start_date, end_date)
+        results = await engine.agather(
+            [
+                core.calendar_request(topic, platforms, brand_info, structured, week['start_date'], week['end_date'])
+                for week in weeks
+            ],
+            api_key,
+            return_exceptions=False
+        )
+        if structured:
+            return [record for text in results for record in parse_records('calendar_entry', text)], None
+        return core.stitch_calendar(list(zip(weeks, results))), None
+    if task == "plan":
+        plan_args = (
+            int(row.get('days') or 7),
+            platform,
+            row.get('brand_voice') or brand_info['tone'],
+            split_list(row.get('content_focus'), ["Educational", "Entertaining"]),
+            row.get('posting_frequency') or "1 post per day",
+            topic
+        )
+        if plan_args[0] <= max(settings.PLAN_CHUNK_DAYS, 1):
+            return await engine.acomplete(api_key=api_key, **core.plan_request(*plan_args)), None
+
+        windows = core.split_plan_windows(plan_args[0], max(settings.PLAN_CHUNK_DAYS, 1))
+        reports = await asyncio.gather(*(
+            core.arun_plan_chunk(engine, window, core.plan_request(*plan_args, window), api_key, settings.PLAN_CHUNK_RETRIES)
+            for window in windows
+        ))
+        if not any(r['text'] for r in reports):
+            raise RuntimeError(f"Could not generate the content plan: {reports[0]['error']}")
+        chunks = [
+            {k: r[k] for k in ('start_day', 'end_day', 'latency', 'attempts', 'error')}
+            for r in reports
+        ]
+        return core.stitch_plan(reports), {'chunks': chunks}
+    raise ValueError(f"Unknown task '{task}'. Expected one of: {', '.join(TASKS)}")
+
+
+def run_row_offline(row, task, structured=False):
+    """Generate the output for one input row from templates, without API calls"""
+    brand_info = row_brand_info(row)
+    topic = row.get('topic') or ''
+    platform = row.get('platform') or 'Instagram'
+
+    if task == "ideas":
+        count = int(row.get('count') or 5)
+        if structured:
+            return core.fallback_idea_records(topic, platform, count, brand_info), None
+        return core.fallback_ideas(topic, platform, count, brand_info), None
+    if task == "caption":
+        idea = row.get('idea') or topic
+        if structured:
+            return [core.fallback_caption_record(idea, platform, brand_info)], None
+        return core.create_fallback_caption(idea, platform, brand_info), None
+    if task == "calendar":
+        platforms = split_list(row.get('platforms'), ["Instagram", "Twitter"])
+        start_date, end_date = row_dates(row)
+        if structured:
+            return core.fallback_calendar_records(topic, platforms, start_date, end_date, brand_info), None
+        return core.create_fallback_calendar(topic, platforms, start_date, end_date, brand_info), None
+    if task == "plan":
+        raise ValueError("Plans need the API; --offline covers ideas, captions and calendars")
+    raise ValueError(f"Unknown task '{task}'. Expected one of: {', '.join(TASKS)}")
+
+
+def process_offline(row_id, row, task, structured=False):
+    """Run one row from templates and build its output record"""
+    started = time.perf_counter()
+    record = {'id': row_id, 'task': task, 'input': row}
+    try:
+        output, _ = run_row_offline(row, task, structured)
+        record.update(status='ok', output=output)
+    except Exception as e:
+        record.update(status='error', error=f"{type(e).__name__}: {e}")
+    record['latency'] = round(time.perf_counter() - started, 6)
+    return record
+
+
+async def aprocess(row_id, row, task, api_key, engine, structured=False):
+    """Run one row and build its output record"""
+    started = time.perf_counter()
+    record = {'id': row_id, 'task': task, 'input': row}
+    try:
+        output, meta = await arun_row(row, task, api_key, engine, structured)
+        record.update(status='ok', output=output)
+        if meta:
+            record['meta'] = meta
+    except Exception as e:
+        record.update(status='error', error=f"{type(e).__name__}: {e}")
+    record['latency'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+# =========================
+# PROGRESS
+# =========================
+class Progress:
+    """Single-line progress report on stderr"""
+
+    def __init__(self, total, quiet=False):
+        self.total = total
+        self.quiet = quiet
+        self.ok = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def update(self, record):
+        if record['status'] == 'ok':
+            self.ok += 1
+        else:
+            self.failed += 1
+        if self.quiet:
+            return
+
+        finished = self.ok + self.failed
+        elapsed = time.perf_counter() - self.started
+        rate = finished / elapsed if elapsed else 0.0
+        eta = (self.total - finished) / rate if rate else 0.0
+        sys.stderr.write(
+            f"\r[{finished}/{self.total}] ok={self.ok} failed={self.failed} "
+            f"{rate:.2f} items/s ETA {eta / 60:.1f} min   "
+        )
+        sys.stderr.flush()
+
+    def close(self):
+        if not self.quiet:
+            sys.stderr.write("\n")
+
+
+# =========================
+# ENTRY POINT
+# =========================
+def run_batch(input_path, output_path, api_key, default_task="ideas", concurrency=None, resume=False, quiet=False, structured=False, offline=False):
+    """Generate every pending row of input_path into output_path; returns (ok, failed)
+
+    With offline=True rows are filled from templates and no API key is needed.
+    """
+    if not offline:
+        core.check_api_key(api_key)
+    concurrency = max(int(concurrency or settings.MAX_CONCURRENCY), 1)
+
+    done = completed_ids(output_path) if resume else set()
+    pending = []
+    for number, row in enumerate(read_rows(input_path), start=1):
+        row_id = str(row.get('id') or number)
+        if row_id not in done:
+            pending.append((row_id, row))
+
+    progress = Progress(len(pending), quiet)
+    mode = "a" if resume else "w"
+    if offline:
+        with open(output_path, mode, encoding="utf-8") as out:
+            for row_id, row in pending:
+                task = (row.get('task') or default_task).strip().lower()
+                record = process_offline(row_id, row, task, structured)
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                progress.update(record)
+        progress.close()
+        return progress.ok, progress.failed
+
+    # Rows run as coroutines on one event loop; the engine caps concurrent HTTP requests
+    engine = AsyncEngine(max_concurrency=concurrency)
+    try:
+        with open(output_path, mode, encoding="utf-8") as out:
+            rows = iter(pending)
+            in_flight = set()
+            while True:
+                # Keep a bounded window of work in flight so huge inputs stay cheap
+                while len(in_flight) < concurrency * 2:
+                    try:
+                        row_id, row = next(rows)
+                    except StopIteration:
+                        break
+                    task = (row.get('task') or default_task).strip().lower()
+                    in_flight.add(engine.run(aprocess(row_id, row, task, api_key, engine, structured)))
+
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    out.flush()
+                    progress.update(record)
+    finally:
+        engine.close()
+    progress.close()
+    return progress.ok, progress.failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate social media content in bulk without the Streamlit UI")
+    parser.add_argument("input", help="CSV or JSONL file of topics/brands")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write results to (also the checkpoint)")
+    parser.add_argument("--task", choices=TASKS, default="ideas", help="Task for rows without a 'task' column")
+    parser.add_argument("--concurrency", type=int, default=settings.MAX_CONCURRENCY, help="Rows generated in parallel")
+    parser.add_argument("--resume", action="store_true", help="Skip rows that already succeeded in the output file")
+    parser.add_argument("--api-key", default=os.getenv("GROQ_API_KEY", ""), help="Groq API key (default: $GROQ_API_KEY)")
+    parser.add_argument("--structured", action="store_true", help="Write ideas, captions and calendars as JSON records")
+    parser.add_argument("--offline", action="store_true", help="Fill ideas, captions and calendars from templates, without API calls")
+    parser.add_argument("--quiet", action="store_true", help="Don't print progress")
+    args = parser.parse_args(argv)
+
+    try:
+        ok, failed = run_batch(
+            args.input,
+            args.output,
+            args.api_key,
+            default_task=args.task,
+            concurrency=args.concurrency,
+            resume=args.resume,
+            quiet=args.quiet,
+            structured=args.structured,
+            offline=args.offline
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Done: {ok} succeeded, {failed} failed -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
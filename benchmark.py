@@ -0,0 +1,315 @@
+"""Offline benchmarks for the Social Media Agent generators.
+
+Starts a local mock of the Groq API (see mock_groq.py), drives the ideas,
+caption, calendar and content-plan generators at several concurrency levels
+and writes throughput, tail latency and memory as JSON:
+
+    python benchmark.py -o bench.json
+    python benchmark.py --scenarios ideas,plan --concurrency 1,8,32 --rate-429 0.05 -o bench.json
+    python benchmark.py -o new.json --baseline bench.json
+
+Every scenario/concurrency pair gets fresh services (client, scheduler and
+metrics) and unique topics, so results never include response-cache hits.
+The default rate limits are high enough that the local scheduler does not
+throttle; pass --rpm/--tpm to benchmark against a real tier's limits.
+"""
+import argparse
+import json
+import platform as platform_info
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import agent_core as core
+import settings
+from async_engine import AsyncEngine
+from groq_client import GroqClient
+from metrics import CallMetrics, cache_label, percentile
+from mock_groq import MockGroqServer
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache
+
+API_KEY = "gsk_benchmark"
+PLATFORMS = ["Instagram", "Twitter"]
+START_DATE = date(2025, 1, 6)
+
+
+# =========================
+# SCENARIOS
+# =========================
+def run_ideas(ctx, topic):
+    return core.generate_content_ideas(topic, "Instagram", 5, API_KEY, core.DEFAULT_BRAND_INFO, False, ctx['services'])
+
+def run_ideas_fanout(ctx, topic):
+    for _, _, error in core.iter_ideas_fanout(
+        topic, 5, API_KEY, core.DEFAULT_BRAND_INFO, False, ctx['services'], engine=ctx['engine']
+    ):
+        if error is not None:
+            raise error
+
+def run_ideas_stream(ctx, topic):
+    request = core.ideas_request(topic, "Instagram", 5, core.DEFAULT_BRAND_INFO)
+    return ''.join(core.stream_completion(api_key=API_KEY, use_cache=False, services=ctx['services'], **request))
+
+def run_caption(ctx, topic):
+    return core.generate_caption(topic, "Instagram", API_KEY, core.DEFAULT_BRAND_INFO, False, ctx['services'])
+
+def run_calendar(ctx, topic):
+    for _, _, error in core.iter_calendar_weeks(
+        topic, PLATFORMS, API_KEY, core.DEFAULT_BRAND_INFO, START_DATE,
+        START_DATE + timedelta(days=ctx['days'] - 1), False, ctx['services'], ctx['engine']
+    ):
+        if error is not None:
+            raise error
+
+def run_plan(ctx, topic):
+    return core.generate_content_plan(
+        ctx['days'], "Instagram", "Professional", ["Educational", "Entertaining"], "1 post per day",
+        topic, API_KEY, ctx['services'], ctx['engine']
+    )
+
+SCENARIOS = {
+    'ideas': run_ideas,
+    'ideas_fanout': run_ideas_fanout,
+    'ideas_stream': run_ideas_stream,
+    'caption': run_caption,
+    'calendar': run_calendar,
+    'plan': run_plan,
+}
+
+
+# =========================
+# RUNNER
+# =========================
+def make_services(api_url, rpm, tpm, max_retries):
+    """Isolated services pointed at the mock server"""
+    return core.Services(
+        client=GroqClient(api_url=api_url),
+        cache=ResponseCache(max_entries=16),
+        scheduler=RateLimitScheduler(
+            requests_per_minute=rpm,
+            tokens_per_minute=tpm,
+            max_retries=max_retries,
+            base_delay=settings.RETRY_BASE_DELAY,
+            max_delay=settings.RETRY_MAX_DELAY
+        ),
+        metrics=CallMetrics(max_records=100000)
+    )
+
+
+def rss_kb():
+    """Peak resident set size of this process in KiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_scenario(name, concurrency, operations, mock, args):
+    """Run one scenario at one concurrency level; returns its result row"""
+    services = make_services(mock.url, args.rpm, args.tpm, args.max_retries)
+    engine = AsyncEngine(services=services, api_url=mock.url, max_concurrency=concurrency) if args.engine == "async" else None
+    ctx = {'services': services, 'engine': engine, 'days': args.days}
+    before = mock.stats()
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def operation(number):
+        started = time.perf_counter()
+        try:
+            SCENARIOS[name](ctx, f"{name} benchmark topic {concurrency}-{number}")
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(operation, range(operations)))
+    finally:
+        duration = time.perf_counter() - started
+        memory_peak = tracemalloc.get_traced_memory()[1] // 1024 if args.trace_memory else None
+        if args.trace_memory:
+            tracemalloc.stop()
+        if engine is not None:
+            engine.close()
+        services.client.session.close()
+
+    after = mock.stats()
+    calls = [r for r in services.metrics.records() if cache_label(r) == 'miss']
+    row = {
+        'scenario': name,
+        'concurrency': concurrency,
+        'operations': operations,
+        'succeeded': len(latencies),
+        'errors': errors,
+        'duration_s': round(duration, 4),
+        'ops_per_s': round(len(latencies) / duration, 3) if duration else None,
+        'http_requests': after['requests'] - before['requests'],
+        'http_requests_per_s': round((after['requests'] - before['requests']) / duration, 3) if duration else None,
+        'status_429': after['status_429'] - before['status_429'],
+        'status_503': after['status_503'] - before['status_503'],
+        'retries': services.scheduler.stats()['retries'],
+        'coalesced': services.inflight.stats()['coalesced'],
+    }
+    for q in (50, 95, 99):
+        value = percentile(latencies, q)
+        row[f'latency_p{q}_s'] = round(value, 4) if value is not None else None
+    row['latency_max_s'] = round(max(latencies), 4) if latencies else None
+    for field in ('ttft', 'queue_wait'):
+        value = percentile([r[field] for r in calls if r[field] is not None], 95)
+        row[f'call_{field}_p95_s'] = round(value, 4) if value is not None else None
+    row['memory_peak_kb'] = memory_peak
+    row['rss_max_kb'] = rss_kb()
+    return row
+
+
+def git_revision():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    """Run every requested scenario and concurrency level against a fresh mock server"""
+    mock = MockGroqServer(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_429=args.rate_429,
+        rate_503=args.rate_503,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    results = []
+    with mock:
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                operations = args.operations or max(concurrency * 4, 8)
+                row = run_scenario(name, concurrency, operations, mock, args)
+                results.append(row)
+                if not args.quiet:
+                    sys.stderr.write(format_row(row) + "\n")
+
+    return {
+        'run': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform_info.python_version(),
+            'platform': platform_info.platform(),
+            'engine': args.engine,
+            'mock': {
+                'latency': args.latency,
+                'tokens_per_second': args.tokens_per_second,
+                'completion_tokens': args.completion_tokens,
+                'rate_429': args.rate_429,
+                'rate_503': args.rate_503,
+                'retry_after': args.retry_after,
+                'seed': args.seed,
+            },
+            'rpm': args.rpm,
+            'tpm': args.tpm,
+            'days': args.days,
+        },
+        'results': results,
+    }
+
+
+# =========================
+# REPORTING
+# =========================
+def format_row(row):
+    p95 = row['latency_p95_s']
+    p99 = row['latency_p99_s']
+    return (
+        f"{row['scenario']:<13} c={row['concurrency']:<3} ok={row['succeeded']}/{row['operations']} "
+        f"{row['ops_per_s'] or 0:8.2f} ops/s {row['http_requests_per_s'] or 0:8.2f} req/s "
+        f"p95={p95 if p95 is not None else '-'}s p99={p99 if p99 is not None else '-'}s "
+        f"429={row['status_429']} 503={row['status_503']} rss={row['rss_max_kb']}KiB"
+    )
+
+
+def compare(current, baseline):
+    """Lines comparing throughput and p95 latency with a previous run"""
+    previous = {(r['scenario'], r['concurrency']): r for r in baseline['results']}
+    lines = []
+    for row in current['results']:
+        old = previous.get((row['scenario'], row['concurrency']))
+        if old is None:
+            continue
+        changes = []
+        for field in ('ops_per_s', 'latency_p95_s', 'rss_max_kb'):
+            if row[field] and old.get(field):
+                changes.append(f"{field} {old[field]} -> {row[field]} ({(row[field] - old[field]) / old[field]:+.1%})")
+        lines.append(f"{row['scenario']:<13} c={row['concurrency']:<3} " + ", ".join(changes))
+    return lines
+
+
+# =========================
+# ENTRY POINT
+# =========================
+def int_list(value):
+    return [max(int(item), 1) for item in value.split(",") if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generators against a local mock Groq API")
+    parser.add_argument("-o", "--output", help="JSON file to write results to (default: stdout)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16], help="Comma-separated concurrency levels")
+    parser.add_argument("--operations", type=int, default=0, help="Operations per level (default: 4 x concurrency, at least 8)")
+    parser.add_argument("--engine", choices=("threads", "async"), default="threads", help="Fan-out engine for ideas_fanout, calendar and plan")
+    parser.add_argument("--days", type=int, default=14, help="Days covered by the calendar and plan scenarios")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock seconds before each response starts")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Mock generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Mock tokens per completion")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of a mock 429 response")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="Probability of a mock 503 response")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with mock 429s")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for error injection")
+    parser.add_argument("--rpm", type=int, default=1000000, help="Scheduler requests/min limit")
+    parser.add_argument("--tpm", type=int, default=1000000000, help="Scheduler tokens/min limit")
+    parser.add_argument("--max-retries", type=int, default=settings.RETRY_MAX_ATTEMPTS, help="Retries on 429/5xx")
+    parser.add_argument("--trace-memory", action="store_true", help="Report the tracemalloc peak per level (slows the run)")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--quiet", action="store_true", help="Don't print per-level results")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(report, baseline):
+            sys.stderr.write(line + "\n")
+
+    return 1 if any(row['errors'] for row in report['results']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
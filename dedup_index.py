@@ -0,0 +1,161 @@
+import threading
+import zlib
+
+import numpy as np
+
+from history_store import tokenize
+
+# Mersenne prime for the universal hash family; 32-bit inputs times 31-bit
+# coefficients stay below 2**63, so the products never overflow uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+# Words that carry no meaning for "is this the same idea"
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or our that the their this to with your you".split()
+)
+
+
+def normalize_words(text):
+    """Content words of text with stopwords dropped and plurals folded"""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+        for word in tokenize(str(text)) if word not in STOPWORDS
+    ]
+
+
+def shingles(text, size=2):
+    """Hashed word n-grams of text, for every n from 1 to size
+
+    Ideas and calendar slots are short, so single words keep paraphrases
+    close while the longer n-grams reward matching word order.
+    """
+    words = normalize_words(text)
+    grams = [' '.join(words[i:i + n]) for n in range(1, size + 1) for i in range(len(words) - n + 1)]
+    if not grams:
+        return np.empty(0, dtype=np.uint64)
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)))
+
+
+class MinHashLSH:
+    """Near-duplicate index of short texts using MinHash signatures and LSH banding
+
+    Texts are compared by Jaccard similarity of their word shingles. Queries
+    look up only the LSH buckets their signature falls into, so they stay
+    sub-linear in the number of indexed items; candidates are then scored
+    against their stored signatures in one vectorised comparison.
+    """
+
+    def __init__(self, num_perm=96, bands=32, threshold=0.5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = int(num_perm)
+        self.bands = int(bands)
+        self.rows = self.num_perm // self.bands
+        self.threshold = float(threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=self.num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._signatures = np.empty((64, self.num_perm), dtype=np.uint64)
+        self._alive = np.zeros(64, dtype=bool)
+        self._info = []
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._by_group = {}
+
+    def signature(self, text):
+        """MinHash signature of text, or None when it has no words"""
+        hashes = shingles(text)
+        if not hashes.size:
+            return None
+        # One row per permutation: (a * x + b) mod p over every shingle, then the minimum
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, text, group=None, **info):
+        """Index one text; info (e.g. topic, kind) is returned with matches. Returns its id or None"""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            item_id = len(self._info)
+            if item_id == len(self._signatures):
+                self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+                self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+            self._signatures[item_id] = signature
+            self._alive[item_id] = True
+            self._info.append(dict(info, text=str(text), group=group))
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(key, []).append(item_id)
+            if group is not None:
+                self._by_group.setdefault(group, []).append(item_id)
+        return item_id
+
+    def query(self, text, threshold=None):
+        """Indexed items similar to text, best first: [(similarity, info), ...]"""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        return self._query(signature, self.threshold if threshold is None else threshold)
+
+    def _query(self, signature, threshold):
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(key, ()))
+            candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            candidates = candidates[self._alive[candidates]]
+            if not candidates.size:
+                return []
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            info = [self._info[i] for i in candidates]
+
+        order = np.argsort(-similarity)
+        return [(float(similarity[i]), info[i]) for i in order if similarity[i] >= threshold]
+
+    def check(self, texts, threshold=None):
+        """Best match for each text among indexed items and earlier texts of the list, or None
+
+        Matches are (similarity, info) pairs; matches within the list have info {'number', 'text'}.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signatures = [self.signature(text) for text in texts]
+        matches = []
+        for position, signature in enumerate(signatures):
+            if signature is None:
+                matches.append(None)
+                continue
+            found = self._query(signature, threshold)
+            for earlier in range(position):
+                if signatures[earlier] is None:
+                    continue
+                similarity = float((signatures[earlier] == signature).mean())
+                if similarity >= threshold:
+                    found.append((similarity, {'number': earlier + 1, 'text': texts[earlier]}))
+            matches.append(max(found, key=lambda match: match[0]) if found else None)
+        return matches
+
+    def remove(self, group):
+        """Forget every item added with group (e.g. a deleted history entry)"""
+        with self._lock:
+            for item_id in self._by_group.pop(group, ()):
+                self._alive[item_id] = False
+
+    def groups(self):
+        """Groups that still have items in the index"""
+        with self._lock:
+            return set(self._by_group)
+
+    def clear(self):
+        """Forget every item"""
+        with self._lock:
+            self._alive[:] = False
+            self._info = []
+            self._buckets = [dict() for _ in range(self.bands)]
+            self._by_group = {}
+
+    def __len__(self):
+        with self._lock:
+            return int(self._alive.sum())
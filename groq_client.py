@@ -0,0 +1,225 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import settings
+
+# Seconds spent opening connections (TCP + TLS) during the current thread's request
+_connect_timing = threading.local()
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, "seconds", 0.0) + time.perf_counter() - started
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class GroqAPIError(Exception):
+    """Non-200 or malformed response from the Groq API"""
+
+    def __init__(self, status_code, message, headers=None):
+        super().__init__(f"Groq API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        self.headers = dict(headers or {})
+
+
+def error_message_from(response):
+    """Extract the error message from a failed Groq response"""
+    try:
+        err_body = response.json()
+        return err_body.get("error", {}).get("message", str(err_body))
+    except Exception:
+        return response.text
+
+
+def iter_sse_tokens(response, usage=None):
+    """Yield content tokens from a streamed (SSE) chat completion response
+
+    If usage is a dict it is filled with the token usage Groq sends in the final chunk
+    and the finish_reason of the choice ("stop", or "length" when max_tokens cut it off).
+    An error event raises GroqAPIError.
+    """
+    for raw_line in response.iter_lines():
+        if not raw_line:
+            continue
+        line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else raw_line
+        if not line.startswith("data:"):
+            continue
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+
+        chunk = json.loads(data)
+        if chunk.get("error"):
+            # An error event mid-stream means the text so far is incomplete
+            error = chunk["error"]
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            raise GroqAPIError(500, message)
+        if usage is not None:
+            usage.update(usage_from(chunk.get("x_groq") or chunk))
+        choices = chunk.get("choices") or []
+        if not choices:
+            continue
+        if usage is not None and choices[0].get("finish_reason"):
+            usage["finish_reason"] = choices[0]["finish_reason"]
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            yield content
+
+
+def usage_from(data):
+    """prompt_tokens/completion_tokens from a response body's usage block, if present"""
+    usage = data.get("usage") or {}
+    return {k: usage[k] for k in ("prompt_tokens", "completion_tokens") if k in usage}
+
+
+class GroqClient:
+    """Process-wide pooled HTTP client for the Groq Chat Completions endpoint"""
+
+    def __init__(
+        self,
+        api_url=settings.GROQ_API_URL,
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        keep_alive=settings.HTTP_KEEP_ALIVE,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+    ):
+        self.api_url = api_url
+        self.keep_alive = keep_alive
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self._ttft_lock = threading.Lock()
+        self._ttft_samples = deque(maxlen=200)
+
+        self.adapter = HTTPAdapter(
+            pool_connections=int(pool_connections),
+            pool_maxsize=int(pool_maxsize),
+            max_retries=0,
+        )
+        if keep_alive:
+            # Enable TCP keep-alive probes so idle pooled sockets stay usable
+            self.adapter.init_poolmanager(
+                int(pool_connections),
+                int(pool_maxsize),
+                socket_options=HTTPConnection.default_socket_options + [
+                    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                ],
+            )
+
+        # Time connection setup for the per-call metrics
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def post(self, headers, payload, stream=False):
+        """POST a chat completion payload over the pooled session"""
+        return self.session.post(
+            self.api_url,
+            headers=headers,
+            json=payload,
+            timeout=self.timeout,
+            stream=stream,
+        )
+
+    def send(self, headers, payload, stream=False):
+        """POST a payload and raise GroqAPIError unless the response is 200"""
+        _connect_timing.seconds = 0.0
+        response = self.post(headers, payload, stream=stream)
+        if response.status_code != 200:
+            error = GroqAPIError(response.status_code, error_message_from(response), response.headers)
+            response.close()
+            raise error
+        return response
+
+    def complete(self, headers, payload):
+        """Run a non-streamed completion and return the message content"""
+        return self.parse_completion(self.send(headers, payload))
+
+    def parse_completion(self, response, usage=None):
+        """Extract the message content from a completion response (and its token usage and finish_reason into usage)"""
+        data = response.json()
+        if not data.get("choices"):
+            raise GroqAPIError(response.status_code, "Unexpected API response format", response.headers)
+        if usage is not None:
+            usage.update(usage_from(data))
+            usage["finish_reason"] = data["choices"][0].get("finish_reason")
+        return data["choices"][0]["message"]["content"]
+
+    def connect_time(self):
+        """Seconds this thread's last send() spent opening connections (0 on a reused one)"""
+        return getattr(_connect_timing, "seconds", 0.0)
+
+    def pool_stats(self):
+        """Return pool hit/miss counters aggregated over all host pools"""
+        requests_sent = 0
+        connections_opened = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+
+        return {
+            "requests": requests_sent,
+            "hits": max(requests_sent - connections_opened, 0),
+            "misses": connections_opened,
+        }
+
+    def record_ttft(self, seconds):
+        """Record a time-to-first-token sample for a streamed call"""
+        with self._ttft_lock:
+            self._ttft_samples.append(float(seconds))
+
+    def ttft_stats(self):
+        """Return count, last and average time-to-first-token in seconds"""
+        with self._ttft_lock:
+            samples = list(self._ttft_samples)
+
+        if not samples:
+            return {"count": 0, "last": None, "avg": None}
+        return {
+            "count": len(samples),
+            "last": samples[-1],
+            "avg": sum(samples) / len(samples),
+        }
+
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
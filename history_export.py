@@ -0,0 +1,408 @@
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime, timedelta, timezone
+
+# History kinds in export order
+EXPORT_KINDS = ('ideas', 'caption', 'calendar', 'plan')
+
+# Columns of the CSV export; one row per history entry or bulk caption
+CSV_FIELDS = ('kind', 'entry_id', 'created', 'topic', 'platforms', 'start_date', 'end_date', 'days', 'text')
+
+# Format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'jsonl': ('jsonl', 'application/jsonl'),
+    'ics': ('ics', 'text/calendar'),
+}
+
+# Prepared export files start with this, so stale ones can be swept
+EXPORT_PREFIX = 'history_export_'
+
+# Events last this long when their slot has a posting time
+EVENT_MINUTES = 30
+
+_WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+_MARKUP = ' \t*#|-📅🗓️'
+_SLOT_RE = re.compile(
+    r"(?:day\s+(\d+)\b|(mon|tue|wed|thu|fri|sat|sun)(?:day|sday|nesday|rsday|urday)?\b(?=\s*(?:$|[|:,(\-]|\d{4}-))|(\d{4}-\d{2}-\d{2}))",
+    re.IGNORECASE,
+)
+_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\.?(?![a-z])|\b(\d{1,2}):(\d{2})\b", re.IGNORECASE)
+_FIELD_RE = re.compile(r"\**([A-Za-z][A-Za-z ]{1,20}?)\**:\**\s*(.+)")
+
+
+# =========================
+# HISTORY RECORDS
+# =========================
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_entries(history, kinds=EXPORT_KINDS):
+    """Yield (entry, body) for every stored entry of the kinds, oldest first
+
+    Only entry summaries are listed up front; each body is read when its
+    entry is reached, so one body is in memory at a time.
+    """
+    for kind in kinds:
+        for entry in history.entries(kind, newest_first=False):
+            yield entry, history.body(entry)
+
+
+def entry_record(entry, body):
+    """Flat export record of one history entry"""
+    meta = entry.meta
+    return {
+        'kind': entry.kind,
+        'entry_id': entry.entry_id,
+        'created': entry.timestamp.isoformat(timespec='seconds'),
+        'topic': entry.topic,
+        'platforms': list(entry.platforms),
+        'start_date': meta['start_date'].isoformat() if meta.get('start_date') else None,
+        'end_date': meta['end_date'].isoformat() if meta.get('end_date') else None,
+        'days': meta.get('days'),
+        'text': body,
+        'records': meta.get('records') or None,
+    }
+
+
+def caption_record(row):
+    """Export record of one bulk caption row (bulk captions are kept in the session, not history)"""
+    return {
+        'kind': 'caption',
+        'entry_id': None,
+        'created': None,
+        'topic': row['idea'],
+        'platforms': [row['platform']],
+        'start_date': None,
+        'end_date': None,
+        'days': None,
+        'text': row['caption'],
+        'records': [{field: row.get(field) for field in ('cta', 'hashtags', 'error') if row.get(field)}] or None,
+    }
+
+
+def iter_records(history, kinds=EXPORT_KINDS, captions=()):
+    """Export records of the stored entries, then of the given bulk caption rows"""
+    for entry, body in iter_entries(history, kinds):
+        yield entry_record(entry, body)
+    if 'caption' in kinds:
+        for row in captions:
+            yield caption_record(row)
+
+
+# =========================
+# CSV / JSONL
+# =========================
+def iter_jsonl(records):
+    """JSON Lines text, one line per record"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def iter_csv(records):
+    """CSV text with a header row, one row per record (platforms joined with "; ")"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+
+    def drain():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    yield drain()
+    for record in records:
+        writer.writerow(dict(record, platforms='; '.join(record['platforms'])))
+        yield drain()
+
+
+# =========================
+# CALENDAR EVENTS
+# =========================
+def date_range(start_date, end_date):
+    """Every date from start_date to end_date inclusive"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def parse_time(text):
+    """Posting time in text as (hour, minute), or None"""
+    match = _TIME_RE.search(text or '')
+    if not match:
+        return None
+    if match.group(3):
+        hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+        if match.group(3).lower() == 'p':
+            hour += 12
+    else:
+        hour, minute = int(match.group(4)), int(match.group(5))
+    return (hour, minute) if hour < 24 and minute < 60 else None
+
+
+def slot_date(line, dates):
+    """Date a calendar line starts a slot for ("2026-03-02", "Day 3", "Monday"), or None"""
+    line = line.strip(_MARKUP)
+    match = _SLOT_RE.match(line)
+    if not match:
+        return None
+    day, weekday, iso = match.groups()
+    if not iso:
+        # "Monday 2026-03-02 | ..." rows carry the exact date after the weekday
+        found = _ISO_RE.search(line[:40])
+        iso = found.group(0) if found else None
+    if iso:
+        try:
+            return date.fromisoformat(iso)
+        except ValueError:
+            return None
+    if day:
+        return dates[int(day) - 1] if 0 < int(day) <= len(dates) else None
+    return next((d for d in dates if _WEEKDAYS[d.weekday()].startswith(weekday.lower())), None)
+
+
+def calendar_dates_of(entry):
+    """Dates a stored calendar covers: its selected range, or the week it was created"""
+    start = entry.meta.get('start_date') or entry.timestamp.date()
+    end = entry.meta.get('end_date') or start + timedelta(days=6)
+    return date_range(start, end)
+
+
+def calendar_events(entry, body):
+    """Dated slots of a stored calendar as {date, time, platform, type, idea, details}
+
+    Structured calendars use their records. Text calendars start a slot at
+    each line naming a date, day number or weekday; lines in between are
+    its details. Slots that cannot be dated are spread over the range.
+    """
+    dates = calendar_dates_of(entry)
+    records = entry.meta.get('records')
+    if records:
+        events = []
+        for r in records:
+            try:
+                day = date.fromisoformat(r['date'])
+            except (TypeError, ValueError):
+                day = None
+            events.append({
+                'date': day, 'time': parse_time(r.get('time')), 'platform': r.get('platform', ''),
+                'type': r.get('type', ''), 'idea': r['idea'], 'details': [],
+            })
+    else:
+        events = []
+        for line in (body or '').splitlines():
+            day = slot_date(line, dates)
+            if day is not None:
+                fields = [f.strip(_MARKUP) for f in line.strip().strip('|').split('|')]
+                event = {'date': day, 'time': parse_time(line), 'platform': '', 'type': '', 'idea': '', 'details': []}
+                # "Date | Platform | Time | Content Type | Idea" rows
+                if len(fields) >= 2:
+                    event['platform'] = fields[1]
+                if len(fields) >= 5:
+                    event['type'], event['idea'] = fields[3], ' | '.join(fields[4:])
+                elif len(fields) == 1:
+                    # "**Monday:** Poll of the week" headings carry the idea after the date
+                    event['idea'] = _SLOT_RE.sub('', fields[0], count=1).strip(' *:-')
+                events.append(event)
+            elif events and line.strip():
+                event = events[-1]
+                field = _FIELD_RE.match(line.strip(_MARKUP))
+                if field and field.group(1).strip().lower() in ('idea', 'post idea', 'content idea') and not event['idea']:
+                    event['idea'] = field.group(2).strip(' *')
+                elif field and field.group(1).strip().lower() in ('content type', 'type') and not event['type']:
+                    event['type'] = field.group(2).strip(' *')
+                elif field and field.group(1).strip().lower() == 'platform' and not event['platform']:
+                    event['platform'] = field.group(2).strip(' *')
+                else:
+                    if event['time'] is None:
+                        event['time'] = parse_time(line)
+                    event['details'].append(line.strip())
+
+    # Undated slots go round the range in order
+    for i, event in enumerate(e for e in events if e['date'] is None):
+        event['date'] = dates[i % len(dates)]
+    return events
+
+
+def plan_events(entry, body):
+    """One all-day event per "Day N" section of a stored plan, Day 1 being the day it was created"""
+    start = entry.timestamp.date()
+    events = []
+    for line in (body or '').splitlines():
+        match = re.match(r"day\s+(\d+)\b[\s:.)*-]*(.*)", line.strip(_MARKUP), re.IGNORECASE)
+        if match:
+            events.append({
+                'date': start + timedelta(days=int(match.group(1)) - 1), 'time': None, 'platform': '',
+                'type': '', 'idea': match.group(2).strip(' *:-') or f"Day {match.group(1)}", 'details': [],
+            })
+        elif events and line.strip():
+            events[-1]['details'].append(line.strip())
+    return events
+
+
+def entry_events(entry, body):
+    """Calendar events of a stored calendar or plan (no events for other kinds)"""
+    if entry.kind == 'calendar':
+        return calendar_events(entry, body)
+    if entry.kind == 'plan':
+        return plan_events(entry, body)
+    return []
+
+
+# =========================
+# ICALENDAR
+# =========================
+def ics_escape(text):
+    """Escape a TEXT property value (RFC 5545 3.3.11)"""
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def ics_line(name, value):
+    """One content line, folded at 75 octets, with its CRLF"""
+    data = f"{name}:{value}".encode('utf-8')
+    parts = []
+    while len(data) > 75:
+        # Never cut inside a UTF-8 sequence
+        cut = 75 if not parts else 74
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_event(entry, number, event, stamp):
+    """VEVENT lines of one calendar slot or plan day"""
+    day = event['date']
+    summary = ' · '.join(part for part in (event['platform'], event['type']) if part)
+    summary = f"{summary}: {event['idea']}" if summary and event['idea'] else summary or event['idea'] or entry.topic
+    description = '\n'.join([f"Topic: {entry.topic}"] + event['details'])
+    lines = [
+        ics_line('BEGIN', 'VEVENT'),
+        ics_line('UID', f"{entry.entry_id}-{number}@social-media-agent"),
+        ics_line('DTSTAMP', stamp),
+    ]
+    if event['time'] is None:
+        lines += [
+            ics_line('DTSTART;VALUE=DATE', day.strftime('%Y%m%d')),
+            ics_line('DTEND;VALUE=DATE', (day + timedelta(days=1)).strftime('%Y%m%d')),
+        ]
+    else:
+        # Floating local time: the slot is at that time wherever the calendar is opened
+        start = datetime.combine(day, datetime.min.time()).replace(hour=event['time'][0], minute=event['time'][1])
+        lines += [
+            ics_line('DTSTART', start.strftime('%Y%m%dT%H%M%S')),
+            ics_line('DTEND', (start + timedelta(minutes=EVENT_MINUTES)).strftime('%Y%m%dT%H%M%S')),
+        ]
+    lines += [
+        ics_line('SUMMARY', ics_escape(summary)),
+        ics_line('DESCRIPTION', ics_escape(description)),
+        ics_line('CATEGORIES', ics_escape(entry.kind)),
+        ics_line('END', 'VEVENT'),
+    ]
+    return ''.join(lines)
+
+
+def iter_ics(entries):
+    """iCalendar text with one event per slot of the given (entry, body) calendars and plans"""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield (
+        ics_line('BEGIN', 'VCALENDAR') + ics_line('VERSION', '2.0')
+        + ics_line('PRODID', '-//Social Media Agent//Content Calendar//EN') + ics_line('CALSCALE', 'GREGORIAN')
+    )
+    for entry, body in entries:
+        for number, event in enumerate(entry_events(entry, body)):
+            yield ics_event(entry, number, event, stamp)
+    yield ics_line('END', 'VCALENDAR')
+
+
+# =========================
+# EXPORT FILES
+# =========================
+def iter_format(fmt, history, kinds=EXPORT_KINDS, captions=()):
+    """Text chunks of one export format"""
+    if fmt == 'csv':
+        return iter_csv(iter_records(history, kinds, captions))
+    if fmt == 'jsonl':
+        return iter_jsonl(iter_records(history, kinds, captions))
+    if fmt == 'ics':
+        return iter_ics(iter_entries(history, [kind for kind in kinds if kind in ('calendar', 'plan')]))
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def write_chunks(chunks, fileobj):
+    """Write text chunks to a binary file as UTF-8; returns the bytes written"""
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        fileobj.write(data)
+        size += len(data)
+    return size
+
+
+def sweep_exports(directory=None, max_age=3600, now=None):
+    """Delete prepared exports older than max_age seconds; returns how many were deleted
+
+    Sessions that end (or a process that dies) leave their export behind,
+    so stale files are swept by age instead of waiting for another export.
+    """
+    directory = directory or tempfile.gettempdir()
+    cutoff = (time.time() if now is None else now) - max_age
+    deleted = 0
+    for entry in os.scandir(directory):
+        if not (entry.name.startswith(EXPORT_PREFIX) and entry.is_file()):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                deleted += 1
+        except FileNotFoundError:
+            # Swept by another process in the meantime
+            pass
+    return deleted
+
+
+def export_history(history, formats, kinds=EXPORT_KINDS, captions=(), zipped=False, directory=None, name='content_history'):
+    """Stream an export of the history to a temporary file and describe it
+
+    Chunks go straight from the history store to disk (through the zip
+    compressor when zipped), so the export is never assembled in memory.
+    Several formats are always zipped. Returns {path, file_name, mime, size};
+    the caller deletes the file when done with it.
+    """
+    formats = list(formats)
+    if not formats:
+        raise ValueError("No export format selected")
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format: {', '.join(unknown)}")
+    zipped = zipped or len(formats) > 1
+    ext, mime = ('zip', 'application/zip') if zipped else FORMATS[formats[0]]
+
+    fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=f".{ext}", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if zipped:
+                with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for fmt in formats:
+                        with archive.open(f"{name}.{FORMATS[fmt][0]}", 'w') as member:
+                            write_chunks(iter_format(fmt, history, kinds, captions), member)
+            else:
+                write_chunks(iter_format(formats[0], history, kinds, captions), f)
+    except BaseException:
+        os.remove(path)
+        raise
+    return {'path': path, 'file_name': f"{name}.{ext}", 'mime': mime, 'size': os.path.getsize(path)}
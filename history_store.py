@@ -0,0 +1,552 @@
+import bisect
+import itertools
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections import Counter, OrderedDict, defaultdict
+from datetime import date, datetime, time, timedelta
+
+import settings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens used by the search index"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class HistoryEntry:
+    """Compact history record; only the summary stays resident, the body loads lazily"""
+
+    __slots__ = ("entry_id", "kind", "timestamp", "topic", "platforms", "summary", "meta", "_body", "_spill_path")
+
+    def __init__(self, entry_id, kind, timestamp, topic, platforms, summary, meta):
+        self.entry_id = entry_id
+        self.kind = kind
+        self.timestamp = timestamp
+        self.topic = topic
+        self.platforms = platforms
+        self.summary = summary
+        self.meta = meta
+        self._body = None
+        self._spill_path = None
+
+    @property
+    def platform(self):
+        """First platform of the entry ('' when none)"""
+        return self.platforms[0] if self.platforms else ''
+
+
+def summarize(text, max_chars=160):
+    """One-line preview of a generated body"""
+    for line in text.splitlines():
+        line = line.strip().strip('*#').strip()
+        if line:
+            break
+    else:
+        line = ''
+    return line if len(line) <= max_chars else line[:max_chars - 1].rstrip() + '…'
+
+
+def paginate(items, page, page_size):
+    """Slice one page out of items; returns (page_items, page, page_count)"""
+    page_size = max(int(page_size), 1)
+    page_count = max(math.ceil(len(items) / page_size), 1)
+    page = min(max(int(page), 1), page_count)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], page, page_count
+
+
+class HistoryStore:
+    """Bounded store for generated ideas, calendars and plans
+
+    Oldest entries are evicted past max_entries. Bodies larger than
+    compress_threshold bytes are zlib-compressed and, when spill_dir is set,
+    written to disk so only summaries stay in memory. search() works from
+    indexes: a sorted term list for topic prefixes, id sets per platform
+    and a timestamp-ordered id list for date ranges; bodies are never read.
+    """
+
+    def __init__(self, max_entries=200, compress_threshold=2048, spill_dir=None, summary_chars=160):
+        self.max_entries = max(int(max_entries), 1)
+        self.compress_threshold = int(compress_threshold)
+        self.spill_dir = spill_dir or None
+        self.summary_chars = int(summary_chars)
+        self._entries = OrderedDict()
+        # kind -> ids in insertion order, word -> ids, kind -> platform counts
+        self._by_kind = defaultdict(dict)
+        self._terms = defaultdict(set)
+        self._platforms = defaultdict(Counter)
+        # Sorted words for prefix ranges, platform -> ids, sorted (timestamp, id) pairs
+        self._term_list = []
+        self._by_platform = defaultdict(set)
+        self._by_time = []
+        # id -> insertion number, to put matches back in insertion order
+        self._seq = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def add(self, kind, topic, body, platforms=(), timestamp=None, **meta):
+        """Store a generated body and return its entry"""
+        entry = HistoryEntry(
+            entry_id=uuid.uuid4().hex,
+            kind=kind,
+            timestamp=timestamp or datetime.now(),
+            topic=topic or '',
+            platforms=tuple(platforms),
+            summary=summarize(body, self.summary_chars),
+            meta=meta,
+        )
+        self._store_body(entry, body)
+
+        with self._lock:
+            self._entries[entry.entry_id] = entry
+            self._index(entry)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._unindex(evicted)
+                self._discard_body(evicted)
+        return entry
+
+    def _index(self, entry):
+        self._by_kind[entry.kind][entry.entry_id] = None
+        self._seq[entry.entry_id] = next(self._counter)
+        for term in set(tokenize(entry.topic)):
+            if term not in self._terms:
+                bisect.insort(self._term_list, term)
+            self._terms[term].add(entry.entry_id)
+        self._platforms[entry.kind].update(entry.platforms)
+        for platform in entry.platforms:
+            self._by_platform[platform].add(entry.entry_id)
+        bisect.insort(self._by_time, (entry.timestamp, entry.entry_id))
+
+    def _unindex(self, entry):
+        self._by_kind[entry.kind].pop(entry.entry_id, None)
+        self._seq.pop(entry.entry_id, None)
+        for term in set(tokenize(entry.topic)):
+            ids = self._terms.get(term)
+            if ids is not None:
+                ids.discard(entry.entry_id)
+                if not ids:
+                    del self._terms[term]
+                    del self._term_list[bisect.bisect_left(self._term_list, term)]
+        platforms = self._platforms[entry.kind]
+        platforms.subtract(entry.platforms)
+        for platform in entry.platforms:
+            if platforms[platform] <= 0:
+                del platforms[platform]
+            ids = self._by_platform.get(platform)
+            if ids is not None:
+                ids.discard(entry.entry_id)
+                if not ids:
+                    del self._by_platform[platform]
+        position = bisect.bisect_left(self._by_time, (entry.timestamp, entry.entry_id))
+        if position < len(self._by_time) and self._by_time[position][1] == entry.entry_id:
+            del self._by_time[position]
+
+    def _prefix_ids(self, term):
+        """Ids of entries with a topic word starting with term (a bisect range of the sorted words)"""
+        ids = set()
+        for position in range(bisect.bisect_left(self._term_list, term), len(self._term_list)):
+            word = self._term_list[position]
+            if not word.startswith(term):
+                break
+            ids |= self._terms[word]
+        return ids
+
+    def _date_ids(self, since, until):
+        """Ids of entries created from since to until inclusive (a bisect slice of the time index)"""
+        low = 0 if since is None else bisect.bisect_left(self._by_time, (datetime.combine(since, time.min),))
+        high = len(self._by_time) if until is None else bisect.bisect_left(
+            self._by_time, (datetime.combine(until + timedelta(days=1), time.min),)
+        )
+        return {entry_id for _, entry_id in self._by_time[low:high]}
+
+    def _store_body(self, entry, body):
+        data = body.encode('utf-8')
+        if len(data) < self.compress_threshold:
+            entry._body = body
+            return
+
+        data = zlib.compress(data, 6)
+        if self.spill_dir:
+            path = os.path.join(self.spill_dir, f"{entry.entry_id}.z")
+            with open(path, 'wb') as f:
+                f.write(data)
+            entry._spill_path = path
+        else:
+            entry._body = data
+
+    def _discard_body(self, entry):
+        if entry._spill_path:
+            try:
+                os.remove(entry._spill_path)
+            except OSError:
+                pass
+        entry._body = None
+        entry._spill_path = None
+
+    def body(self, entry):
+        """Full text of an entry, decompressed or read from disk on demand"""
+        if isinstance(entry._body, str):
+            return entry._body
+        if entry._body is not None:
+            return zlib.decompress(entry._body).decode('utf-8')
+        if entry._spill_path:
+            with open(entry._spill_path, 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+        return ''
+
+    def get(self, entry_id):
+        """Entry by id, or None"""
+        with self._lock:
+            return self._entries.get(entry_id)
+
+    def entries(self, kind=None, newest_first=True):
+        """Entries of one kind (or all), newest first by default"""
+        with self._lock:
+            if kind is None:
+                items = list(self._entries.values())
+            else:
+                items = [self._entries[entry_id] for entry_id in self._by_kind.get(kind, ())]
+        return items[::-1] if newest_first else items
+
+    def count(self, kind=None):
+        """Number of stored entries of one kind (or all)"""
+        with self._lock:
+            if kind is None:
+                return len(self._entries)
+            return len(self._by_kind.get(kind, ()))
+
+    def entry_ids(self, kind=None):
+        """Ids of the entries of one kind (or all), oldest first"""
+        with self._lock:
+            if kind is None:
+                return list(self._entries)
+            return list(self._by_kind.get(kind, ()))
+
+    def counts(self):
+        """Number of stored entries per kind"""
+        with self._lock:
+            return {kind: len(ids) for kind, ids in self._by_kind.items() if ids}
+
+    def platforms(self, kind=None):
+        """Platforms used by entries of one kind (or all), sorted"""
+        with self._lock:
+            if kind is None:
+                names = set().union(*self._platforms.values())
+            else:
+                names = set(self._platforms.get(kind, ()))
+        return sorted(names)
+
+    def search(self, kind=None, query='', platform=None, since=None, until=None, newest_first=True):
+        """Entries whose topic matches every query word (prefix match), filtered by platform and date"""
+        terms = tokenize(query or '')
+        with self._lock:
+            pool = self._entries if kind is None else self._by_kind.get(kind, {})
+            filters = [self._prefix_ids(term) for term in terms]
+            if platform:
+                filters.append(self._by_platform.get(platform, set()))
+            if since is not None or until is not None:
+                filters.append(self._date_ids(since, until))
+
+            if filters:
+                # Intersect from the smallest set, then restore insertion order
+                filters.sort(key=len)
+                matched = filters[0].intersection(*filters[1:])
+                ids = sorted((entry_id for entry_id in matched if entry_id in pool), key=self._seq.__getitem__)
+            else:
+                ids = list(pool)
+            items = [self._entries[entry_id] for entry_id in ids]
+        return items[::-1] if newest_first else items
+
+    def page(self, kind=None, query='', platform=None, since=None, until=None, newest_first=True, page=1, page_size=10):
+        """One page of search() results; returns (entries, total)"""
+        matches = self.search(kind, query, platform, since, until, newest_first)
+        items, _, _ = paginate(matches, page, page_size)
+        return items, len(matches)
+
+    def remove(self, entry_id):
+        """Delete one entry"""
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+            if entry is not None:
+                self._unindex(entry)
+        if entry is not None:
+            self._discard_body(entry)
+
+    def clear(self):
+        """Delete every entry"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._by_kind.clear()
+            self._terms.clear()
+            self._platforms.clear()
+            self._term_list.clear()
+            self._by_platform.clear()
+            self._by_time.clear()
+            self._seq.clear()
+        for entry in entries:
+            self._discard_body(entry)
+
+
+def _encode_meta(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in history meta")
+
+
+def _decode_meta(obj):
+    if '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    if '$date' in obj:
+        return date.fromisoformat(obj['$date'])
+    return obj
+
+
+class SQLiteHistoryStore:
+    """HistoryStore with the same interface, persisted in SQLite
+
+    The database runs in WAL mode so several app processes can share it.
+    Each new entry is committed in its own transaction as it is added.
+    Listing and counting run as indexed queries that return one page of
+    summaries. Bodies are read only when an entry is opened. Every session
+    using the same namespace shares one history, so namespace is what
+    keeps separate histories (e.g. per team) in one file.
+    """
+
+    def __init__(self, db_path, namespace='default', max_entries=None, compress_threshold=2048, summary_chars=160):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_entries = int(max_entries) if max_entries else None
+        self.compress_threshold = int(compress_threshold)
+        self.summary_chars = int(summary_chars)
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, entry_id TEXT NOT NULL UNIQUE, "
+            "namespace TEXT NOT NULL, kind TEXT NOT NULL, created REAL NOT NULL, "
+            "topic TEXT NOT NULL, platforms TEXT NOT NULL, summary TEXT NOT NULL, "
+            "meta TEXT NOT NULL, body BLOB NOT NULL, compressed INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS history_terms (term TEXT NOT NULL, entry_id TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS history_platforms (platform TEXT NOT NULL, entry_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_history_kind ON history (namespace, kind, seq);"
+            "CREATE INDEX IF NOT EXISTS idx_history_created ON history (namespace, kind, created);"
+            "CREATE INDEX IF NOT EXISTS idx_history_topic ON history (namespace, topic);"
+            "CREATE INDEX IF NOT EXISTS idx_history_terms ON history_terms (term, entry_id);"
+            "CREATE INDEX IF NOT EXISTS idx_history_platforms ON history_platforms (platform, entry_id);"
+            "CREATE INDEX IF NOT EXISTS idx_history_terms_entry ON history_terms (entry_id);"
+            "CREATE INDEX IF NOT EXISTS idx_history_platforms_entry ON history_platforms (entry_id);"
+        )
+        self._db.commit()
+
+    def add(self, kind, topic, body, platforms=(), timestamp=None, **meta):
+        """Write a generated body and return its entry"""
+        entry = HistoryEntry(
+            entry_id=uuid.uuid4().hex,
+            kind=kind,
+            timestamp=timestamp or datetime.now(),
+            topic=topic or '',
+            platforms=tuple(platforms),
+            summary=summarize(body, self.summary_chars),
+            meta=meta,
+        )
+        data = body.encode('utf-8')
+        compressed = len(data) >= self.compress_threshold
+        if compressed:
+            data = zlib.compress(data, 6)
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO history (entry_id, namespace, kind, created, topic, platforms, summary, meta, body, compressed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.entry_id, self.namespace, entry.kind, entry.timestamp.timestamp(),
+                    entry.topic, json.dumps(entry.platforms), entry.summary,
+                    json.dumps(entry.meta, default=_encode_meta), data, int(compressed)
+                ),
+            )
+            self._db.executemany(
+                "INSERT INTO history_terms (term, entry_id) VALUES (?, ?)",
+                [(term, entry.entry_id) for term in set(tokenize(entry.topic))],
+            )
+            self._db.executemany(
+                "INSERT INTO history_platforms (platform, entry_id) VALUES (?, ?)",
+                [(platform, entry.entry_id) for platform in set(entry.platforms)],
+            )
+            if self.max_entries:
+                evicted = [row[0] for row in self._db.execute(
+                    "SELECT entry_id FROM history WHERE namespace = ? ORDER BY seq DESC LIMIT -1 OFFSET ?",
+                    (self.namespace, self.max_entries),
+                )]
+                self._delete(evicted)
+        return entry
+
+    def _delete(self, entry_ids):
+        for table in ("history", "history_terms", "history_platforms"):
+            self._db.executemany(f"DELETE FROM {table} WHERE entry_id = ?", [(i,) for i in entry_ids])
+
+    def _entry(self, row):
+        entry_id, kind, created, topic, platforms, summary, meta = row
+        return HistoryEntry(
+            entry_id=entry_id,
+            kind=kind,
+            timestamp=datetime.fromtimestamp(created),
+            topic=topic,
+            platforms=tuple(json.loads(platforms)),
+            summary=summary,
+            meta=json.loads(meta, object_hook=_decode_meta),
+        )
+
+    def _where(self, kind=None, query='', platform=None, since=None, until=None):
+        clauses = ["namespace = ?"]
+        params = [self.namespace]
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        for term in tokenize(query or ''):
+            # Prefix match on the indexed topic words
+            clauses.append("entry_id IN (SELECT entry_id FROM history_terms WHERE term >= ? AND term < ?)")
+            params += [term, term + '\uffff']
+        if platform:
+            clauses.append("entry_id IN (SELECT entry_id FROM history_platforms WHERE platform = ?)")
+            params.append(platform)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(datetime.combine(since, time.min).timestamp())
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(datetime.combine(until + timedelta(days=1), time.min).timestamp())
+        return " AND ".join(clauses), params
+
+    def _select(self, where, params, newest_first=True, limit=-1, offset=0):
+        order = "DESC" if newest_first else "ASC"
+        rows = self._db.execute(
+            f"SELECT entry_id, kind, created, topic, platforms, summary, meta FROM history "
+            f"WHERE {where} ORDER BY seq {order} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def body(self, entry):
+        """Full text of an entry, read and decompressed on demand"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, compressed FROM history WHERE entry_id = ?", (entry.entry_id,)
+            ).fetchone()
+        if row is None:
+            return ''
+        data, compressed = row
+        return (zlib.decompress(data) if compressed else bytes(data)).decode('utf-8')
+
+    def get(self, entry_id):
+        """Entry by id, or None"""
+        with self._lock:
+            entries = self._select("namespace = ? AND entry_id = ?", [self.namespace, entry_id])
+        return entries[0] if entries else None
+
+    def entries(self, kind=None, newest_first=True):
+        """Entries of one kind (or all), newest first by default"""
+        return self.search(kind, newest_first=newest_first)
+
+    def count(self, kind=None):
+        """Number of stored entries of one kind (or all), from an indexed COUNT"""
+        where, params = self._where(kind)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM history WHERE {where}", params).fetchone()[0]
+
+    def entry_ids(self, kind=None):
+        """Ids of the entries of one kind (or all), oldest first, without reading their rows"""
+        where, params = self._where(kind)
+        with self._lock:
+            rows = self._db.execute(f"SELECT entry_id FROM history WHERE {where} ORDER BY seq", params).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self):
+        """Number of stored entries per kind, from one indexed GROUP BY"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, COUNT(*) FROM history WHERE namespace = ? GROUP BY kind", (self.namespace,)
+            ).fetchall()
+        return dict(rows)
+
+    def platforms(self, kind=None):
+        """Platforms used by entries of one kind (or all), sorted"""
+        where, params = self._where(kind)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT DISTINCT platform FROM history_platforms WHERE entry_id IN "
+                f"(SELECT entry_id FROM history WHERE {where}) ORDER BY platform",
+                params,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, kind=None, query='', platform=None, since=None, until=None, newest_first=True):
+        """Entries whose topic matches every query word (prefix match), filtered by platform and date"""
+        where, params = self._where(kind, query, platform, since, until)
+        with self._lock:
+            return self._select(where, params, newest_first)
+
+    def page(self, kind=None, query='', platform=None, since=None, until=None, newest_first=True, page=1, page_size=10):
+        """One page of search() results straight from the database; returns (entries, total)"""
+        where, params = self._where(kind, query, platform, since, until)
+        page_size = max(int(page_size), 1)
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM history WHERE {where}", params).fetchone()[0]
+            page_count = max(math.ceil(total / page_size), 1)
+            offset = (min(max(int(page), 1), page_count) - 1) * page_size
+            return self._select(where, params, newest_first, page_size, offset), total
+
+    def remove(self, entry_id):
+        """Delete one entry of this namespace"""
+        with self._lock:
+            with self._db:
+                ids = [row[0] for row in self._db.execute(
+                    "SELECT entry_id FROM history WHERE namespace = ? AND entry_id = ?", (self.namespace, entry_id)
+                )]
+                self._delete(ids)
+
+    def clear(self):
+        """Delete every entry in this namespace"""
+        with self._lock:
+            with self._db:
+                ids = [row[0] for row in self._db.execute(
+                    "SELECT entry_id FROM history WHERE namespace = ?", (self.namespace,)
+                )]
+                self._delete(ids)
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._db.close()
+
+
+def create_history_store():
+    """History store for the configured backend ("sqlite" or "memory")"""
+    if settings.HISTORY_BACKEND == "sqlite":
+        return SQLiteHistoryStore(
+            settings.HISTORY_DB_PATH,
+            namespace=settings.HISTORY_NAMESPACE,
+            max_entries=settings.HISTORY_DB_MAX_ENTRIES,
+            compress_threshold=settings.HISTORY_COMPRESS_THRESHOLD
+        )
+    return HistoryStore(
+        max_entries=settings.HISTORY_MAX_ENTRIES,
+        compress_threshold=settings.HISTORY_COMPRESS_THRESHOLD,
+        spill_dir=settings.HISTORY_SPILL_DIR or None
+    )
@@ -0,0 +1,147 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobQueue:
+    """Process-level worker pool running generations outside the Streamlit script
+
+    submit() returns a job id straight away. The job runs on a worker thread,
+    so reruns and other sessions never abandon it; its record (status,
+    progress, result or error) is polled by id or by owner, and finished jobs
+    stay until their owner collects them. Beyond max_finished finished jobs the
+    oldest are dropped, collected ones first.
+    """
+
+    def __init__(self, workers=settings.JOB_WORKERS, max_finished=settings.JOB_RETENTION):
+        self.workers = max(int(workers), 1)
+        self.max_finished = max(int(max_finished), 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._futures = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, kind, fn, args=(), kwargs=None, label=None, owner=None, **info):
+        """Queue fn(report, *args, **kwargs) and return its job id
+
+        report(**fields) lets the job publish progress (e.g. text, done, total);
+        info fields are stored on the job record as they are.
+        """
+        job_id = f"{kind}-{next(self._ids)}"
+        job = dict(
+            info,
+            id=job_id,
+            kind=kind,
+            label=label or kind,
+            owner=owner,
+            status="queued",
+            progress={},
+            result=None,
+            error=None,
+            collected=False,
+            created=time.time(),
+            started=None,
+            finished=None,
+        )
+        with self._lock:
+            self._jobs[job_id] = job
+            self._futures[job_id] = self._executor.submit(self._run, job_id, fn, args, kwargs or {})
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return
+            job["status"] = "running"
+            job["started"] = time.time()
+
+        def report(**fields):
+            with self._lock:
+                job["progress"].update(fields)
+
+        try:
+            result = fn(report, *args, **kwargs)
+        except Exception as e:
+            self._finish(job, "failed", error=e)
+        else:
+            self._finish(job, "done", result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            job.update(status=status, result=result, error=error, finished=time.time())
+            self._futures.pop(job["id"], None)
+            self._prune()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job["status"] in FINISHED_STATUSES]
+        excess = len(finished) - self.max_finished
+        if excess <= 0:
+            return
+        # Collected jobs go first, then the oldest uncollected ones
+        finished.sort(key=lambda job: (not job["collected"], job["finished"]))
+        for job in finished[:excess]:
+            del self._jobs[job["id"]]
+
+    @staticmethod
+    def _copy(job):
+        return dict(job, progress=dict(job["progress"]))
+
+    def get(self, job_id):
+        """Snapshot of one job record, or None once it has been dropped"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copy(job) if job else None
+
+    def jobs(self, owner=None):
+        """Snapshots of the jobs of owner (all jobs when None), oldest first"""
+        with self._lock:
+            return [self._copy(job) for job in self._jobs.values() if owner is None or job["owner"] == owner]
+
+    def collect(self, owner):
+        """Finished jobs of owner not collected yet, marked collected so each is picked up once"""
+        collected = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job["owner"] == owner and job["status"] in FINISHED_STATUSES and not job["collected"]:
+                    job["collected"] = True
+                    collected.append(self._copy(job))
+        return collected
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet; returns whether it was cancelled"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+            if job is None or job["status"] != "queued" or (future is not None and not future.cancel()):
+                return False
+            job.update(status="cancelled", finished=time.time())
+            self._futures.pop(job_id, None)
+            self._prune()
+            return True
+
+    def forget(self, job_id):
+        """Drop a finished job's record"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] in FINISHED_STATUSES:
+                del self._jobs[job_id]
+
+    def stats(self):
+        """Worker count and number of held jobs per status"""
+        with self._lock:
+            counts = {status: 0 for status in ACTIVE_STATUSES + FINISHED_STATUSES}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return dict(counts, workers=self.workers)
+
+    def shutdown(self, wait=True):
+        """Stop the workers; queued jobs that have not started are cancelled"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,270 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GENERATORS = ("ideas", "caption", "prefetch", "calendar", "plan", "other")
+
+# Timing fields summarised with percentiles, in seconds
+TIMINGS = ("latency", "queue_wait", "connect", "ttft")
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of values by linear interpolation, or None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def cache_label(record):
+    """How a call was served: hit (response cache), coalesced (shared in-flight call) or miss"""
+    if record["cache_hit"]:
+        return "hit"
+    return "coalesced" if record.get("coalesced") else "miss"
+
+
+def status_of(exc):
+    """Status label for a failed call: the HTTP status, or the exception type"""
+    return getattr(exc, "status_code", None) or type(exc).__name__
+
+
+class CallTimer:
+    """Timings and fields of one Groq call, recorded when it finishes"""
+
+    def __init__(self, metrics, generator):
+        self.metrics = metrics
+        self.started = time.perf_counter()
+        self.last_sent = None
+        self.attempts = 0
+        self.record = {
+            "generator": generator or "other",
+            "model": None,
+            "status": None,
+            "cache_hit": False,
+            "coalesced": False,
+            "queue_wait": None,
+            "connect": None,
+            "ttft": None,
+            "latency": None,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "finish_reason": None,
+            "continuations": 0,
+            "attempts": 0,
+        }
+
+    def sent(self):
+        """Mark a request attempt going out; the first one ends the queue wait"""
+        self.last_sent = time.perf_counter()
+        if self.record["queue_wait"] is None:
+            self.record["queue_wait"] = self.last_sent - self.started
+        self.attempts += 1
+
+    def first_token(self):
+        """Mark the first streamed token (TTFT counts from the attempt that succeeded)"""
+        if self.record["ttft"] is None:
+            self.record["ttft"] = time.perf_counter() - (self.last_sent or self.started)
+
+    def finish(self, status, **fields):
+        """Record the call with its final status"""
+        self.record.update(fields)
+        self.record["status"] = status
+        self.record["attempts"] = self.attempts
+        self.record["latency"] = time.perf_counter() - self.started
+        self.metrics.add(self.record)
+
+
+class CallMetrics:
+    """Ring buffer of per-call metrics plus cumulative counters for export
+
+    When jsonl_path is set every record is also appended to that file.
+    """
+
+    def __init__(self, max_records=1000, jsonl_path=None):
+        self._records = deque(maxlen=max(int(max_records), 1))
+        self._lock = threading.Lock()
+        self.jsonl_path = jsonl_path or None
+        # Cumulative counters survive the ring buffer wrapping (Prometheus needs monotonic totals)
+        self._calls = defaultdict(int)
+        self._tokens = defaultdict(int)
+        self._latency_sum = defaultdict(float)
+        self._model_calls = defaultdict(int)
+
+    def start(self, generator=None):
+        """Start timing one call"""
+        return CallTimer(self, generator)
+
+    def add(self, record):
+        """Store a finished call record"""
+        record = dict(record, timestamp=time.time())
+        generator = record["generator"]
+        with self._lock:
+            self._records.append(record)
+            self._calls[(generator, str(record["status"]), cache_label(record))] += 1
+            self._latency_sum[generator] += record["latency"] or 0.0
+            if record.get("model"):
+                self._model_calls[(record["model"], str(record["status"]))] += 1
+            for kind in ("prompt", "completion"):
+                self._tokens[(generator, kind)] += record[f"{kind}_tokens"] or 0
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def records(self, generator=None):
+        """Buffered records, oldest first"""
+        with self._lock:
+            records = list(self._records)
+        if generator is not None:
+            records = [r for r in records if r["generator"] == generator]
+        return records
+
+    def summary(self):
+        """Per-generator call counts, cache hit rate, coalesced calls, errors, token averages and timing percentiles"""
+        by_generator = defaultdict(list)
+        for record in self.records():
+            by_generator[record["generator"]].append(record)
+
+        rows = []
+        for generator in sorted(by_generator, key=lambda g: GENERATORS.index(g) if g in GENERATORS else len(GENERATORS)):
+            records = by_generator[generator]
+            # Cache hits and coalesced calls send nothing and would skew real request timings
+            sent = [r for r in records if cache_label(r) == "miss"]
+            row = {
+                "generator": generator,
+                "calls": len(records),
+                "cache_hit_rate": sum(1 for r in records if r["cache_hit"]) / len(records),
+                "coalesced": sum(1 for r in records if cache_label(r) == "coalesced"),
+                "errors": sum(1 for r in records if r["status"] != 200),
+            }
+            for field in TIMINGS:
+                values = [r[field] for r in sent if r[field] is not None]
+                for q in (50, 95, 99):
+                    row[f"{field}_p{q}"] = percentile(values, q)
+            for field in ("prompt_tokens", "completion_tokens"):
+                values = [r[field] for r in sent if r[field] is not None]
+                row[f"avg_{field}"] = sum(values) / len(values) if values else None
+            rows.append(row)
+        return rows
+
+    def to_jsonl(self):
+        """Buffered records as JSON lines"""
+        return "".join(json.dumps(record) + "\n" for record in self.records())
+
+    def to_prometheus(self):
+        """Counters and latency quantiles in the Prometheus text exposition format"""
+        with self._lock:
+            calls = dict(self._calls)
+            tokens = dict(self._tokens)
+            latency_sum = dict(self._latency_sum)
+            model_calls = dict(self._model_calls)
+
+        lines = [
+            "# HELP groq_calls_total Groq calls by generator, status and cache result (hit, coalesced or miss).",
+            "# TYPE groq_calls_total counter",
+        ]
+        for (generator, status, cache), count in sorted(calls.items()):
+            lines.append(f'groq_calls_total{{generator="{generator}",status="{status}",cache="{cache}"}} {count}')
+
+        lines += [
+            "# HELP groq_model_calls_total Sent Groq calls by the model that finally answered (or failed) and status.",
+            "# TYPE groq_model_calls_total counter",
+        ]
+        for (model, status), count in sorted(model_calls.items()):
+            lines.append(f'groq_model_calls_total{{model="{model}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP groq_tokens_total Prompt and completion tokens reported by the API.",
+            "# TYPE groq_tokens_total counter",
+        ]
+        for (generator, kind), count in sorted(tokens.items()):
+            lines.append(f'groq_tokens_total{{generator="{generator}",type="{kind}"}} {count}')
+
+        summary = self.summary()
+        for field in TIMINGS:
+            name = f"groq_call_{field}_seconds"
+            lines += [f"# HELP {name} {field.replace('_', ' ')} of recent uncached calls.", f"# TYPE {name} summary"]
+            for row in summary:
+                generator = row["generator"]
+                for q in (50, 95, 99):
+                    value = row[f"{field}_p{q}"]
+                    if value is not None:
+                        lines.append(f'{name}{{generator="{generator}",quantile="{q / 100}"}} {value:.6f}')
+                if field == "latency":
+                    lines.append(f'{name}_sum{{generator="{generator}"}} {latency_sum.get(generator, 0.0):.6f}')
+                    lines.append(
+                        f'{name}_count{{generator="{generator}"}} '
+                        f'{sum(c for (g, _, _), c in calls.items() if g == generator)}'
+                    )
+        return "\n".join(lines) + "\n"
+
+
+class RerunTimer:
+    """Wall-clock time of one Streamlit script run, split into named phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as name (repeated phases add up)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, **fields):
+        """Record of the run so far: total seconds, per-phase seconds and fields"""
+        return dict(
+            fields,
+            total=time.perf_counter() - self.started,
+            phases=dict(self.phases),
+            timestamp=time.time(),
+        )
+
+
+def rerun_summary(records):
+    """p50/p95/max seconds of the total and of every phase across run records"""
+    rows = []
+    names = ["total"] + sorted({name for record in records for name in record["phases"]})
+    for name in names:
+        values = [record["total"] if name == "total" else record["phases"][name]
+                  for record in records if name == "total" or name in record["phases"]]
+        rows.append({
+            "phase": name,
+            "runs": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values),
+        })
+    return rows
+
+
+def serve_prometheus(metrics, port, host="0.0.0.0"):
+    """Serve metrics.to_prometheus() at /metrics from a daemon thread; returns the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
@@ -0,0 +1,290 @@
+"""Local stand-in for the Groq Chat Completions endpoint, for offline benchmarks.
+
+Serves OpenAI-style completions (plain JSON or SSE streaming) with configurable
+time-to-first-byte, token rate and injected 429/503 errors, optionally per model
+to exercise model routing. JSON-mode requests get schema-valid ideas, captions or
+calendar entries.
+
+    python mock_groq.py --port 8765 --latency 0.3 --tokens-per-second 250 --rate-429 0.05
+    python mock_groq.py --model-latency llama-3.1-8b-instant=0.05 --fail-model llama-3.3-70b-versatile
+    GROQ_API_URL=http://127.0.0.1:8765/openai/v1/chat/completions streamlit run app2.py
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "engaging content audience brand story reel carousel launch tips growth community "
+    "behind the scenes tutorial hook trend share comment save follow value insight"
+).split()
+
+
+class MockGroqServer:
+    """Threaded HTTP server imitating Groq chat completions
+
+    latency is the delay before the response starts, tokens_per_second the
+    generation speed after that. Responses longer than max_tokens stop with
+    finish_reason "length" and continuation requests (the cut-off text sent
+    back as an assistant message) get the rest. rate_429/rate_503 are the probabilities of
+    failing a request; 429s carry Retry-After and x-ratelimit-* headers.
+    model_latency overrides latency per requested model, and failing_models
+    always answer 503.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.2,
+        tokens_per_second=200.0,
+        completion_tokens=150,
+        rate_429=0.0,
+        rate_503=0.0,
+        retry_after=0.5,
+        seed=None,
+        model_latency=None,
+        failing_models=(),
+    ):
+        self.latency = float(latency)
+        self.model_latency = {model: float(seconds) for model, seconds in (model_latency or {}).items()}
+        self.failing_models = set(failing_models)
+        self.tokens_per_second = float(tokens_per_second)
+        self.completion_tokens = int(completion_tokens)
+        self.rate_429 = float(rate_429)
+        self.rate_503 = float(rate_503)
+        self.retry_after = float(retry_after)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "streamed": 0, "status_429": 0, "status_503": 0, "completion_tokens": 0}
+        self._models = {}
+
+        server = self
+
+        class Handler(_Handler):
+            mock = server
+
+        self._httpd = _QuietServer((host, int(port)), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/openai/v1/chat/completions"
+
+    def start(self):
+        """Serve requests from a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, counter, amount=1):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def count_model(self, model):
+        with self._lock:
+            self._models[model] = self._models.get(model, 0) + 1
+
+    def roll(self, model=None):
+        """Pick the status for the next request"""
+        if model in self.failing_models:
+            return 503
+        with self._lock:
+            value = self._random.random()
+        if value < self.rate_429:
+            return 429
+        if value < self.rate_429 + self.rate_503:
+            return 503
+        return 200
+
+    def stats(self):
+        """Counters of requests served, streamed and failed, and requests per model"""
+        with self._lock:
+            return dict(self._stats, models=dict(self._models))
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive sockets is normal during benchmarks
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        mock = self.mock
+        mock.count("requests")
+        model = body.get("model")
+        mock.count_model(model)
+
+        status = mock.roll(model)
+        if status != 200:
+            mock.count(f"status_{status}")
+            self._send_error(status)
+            return
+
+        messages = body.get("messages") or [{}]
+        prompt = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+        # A continuation request carries the cut-off text as an assistant message
+        partial = next((m.get("content", "") for m in messages if m.get("role") == "assistant"), "")
+        if body.get("response_format") or partial.lstrip().startswith("{"):
+            text = json_response(prompt)
+        else:
+            text = " ".join(WORDS[i % len(WORDS)] for i in range(mock.completion_tokens))
+        full = re.findall(r"\S+\s*", text) or [text]
+        offset = len(re.findall(r"\S+\s*", partial))
+        max_tokens = int(body.get("max_tokens") or len(full))
+        tokens = full[offset:offset + max_tokens]
+        finish_reason = "length" if offset + max_tokens < len(full) else "stop"
+        prompt_text = " ".join(str(m.get("content", "")) for m in messages)
+        usage = {
+            "prompt_tokens": max(len(prompt_text) // 4, 1),
+            "completion_tokens": len(tokens),
+            "total_tokens": max(len(prompt_text) // 4, 1) + len(tokens),
+        }
+        mock.count("completion_tokens", len(tokens))
+
+        time.sleep(mock.model_latency.get(model, mock.latency))
+        if body.get("stream"):
+            mock.count("streamed")
+            self._stream(tokens, usage, finish_reason)
+            return
+
+        if mock.tokens_per_second > 0:
+            time.sleep(len(tokens) / mock.tokens_per_second)
+        self._send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": finish_reason}],
+            "usage": usage,
+        })
+
+    def _stream(self, tokens, usage, finish_reason):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        delay = 1 / self.mock.tokens_per_second if self.mock.tokens_per_second > 0 else 0
+        for token in tokens:
+            self._chunk({"choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            if delay:
+                time.sleep(delay)
+        self._chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "x_groq": {"usage": usage}})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data):
+        self._write_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_error(self, status):
+        headers = {}
+        if status == 429:
+            headers = {
+                "retry-after": str(self.mock.retry_after),
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": f"{self.mock.retry_after}s",
+            }
+        message = "Rate limit reached" if status == 429 else "Service unavailable"
+        self._send_json(status, {"error": {"message": message, "type": "mock_error"}}, headers)
+
+    def _send_json(self, status, data, headers=None):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def json_response(prompt):
+    """Schema-valid JSON-mode output for the structured prompt"""
+    if '"entries"' in prompt:
+        dates = re.findall(r"\d{4}-\d{2}-\d{2}", prompt) or ["2025-01-01"]
+        return json.dumps({"entries": [
+            {"date": day, "platform": "Instagram", "time": "9:00 AM", "type": "Carousel", "idea": f"Post for {day}"}
+            for day in dates
+        ]})
+    if '"captions"' in prompt:
+        match = re.search(r"each of these (\d+)", prompt)
+        count = int(match.group(1)) if match else 1
+        return json.dumps({"captions": [
+            {"idea": str(n), "body": f"Caption for idea {n} ✨", "cta": "Tap the link in bio", "hashtags": ["#launch", "#new"]}
+            for n in range(1, count + 1)
+        ]})
+    if '"body"' in prompt:
+        return json.dumps({"body": "Fresh drop today ✨", "cta": "Tap the link in bio", "hashtags": ["#launch", "#new"]})
+    return json.dumps({"ideas": [
+        {"title": f"Idea {n}", "concept": "A quick angle", "content_type": "reel", "hook": "Wait for it", "platform": ""}
+        for n in range(1, 6)
+    ]})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local mock of the Groq chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the response starts")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Tokens per completion (capped by max_tokens)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of a 429 response")
+    parser.add_argument("--rate-503", type=float, default=0.0, help="Probability of a 503 response")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="Latency for one model (repeatable)")
+    parser.add_argument("--fail-model", action="append", default=[], metavar="MODEL",
+                        help="Answer every request for this model with 503 (repeatable)")
+    args = parser.parse_args(argv)
+
+    model_latency = {}
+    for item in args.model_latency:
+        model, _, seconds = item.rpartition("=")
+        model_latency[model] = float(seconds)
+    server = MockGroqServer(
+        args.host, args.port, args.latency, args.tokens_per_second, args.completion_tokens,
+        args.rate_429, args.rate_503, args.retry_after, args.seed, model_latency, args.fail_model,
+    )
+    print(f"Mock Groq API at {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import deque
+
+import settings
+from metrics import percentile
+
+# Generators routed as another task (prefetched captions must hit the caption cache keys)
+TASK_ALIASES = {"prefetch": "caption"}
+
+# Per-model counters shown in the metrics panel
+COUNTERS = ("calls", "errors", "fallbacks", "slo_misses", "demotions", "truncated", "invalid_json")
+
+
+def should_fall_back(exc):
+    """True when another model may succeed where this one failed
+
+    Rate limits, server errors, rejected requests (e.g. an unsupported
+    parameter or a retired model), timeouts and malformed responses are
+    model-specific; an invalid API key fails the same way everywhere.
+    """
+    return getattr(exc, "status_code", None) not in (401, 403)
+
+
+class ModelRouter:
+    """Per-task model choice with fallback and per-model latency/quality counters
+
+    Every task has a list of models in fallback order. A call tries them in
+    turn while the failure is one another model could avoid. A model that
+    misses the task's latency objective slo_misses times in a row is moved
+    behind the task's other models for cooldown seconds.
+    """
+
+    def __init__(
+        self,
+        routes=None,
+        slo_seconds=None,
+        slo_misses=settings.MODEL_SLO_MISSES,
+        cooldown=settings.MODEL_COOLDOWN_SECONDS,
+        max_samples=500,
+    ):
+        self.routes = {task: list(models) for task, models in (routes or settings.MODEL_ROUTES).items()}
+        self.routes.setdefault("other", [settings.GROQ_MODEL])
+        self.slo_seconds = dict(settings.MODEL_SLO_SECONDS if slo_seconds is None else slo_seconds)
+        self.slo_misses = max(int(slo_misses), 1)
+        self.cooldown = float(cooldown)
+        self.max_samples = int(max_samples)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._latency = {}
+        self._completion_tokens = {}
+        self._missed = {}
+        self._demoted_until = {}
+
+    def task(self, generator):
+        """Route name of a generator; generators without a route of their own use the "other" route"""
+        task = TASK_ALIASES.get(generator, generator)
+        return task if task in self.routes else "other"
+
+    def primary(self, generator):
+        """Configured first model of the generator's task"""
+        return self.routes[self.task(generator)][0]
+
+    def models(self, generator):
+        """Models to try for the generator's task, demoted ones last"""
+        task = self.task(generator)
+        now = time.monotonic()
+        with self._lock:
+            demoted = [m for m in self.routes[task] if self._demoted_until.get((task, m), 0.0) > now]
+        return [m for m in self.routes[task] if m not in demoted] + demoted
+
+    def slo(self, generator):
+        """Latency objective of the generator's task in seconds, or None"""
+        task = self.task(generator)
+        return self.slo_seconds.get(task, self.slo_seconds.get("other"))
+
+    def _count(self, model, counter, amount=1):
+        counters = self._counters.setdefault(model, dict.fromkeys(COUNTERS, 0))
+        counters[counter] += amount
+
+    def record(self, model, generator, latency=None, error=None, fell_back=False, finish_reason=None, completion_tokens=None, invalid_json=False):
+        """Record one model attempt: its latency or error, and how the answer looked"""
+        task = self.task(generator)
+        with self._lock:
+            self._count(model, "calls")
+            if error is not None:
+                self._count(model, "errors")
+                if fell_back:
+                    self._count(model, "fallbacks")
+                return
+
+            self._latency.setdefault(model, deque(maxlen=self.max_samples)).append(latency)
+            if completion_tokens is not None:
+                self._completion_tokens.setdefault(model, deque(maxlen=self.max_samples)).append(completion_tokens)
+            if finish_reason == "length":
+                self._count(model, "truncated")
+            if invalid_json:
+                self._count(model, "invalid_json")
+
+            slo = self.slo(generator)
+            if slo is None or latency is None or latency <= slo:
+                self._missed[(task, model)] = 0
+                return
+            self._count(model, "slo_misses")
+            self._missed[(task, model)] = self._missed.get((task, model), 0) + 1
+            if self._missed[(task, model)] >= self.slo_misses and len(self.routes[task]) > 1:
+                self._missed[(task, model)] = 0
+                self._demoted_until[(task, model)] = time.monotonic() + self.cooldown
+                self._count(model, "demotions")
+
+    def stats(self):
+        """One row per model: counters, latency p50/p95 and average completion tokens"""
+        now = time.monotonic()
+        with self._lock:
+            rows = []
+            for model, counters in sorted(self._counters.items()):
+                latency = list(self._latency.get(model, ()))
+                tokens = list(self._completion_tokens.get(model, ()))
+                rows.append(dict(
+                    counters,
+                    model=model,
+                    latency_p50=percentile(latency, 50),
+                    latency_p95=percentile(latency, 95),
+                    avg_completion_tokens=sum(tokens) / len(tokens) if tokens else None,
+                    demoted_for=sorted(task for (task, m), until in self._demoted_until.items() if m == model and until > now),
+                ))
+        return rows
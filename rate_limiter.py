@@ -0,0 +1,196 @@
+import random
+import re
+import threading
+import time
+
+import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value):
+    """Parse Groq reset durations such as "2m59.56s", "7.66s" or "120ms" into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def is_retryable(exc):
+    """True for rate limits, transient server errors, timeouts and dropped connections"""
+    if getattr(exc, "status_code", None) in RETRY_STATUSES:
+        return True
+    return isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(now - max(self._updated, self._paused_until), 0.0)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._updated = max(now, self._updated)
+
+    def reserve(self, amount=1):
+        """Take amount tokens now and return how long the caller must wait before using them"""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            # Tokens don't refill while paused, so any deficit is paid after the pause
+            wait = max(self._paused_until - now, 0.0)
+            if self._tokens < 0:
+                wait += -self._tokens / self.refill_per_second
+            return wait
+
+    def observe(self, remaining=None, reset_seconds=None):
+        """Sync with limits reported by the server"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining is not None:
+                self._tokens = min(self._tokens, float(remaining))
+            if remaining is not None and remaining <= 0 and reset_seconds:
+                self._paused_until = max(self._paused_until, now + reset_seconds)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the given number of seconds"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def available(self):
+        """Tokens currently available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class RateLimitScheduler:
+    """Requests/min and tokens/min scheduling with retry and backoff for Groq calls"""
+
+    def __init__(
+        self,
+        requests_per_minute,
+        tokens_per_minute,
+        max_retries=4,
+        base_delay=1.0,
+        max_delay=30.0,
+        retryable=is_retryable,
+    ):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.max_retries = int(max_retries)
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.retryable = retryable
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "wait_seconds": 0.0, "retries": 0, "failures": 0}
+
+    def reserve(self, estimated_tokens):
+        """Reserve capacity for one call and return the wait in seconds"""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            if wait > 0:
+                self._stats["throttled"] += 1
+                self._stats["wait_seconds"] += wait
+        return wait
+
+    def has_headroom(self, estimated_tokens, reserve=0.5):
+        """True when a call would still leave more than reserve (a fraction) of both buckets free
+
+        Low-priority callers check this before acquiring, so they only spend
+        capacity that foreground calls are not using.
+        """
+        return (
+            self.requests.available() - 1 >= self.requests.capacity * reserve
+            and self.tokens.available() - estimated_tokens >= self.tokens.capacity * reserve
+        )
+
+    def acquire(self, estimated_tokens):
+        """Block until capacity for one call is available; returns seconds waited"""
+        wait = self.reserve(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def observe_headers(self, headers):
+        """Apply x-ratelimit-* and Retry-After headers from a response"""
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in dict(headers).items()}
+
+        remaining_requests = _to_float(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _to_float(headers.get("x-ratelimit-remaining-tokens"))
+        self.requests.observe(remaining_requests, parse_duration(headers.get("x-ratelimit-reset-requests")))
+        self.tokens.observe(remaining_tokens, parse_duration(headers.get("x-ratelimit-reset-tokens")))
+
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            self.requests.pause(retry_after)
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, estimated_tokens=1):
+        """Run fn under the rate limits, retrying retryable failures"""
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            try:
+                result = fn()
+            except Exception as exc:
+                # Retry-After pauses the shared buckets, so the next acquire() honours it
+                self.observe_headers(getattr(exc, "headers", None))
+                if not self.retryable(exc) or attempt >= self.max_retries:
+                    self.record("failures")
+                    raise
+
+                self.record("retries")
+                time.sleep(self.backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            self.observe_headers(getattr(result, "headers", None))
+            return result
+
+    def record(self, counter):
+        """Count a retry or failure handled outside call() (e.g. by the async engine)"""
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    def stats(self):
+        """Return scheduling counters and current bucket levels"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["requests_available"] = self.requests.available()
+        stats["tokens_available"] = self.tokens.available()
+        return stats
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
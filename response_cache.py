@@ -0,0 +1,185 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def key_scope(api_key):
+    """Account scope of a cache key: a hash of the API key, so responses are only shared by callers holding the same key"""
+    return hashlib.sha256(str(api_key).strip().encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(model, system_prompt, prompt, temperature, max_tokens, response_format=None, scope=None):
+    """Content-address a completion request (within scope, e.g. key_scope(api_key))"""
+    parts = [model, system_prompt, prompt, round(float(temperature), 4), int(max_tokens)]
+    if response_format:
+        parts.append(response_format)
+    if scope:
+        parts.append(scope)
+    material = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU cache with TTL and an optional on-disk SQLite tier"""
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, db_path=None):
+        self.max_entries = max(int(max_entries), 1)
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _expired(self, created):
+        return self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created):
+                        self._remember(key, value, created)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def contains(self, key):
+        """True when key has a fresh entry in any tier; not counted as a lookup"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                return True
+            if self._db is None:
+                return False
+            row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+            return row is not None and not self._expired(row[0])
+
+    def set(self, key, value):
+        """Store a response in every tier"""
+        if not value:
+            return
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, created),
+                )
+                self._db.commit()
+
+    def _remember(self, key, value, created):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class SingleFlight:
+    """Coalesces concurrent identical requests onto one in-flight call
+
+    The first caller for a key becomes the leader and makes the request;
+    callers arriving while it runs wait on the leader's future and share its
+    result or error. A None result means the leader gave up (e.g. a cancelled
+    stream) and waiters should make their own call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def join(self, key):
+        """Return (future, leader) for key; the leader must settle() the key"""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self._stats["leaders"] += 1
+            return future, True
+
+    def settle(self, key, result=None, error=None):
+        """Finish the leader's call and release every waiter"""
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def lead(self, key, fn):
+        """Run fn() as the leader for key and share its outcome"""
+        try:
+            result = fn()
+        except Exception as e:
+            self.settle(key, error=e)
+            raise
+        except BaseException:
+            self.settle(key)
+            raise
+        self.settle(key, result)
+        return result
+
+    def stats(self):
+        """Return leader/coalesced counters and the share of coalesced calls"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+
+        calls = stats["leaders"] + stats["coalesced"]
+        stats["coalesced_rate"] = stats["coalesced"] / calls if calls else 0.0
+        return stats
@@ -0,0 +1,211 @@
+import os
+
+# =========================
+# ENV HELPERS
+# =========================
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def env_float(name, default):
+    """Read a float setting from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def env_bool(name, default):
+    """Read a true/false setting from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def env_map(name, default, convert=str):
+    """Read "key=value;key=value" pairs from the environment on top of a default dict"""
+    result = dict(default)
+    for pair in os.getenv(name, "").split(";"):
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            result[key.strip()] = convert(value.strip())
+        except (TypeError, ValueError):
+            pass
+    return result
+
+def model_list(value):
+    """Comma-separated model names, in fallback order"""
+    models = [model.strip() for model in value.split(",") if model.strip()]
+    if not models:
+        raise ValueError("no models")
+    return models
+
+# =========================
+# Groq API CONFIG
+# =========================
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+# Small, fast model for short outputs (captions, idea lists, calendar rows)
+GROQ_FAST_MODEL = os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+
+# =========================
+# MODEL ROUTING CONFIG
+# =========================
+# Send each task to its own models; off sends every request to GROQ_MODEL
+MODEL_ROUTING = env_bool("GROQ_MODEL_ROUTING", True)
+# Models per task in fallback order, e.g. GROQ_MODEL_ROUTES="caption=llama-3.1-8b-instant,llama-3.3-70b-versatile;plan=llama-3.3-70b-versatile"
+MODEL_ROUTES = env_map("GROQ_MODEL_ROUTES", {
+    "ideas": [GROQ_FAST_MODEL, GROQ_MODEL],
+    "caption": [GROQ_FAST_MODEL, GROQ_MODEL],
+    "calendar": [GROQ_FAST_MODEL, GROQ_MODEL],
+    "plan": [GROQ_MODEL, GROQ_FAST_MODEL],
+    "other": [GROQ_MODEL, GROQ_FAST_MODEL],
+}, model_list) if MODEL_ROUTING else {"other": [GROQ_MODEL]}
+# Latency objective per task in seconds; a model missing it MODEL_SLO_MISSES times in a row
+# is moved behind the task's other models for MODEL_COOLDOWN_SECONDS
+MODEL_SLO_SECONDS = env_map("GROQ_MODEL_SLO", {
+    "ideas": 8.0,
+    "caption": 4.0,
+    "calendar": 12.0,
+    "plan": 45.0,
+    "other": 10.0,
+}, float)
+MODEL_SLO_MISSES = max(env_int("GROQ_MODEL_SLO_MISSES", 3), 1)
+MODEL_COOLDOWN_SECONDS = env_float("GROQ_MODEL_COOLDOWN", 120.0)
+
+# =========================
+# HTTP CLIENT CONFIG
+# =========================
+HTTP_POOL_CONNECTIONS = env_int("GROQ_POOL_CONNECTIONS", 4)
+HTTP_POOL_MAXSIZE = env_int("GROQ_POOL_MAXSIZE", 16)
+HTTP_KEEP_ALIVE = env_bool("GROQ_KEEP_ALIVE", True)
+HTTP_CONNECT_TIMEOUT = env_float("GROQ_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT = env_float("GROQ_READ_TIMEOUT", 30.0)
+
+# =========================
+# RESPONSE CACHE CONFIG
+# =========================
+CACHE_MAX_ENTRIES = env_int("GROQ_CACHE_SIZE", 256)
+CACHE_TTL_SECONDS = env_float("GROQ_CACHE_TTL", 3600.0)
+# Leave empty to keep the cache in memory only
+CACHE_DB_PATH = os.getenv("GROQ_CACHE_DB", "")
+# Identical requests already in flight wait for that call instead of sending their own
+COALESCE_REQUESTS = env_bool("GROQ_COALESCE", True)
+
+# =========================
+# RATE TIER / CONCURRENCY
+# =========================
+# Published Groq limits for llama-3.3-70b-versatile per account tier
+RATE_TIERS = {
+    "free": {"requests_per_minute": 30, "tokens_per_minute": 12000, "max_concurrency": 3},
+    "developer": {"requests_per_minute": 1000, "tokens_per_minute": 300000, "max_concurrency": 16},
+}
+GROQ_RATE_TIER = os.getenv("GROQ_RATE_TIER", "free").strip().lower()
+if GROQ_RATE_TIER not in RATE_TIERS:
+    GROQ_RATE_TIER = "free"
+
+MAX_CONCURRENCY = max(env_int("GROQ_MAX_CONCURRENCY", RATE_TIERS[GROQ_RATE_TIER]["max_concurrency"]), 1)
+# Split "All Platforms" idea requests into one concurrent request per platform
+IDEAS_FANOUT = env_bool("GROQ_IDEAS_FANOUT", True)
+# Ideas captioned per structured request in bulk captioning (1 = one request per caption)
+BULK_CAPTION_BATCH = env_int("GROQ_BULK_CAPTION_BATCH", 5)
+# Warm captions for the first ideas of every new idea set in the background (sidebar toggle default)
+CAPTION_PREFETCH = env_bool("GROQ_CAPTION_PREFETCH", False)
+CAPTION_PREFETCH_COUNT = env_int("GROQ_CAPTION_PREFETCH_COUNT", 3)
+# Prefetch only spends rate-limit capacity above this fraction of the per-minute budget
+CAPTION_PREFETCH_RESERVE = env_float("GROQ_CAPTION_PREFETCH_RESERVE", 0.5)
+# Seconds a prefetch waits for spare capacity before skipping its remaining captions
+CAPTION_PREFETCH_MAX_WAIT = env_float("GROQ_CAPTION_PREFETCH_MAX_WAIT", 30.0)
+
+# =========================
+# CONTENT PLAN CONFIG
+# =========================
+# Plans longer than this are split into day-window chunks generated in parallel
+PLAN_CHUNK_DAYS = env_int("GROQ_PLAN_CHUNK_DAYS", 7)
+# Extra runs of a chunk whose request still failed on a transient error after the scheduler's retries
+PLAN_CHUNK_RETRIES = env_int("GROQ_PLAN_CHUNK_RETRIES", 1)
+PLAN_TOKENS_PER_DAY = env_int("GROQ_PLAN_TOKENS_PER_DAY", 350)
+
+# =========================
+# TOKEN BUDGET CONFIG
+# =========================
+# max_tokens is sized from the requested ideas/posts/days, times this safety margin
+TOKEN_BUDGET_MARGIN = env_float("GROQ_TOKEN_MARGIN", 1.25)
+# Limits of llama-3.3-70b-versatile
+MODEL_CONTEXT_TOKENS = env_int("GROQ_CONTEXT_TOKENS", 131072)
+MAX_COMPLETION_TOKENS = env_int("GROQ_MAX_COMPLETION_TOKENS", 32768)
+# Follow-up requests sent when a response stops at max_tokens (finish_reason "length")
+MAX_CONTINUATIONS = env_int("GROQ_MAX_CONTINUATIONS", 2)
+
+# =========================
+# RATE LIMIT / RETRY CONFIG
+# =========================
+RATE_LIMIT_RPM = env_int("GROQ_RPM", RATE_TIERS[GROQ_RATE_TIER]["requests_per_minute"])
+RATE_LIMIT_TPM = env_int("GROQ_TPM", RATE_TIERS[GROQ_RATE_TIER]["tokens_per_minute"])
+RETRY_MAX_ATTEMPTS = env_int("GROQ_MAX_RETRIES", 4)
+RETRY_BASE_DELAY = env_float("GROQ_RETRY_BASE_DELAY", 1.0)
+RETRY_MAX_DELAY = env_float("GROQ_RETRY_MAX_DELAY", 30.0)
+
+# =========================
+# ASYNC ENGINE CONFIG
+# =========================
+# Run fan-out work (All Platforms ideas, plan chunks) on the shared asyncio/httpx engine
+ASYNC_ENGINE = env_bool("GROQ_ASYNC_ENGINE", True)
+
+# =========================
+# BACKGROUND JOB CONFIG
+# =========================
+# Worker threads running queued generations (shared by every session of the process)
+JOB_WORKERS = max(env_int("GROQ_JOB_WORKERS", 4), 1)
+# Seconds between status refreshes of the jobs panel while jobs are running
+JOB_POLL_SECONDS = env_float("GROQ_JOB_POLL_SECONDS", 1.0)
+# Finished jobs kept for status and pickup before the oldest are dropped
+JOB_RETENTION = env_int("GROQ_JOB_RETENTION", 200)
+
+# =========================
+# NEAR-DUPLICATE CONFIG
+# =========================
+# Flag generated ideas and calendar slots that repeat earlier ones (MinHash/LSH, runs locally)
+DEDUP_ENABLED = env_bool("GROQ_DEDUP", True)
+# Estimated Jaccard similarity of word shingles at which two items count as near-duplicates
+DEDUP_THRESHOLD = env_float("GROQ_DEDUP_THRESHOLD", 0.5)
+
+# =========================
+# SESSION HISTORY CONFIG
+# =========================
+HISTORY_MAX_ENTRIES = env_int("GROQ_HISTORY_SIZE", 200)
+# Bodies at least this many bytes are zlib-compressed
+HISTORY_COMPRESS_THRESHOLD = env_int("GROQ_HISTORY_COMPRESS_BYTES", 2048)
+# Directory for compressed bodies kept off-heap; empty keeps them in memory
+HISTORY_SPILL_DIR = os.getenv("GROQ_HISTORY_DIR", "")
+# "memory" keeps history per session; "sqlite" persists one history shared by every session
+# (and replica) using the same namespace, so only opt in where users may see each other's content
+HISTORY_BACKEND = os.getenv("GROQ_HISTORY_BACKEND", "memory").strip().lower()
+HISTORY_DB_PATH = os.getenv("GROQ_HISTORY_DB", "history.db")
+# Separate histories sharing one database (e.g. per team or deployment)
+HISTORY_NAMESPACE = os.getenv("GROQ_HISTORY_NAMESPACE", "default")
+HISTORY_DB_MAX_ENTRIES = env_int("GROQ_HISTORY_DB_SIZE", 10000)
+# Page size choices for the history lists (first is the default)
+HISTORY_PAGE_SIZES = [10, 25, 50, 100]
+# Directory for prepared history exports; empty uses the system temp directory
+EXPORT_DIR = os.getenv("GROQ_EXPORT_DIR", "")
+# Prepared exports older than this are deleted at startup and before each new export
+EXPORT_MAX_AGE_SECONDS = env_int("GROQ_EXPORT_MAX_AGE", 3600)
+
+# =========================
+# METRICS CONFIG
+# =========================
+# Recent calls kept for the latency/token percentiles
+METRICS_BUFFER_SIZE = env_int("GROQ_METRICS_BUFFER", 1000)
+# Append every call record to this JSONL file; empty disables it
+METRICS_JSONL_PATH = os.getenv("GROQ_METRICS_JSONL", "")
+# Serve Prometheus text metrics at http://<host>:<port>/metrics; 0 disables it
+METRICS_PORT = env_int("GROQ_METRICS_PORT", 0)
+# Recent script runs kept per session for the rerun timing report
+RERUN_TIMINGS_SIZE = env_int("GROQ_RERUN_TIMINGS", 50)
+# Append every script run's timings to this JSONL file; empty disables it
+RERUN_TIMINGS_JSONL_PATH = os.getenv("GROQ_RERUN_TIMINGS_JSONL", "")
@@ -0,0 +1,212 @@
+import json
+
+# Field name -> description shown to the model. Every field is a string
+# except list fields, which are arrays of strings.
+SCHEMAS = {
+    'idea': {
+        'collection': 'ideas',
+        'fields': {
+            'title': "catchy title",
+            'concept': "main concept or angle, one or two sentences",
+            'content_type': "carousel, video, image, reel, thread or text",
+            'hook': "engagement hook",
+            'platform': "platform the idea is for",
+        },
+        'required': ('title', 'concept'),
+        'lists': (),
+    },
+    'caption': {
+        'collection': None,
+        'fields': {
+            'body': "caption text with emojis, without the hashtags",
+            'cta': "call-to-action sentence",
+            'hashtags': "5-10 hashtags, each starting with #",
+        },
+        'required': ('body',),
+        'lists': ('hashtags',),
+    },
+    'bulk_caption': {
+        'collection': 'captions',
+        'fields': {
+            'idea': "number of the idea the caption is for",
+            'body': "caption text with emojis, without the hashtags",
+            'cta': "call-to-action sentence",
+            'hashtags': "5-10 hashtags, each starting with #",
+        },
+        'required': ('idea', 'body'),
+        'lists': ('hashtags',),
+    },
+    'calendar_entry': {
+        'collection': 'entries',
+        'fields': {
+            'date': "ISO date, YYYY-MM-DD",
+            'platform': "platform to post on",
+            'time': "best posting time, e.g. 9:00 AM",
+            'type': "content type, e.g. Carousel or Video",
+            'idea': "brief post idea and key message",
+        },
+        'required': ('date', 'platform', 'idea'),
+        'lists': (),
+    },
+}
+
+
+def schema_example(kind):
+    """JSON skeleton of the response expected for a record kind"""
+    schema = SCHEMAS[kind]
+    record = {
+        field: [description] if field in schema['lists'] else description
+        for field, description in schema['fields'].items()
+    }
+    if schema['collection']:
+        return {schema['collection']: [record]}
+    return record
+
+
+def schema_instructions(kind):
+    """Output-format instructions appended to a prompt in structured mode"""
+    collection = SCHEMAS[kind]['collection']
+    shape = json.dumps(schema_example(kind), indent=2, ensure_ascii=False)
+    repeat = f' with one object per item in the "{collection}" array' if collection else ''
+    return (
+        f"Respond with a single JSON object only, no markdown or commentary, in this shape{repeat}:\n"
+        f"{shape}"
+    )
+
+
+def normalize_record(kind, obj):
+    """Coerce a decoded object to the schema; None if it lacks required fields"""
+    if not isinstance(obj, dict):
+        return None
+    schema = SCHEMAS[kind]
+    record = {}
+    for field in schema['fields']:
+        value = obj.get(field)
+        if field in schema['lists']:
+            if isinstance(value, str):
+                value = value.replace(',', ' ').split()
+            value = [str(item).strip() for item in (value or []) if str(item).strip()]
+            if field == 'hashtags':
+                value = [tag if tag.startswith('#') else f"#{tag}" for tag in value]
+        else:
+            value = '' if value is None else str(value).strip()
+        record[field] = value
+
+    if any(not record[field] for field in schema['required']):
+        return None
+    return record
+
+
+def parse_records(kind, text):
+    """Decode a complete JSON response into normalized records"""
+    try:
+        data = json.loads(text)
+    except (TypeError, json.JSONDecodeError):
+        return []
+
+    if isinstance(data, dict) and SCHEMAS[kind]['collection']:
+        # Accept the expected collection key or whatever list the model used
+        items = data.get(SCHEMAS[kind]['collection'])
+        if items is None:
+            items = next((value for value in data.values() if isinstance(value, list)), [data])
+    elif isinstance(data, list):
+        items = data
+    else:
+        items = [data]
+
+    records = (normalize_record(kind, item) for item in items)
+    return [record for record in records if record is not None]
+
+
+class RecordStreamParser:
+    """Incremental parser that emits complete records from a streamed JSON response
+
+    Only the record currently being received is buffered. Collections
+    ({"ideas": [{...}, ...]}) and bare arrays ([{...}, ...]) emit each object
+    as soon as its closing brace arrives; a single top-level object emits
+    once it closes. The nesting is taken from the first bracket received,
+    so text before it (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        # Set from the first bracket: records nest inside {"key": [ ... ]}, [ ... ] or are the object itself
+        self.record_depth = None
+        self.skipped = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._buffer = None
+
+    def feed(self, chunk):
+        """Consume streamed text; return the records completed by it"""
+        records = []
+        for char in chunk:
+            if self._buffer is not None:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+                continue
+            if self.record_depth is None and char in '{[':
+                self.record_depth = self.root_depth(char)
+            if char in '{[':
+                if char == '{' and self._depth == self.record_depth and self._buffer is None:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == self.record_depth and self._buffer is not None:
+                    record = self._finish(''.join(self._buffer))
+                    self._buffer = None
+                    if record is not None:
+                        records.append(record)
+        return records
+
+    def root_depth(self, bracket):
+        """Depth of the record objects for a response opening with bracket"""
+        if bracket == '[':
+            return 1
+        return 2 if SCHEMAS[self.kind]['collection'] else 0
+
+    def _finish(self, text):
+        try:
+            record = normalize_record(self.kind, json.loads(text))
+        except json.JSONDecodeError:
+            record = None
+        if record is None:
+            self.skipped += 1
+        return record
+
+
+def records_to_text(kind, records, start=1):
+    """Readable markdown rendering of records, used for history and display"""
+    if kind == 'idea':
+        return '\n\n'.join(
+            f"{number}. **{r['title']}**"
+            + (f" ({r['platform']})" if r['platform'] else '')
+            + f"\n   {r['concept']}"
+            + (f"\n   Type: {r['content_type']}" if r['content_type'] else '')
+            + (f"\n   Hook: {r['hook']}" if r['hook'] else '')
+            for number, r in enumerate(records, start=start)
+        )
+    if kind in ('caption', 'bulk_caption'):
+        return '\n\n'.join(
+            '\n\n'.join(part for part in (r['body'], r['cta'], ' '.join(r['hashtags'])) if part)
+            for r in records
+        )
+    if kind == 'calendar_entry':
+        return '\n\n'.join(
+            f"📅 {r['date']} | {r['platform']} | {r['time']}\n   Type: {r['type']}\n   Idea: {r['idea']}"
+            for r in records
+        )
+    raise ValueError(f"Unknown record kind '{kind}'")
@@ -0,0 +1,265 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+import agent_core as core
+from history_export import iter_ics
+from structured_output import parse_records, records_to_text
+from ui_common import (
+    check_duplicates,
+    fanout_engine,
+    get_platform_badge,
+    get_services,
+    history_page,
+    keep,
+    lazy_body,
+    show_job_notices,
+    stream_job_records,
+    stream_job_text,
+    submit_job,
+)
+
+# =========================
+# GENERATION FUNCTIONS
+# =========================
+# These run as background jobs (see ui_common.submit_job) and must not call Streamlit
+def generate_weekly_plan(report, topic, platforms, api_key, brand_info, use_cache=True, structured=False, start_date=None, end_date=None, services=None, engine=None):
+    """Job: generate a content calendar for the date range, falling back to templates; returns {'text', 'records', 'warning', 'error'}"""
+    if start_date and len(core.split_calendar_weeks(start_date, end_date)) > 1:
+        return generate_calendar_weeks(report, topic, platforms, api_key, brand_info, use_cache, structured, start_date, end_date, services, engine)
+
+    error = None
+    try:
+        if structured:
+            request = core.calendar_request(topic, platforms, brand_info, True, start_date, end_date)
+            records = stream_job_records(report, 'calendar_entry', request, api_key, use_cache, services)
+            if records:
+                return {'text': records_to_text('calendar_entry', records), 'records': records}
+        else:
+            request = core.calendar_request(topic, platforms, brand_info, start_date=start_date, end_date=end_date)
+            text = stream_job_text(report, request, api_key, use_cache, services)
+            if text:
+                return {'text': text, 'records': []}
+    except Exception as e:
+        error = e
+
+    result = {'warning': "⚠️ Using template calendar. Add API key for custom AI calendar!", 'error': error}
+    if structured:
+        records = core.fallback_calendar_records(topic, platforms, start_date, end_date, brand_info)
+        return dict(result, text=records_to_text('calendar_entry', records), records=records)
+    return dict(result, text=core.create_fallback_calendar(topic, platforms, start_date, end_date, brand_info), records=[])
+
+def generate_calendar_weeks(report, topic, platforms, api_key, brand_info, use_cache=True, structured=False, start_date=None, end_date=None, services=None, engine=None):
+    """Job: generate a multi-week calendar one week per request, in parallel"""
+    weeks = core.split_calendar_weeks(start_date, end_date)
+    report(done=0, total=len(weeks))
+
+    results = {}
+    records = {}
+    failed = []
+    # Weeks of a range generated again within the cache TTL come back from the cache
+    for week, calendar, error in core.iter_calendar_weeks(
+        topic, platforms, api_key, brand_info, start_date, end_date, use_cache,
+        services, engine=engine, structured=structured
+    ):
+        if error is None and structured:
+            records[week['index']] = parse_records('calendar_entry', calendar)
+            calendar = records_to_text('calendar_entry', records[week['index']]) if records[week['index']] else None
+        if error is not None or not calendar:
+            failed.append(week)
+            if structured:
+                records[week['index']] = core.fallback_calendar_records(
+                    topic, platforms, week['start_date'], week['end_date'], brand_info
+                )
+                calendar = records_to_text('calendar_entry', records[week['index']])
+            else:
+                calendar = core.create_fallback_calendar(topic, platforms, week['start_date'], week['end_date'], brand_info)
+        results[week['index']] = (week, calendar)
+        report(done=len(results), note=f"🗓️ {core.week_label(week)} {'⚠️' if week in failed else '✅'}")
+
+    merged_records = [r for index in sorted(records) for r in records[index]]
+    result = {'text': core.stitch_calendar([results[index] for index in sorted(results)]), 'records': merged_records}
+    if failed:
+        result['warning'] = (
+            "⚠️ API request failed for "
+            + ", ".join(core.week_label(week) for week in sorted(failed, key=lambda w: w['index']))
+            + ". Showing template entries for those weeks."
+        )
+    return result
+
+# =========================
+# JOB RESULTS
+# =========================
+def save_calendar(topic, platforms, start_date, end_date, calendar, records):
+    """Add a calendar to history, flagging near-duplicate slots"""
+    calendar, records, duplicates = check_duplicates('calendar', topic, platforms, calendar, records)
+    meta = {'records': records} if records else {}
+    if duplicates:
+        meta['duplicates'] = duplicates
+    st.session_state.history.add(
+        'calendar',
+        topic,
+        calendar,
+        platforms=platforms,
+        start_date=start_date,
+        end_date=end_date,
+        **meta
+    )
+
+def collect(job):
+    """Save a finished calendar job to history"""
+    result = job['result']
+    show_job_notices(result)
+    if result['text']:
+        save_calendar(job['topic'], job['platforms'], job['start_date'], job['end_date'], result['text'], result['records'])
+        st.success(f"✅ Content calendar for '{job['topic']}' created!")
+
+# =========================
+# TAB 3: CONTENT CALENDAR
+# =========================
+def render():
+    """Calendar tab: date-range content calendars and saved calendars"""
+    st.markdown("## 📅 Weekly Content Planner")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        calendar_topic = st.text_input(
+            "Theme for the week",
+            placeholder="e.g., Summer fitness challenge",
+            key=keep("calendar_topic")
+        )
+
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+
+    # Date range selection
+    st.markdown("### 📆 Select Date Range")
+    dr_col1, dr_col2 = st.columns(2)
+    with dr_col1:
+        start_date = st.date_input(
+            "Start Date",
+            value=datetime.now().date(),
+            key=keep("cal_start_date")
+        )
+    with dr_col2:
+        end_date = st.date_input(
+            "End Date",
+            value=(datetime.now() + timedelta(days=6)).date(),
+            key=keep("cal_end_date")
+        )
+
+    # Validate date range
+    if start_date > end_date:
+        st.error("❌ Start date cannot be after end date!")
+        date_range_valid = False
+    else:
+        days_diff = (end_date - start_date).days + 1
+        st.info(
+            f"📅 Calendar period: {days_diff} days "
+            f"({start_date.strftime('%b %d, %Y')} to {end_date.strftime('%b %d, %Y')})"
+        )
+        date_range_valid = True
+
+    platforms_selected = st.multiselect(
+        "Select platforms for this calendar",
+        ["Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok"],
+        default=["Instagram", "Twitter"],
+        key=keep("calendar_platforms")
+    )
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        create_calendar = st.button("📅 Create Calendar", use_container_width=True)
+    with col2:
+        template_draft = st.button(
+            "⚡ Template Draft",
+            use_container_width=True,
+            help="Fill the date range instantly from the offline template bank (no API call)"
+        )
+
+    if create_calendar or template_draft:
+        if create_calendar and not st.session_state.api_key:
+            st.warning("⚠️ Please enter your Groq API key!")
+        elif not calendar_topic:
+            st.warning("⚠️ Please enter a theme!")
+        elif not platforms_selected:
+            st.warning("⚠️ Please select at least one platform!")
+        elif not date_range_valid:
+            st.warning("⚠️ Please select a valid date range!")
+        else:
+            if template_draft:
+                # Instant draft from the template bank, no API call
+                records = core.fallback_calendar_records(
+                    calendar_topic, platforms_selected, start_date, end_date, st.session_state.brand_info
+                )
+                save_calendar(
+                    calendar_topic, platforms_selected, start_date, end_date,
+                    records_to_text('calendar_entry', records), records
+                )
+                st.success("✅ Content calendar created!")
+            else:
+                submit_job(
+                    'calendar',
+                    generate_weekly_plan,
+                    (calendar_topic, platforms_selected, st.session_state.api_key, dict(st.session_state.brand_info)),
+                    {
+                        'structured': st.session_state.get('structured_output', False),
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'services': get_services(),
+                        'engine': fanout_engine()
+                    },
+                    label=f"📅 Calendar: {calendar_topic} ({start_date.strftime('%b %d')} to {end_date.strftime('%b %d')})",
+                    tab=__name__,
+                    topic=calendar_topic,
+                    platforms=list(platforms_selected),
+                    start_date=start_date,
+                    end_date=end_date
+                )
+
+    # Display calendars
+    if st.session_state.history.count('calendar'):
+        st.markdown("---")
+        st.markdown("### 📆 Your Content Calendars")
+
+        calendars, offset = history_page('calendar', "calendar_history")
+        for idx, cal in enumerate(calendars, start=offset):
+            # show selected date range if available
+            if 'start_date' in cal.meta and 'end_date' in cal.meta:
+                date_display = f" ({cal.meta['start_date'].strftime('%b %d')} to {cal.meta['end_date'].strftime('%b %d, %Y')})"
+            else:
+                date_display = f" - Week of {cal.timestamp.strftime('%b %d, %Y')}"
+
+            with st.expander(f"📅 {cal.topic}{date_display}", expanded=(idx == 0)):
+                st.markdown("<div class='calendar-day'>", unsafe_allow_html=True)
+                for platform in cal.platforms:
+                    st.markdown(get_platform_badge(platform), unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                if cal.meta.get('duplicates'):
+                    st.caption(f"🔁 {len(cal.meta['duplicates'])} near-duplicate slot(s) flagged when generated")
+
+                calendar_text = lazy_body(cal, expanded=(idx == 0))
+                if calendar_text is not None:
+                    if cal.meta.get('records'):
+                        st.dataframe(cal.meta['records'], use_container_width=True, hide_index=True)
+                    else:
+                        st.markdown(f"<div class='content-card'>{calendar_text}</div>", unsafe_allow_html=True)
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.download_button(
+                            "📥 Download as Text",
+                            calendar_text,
+                            file_name=f"content_calendar_{cal.timestamp.strftime('%Y%m%d')}.txt",
+                            mime="text/plain",
+                            key=f"download_{cal.entry_id}"
+                        )
+                    with col2:
+                        st.download_button(
+                            "📅 Download .ics",
+                            "".join(iter_ics([(cal, calendar_text)])),
+                            file_name=f"content_calendar_{cal.timestamp.strftime('%Y%m%d')}.ics",
+                            mime="text/calendar",
+                            key=f"ics_{cal.entry_id}"
+                        )
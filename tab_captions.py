@@ -0,0 +1,242 @@
+import streamlit as st
+
+import agent_core as core
+import settings
+from structured_output import records_to_text
+from ui_common import (
+    fanout_engine,
+    get_platform_badge,
+    get_services,
+    keep,
+    show_job_notices,
+    stream_job_text,
+    submit_job,
+)
+
+# =========================
+# GENERATION FUNCTIONS
+# =========================
+# These run as background jobs (see ui_common.submit_job) and must not call Streamlit
+def generate_caption(report, idea, platform, api_key, brand_info, use_cache=True, structured=False, services=None):
+    """Job: generate a caption for a content idea, falling back to a template; returns {'text', 'records', 'warning', 'error'}"""
+    error = None
+    try:
+        if structured:
+            records = core.fetch_records(
+                'caption', core.caption_request(idea, platform, brand_info, True), api_key, use_cache, services
+            )
+            if records:
+                return {'text': records_to_text('caption', records), 'records': records}
+        else:
+            text = stream_job_text(report, core.caption_request(idea, platform, brand_info), api_key, use_cache, services)
+            if text:
+                return {'text': text, 'records': []}
+    except Exception as e:
+        error = e
+
+    result = {'warning': "⚠️ Using template caption. Add API key for custom AI captions!", 'error': error}
+    if structured:
+        records = [core.fallback_caption_record(idea, platform, brand_info)]
+        return dict(result, text=records_to_text('caption', records), records=records)
+    return dict(result, text=core.create_fallback_caption(idea, platform, brand_info), records=[])
+
+def generate_bulk_captions(report, ideas, platforms, api_key, brand_info, batch_size, services=None, engine=None):
+    """Job: caption every idea for every platform; returns {'rows', 'warning'} with rows in idea order"""
+    total = len(ideas) * len(platforms)
+    report(done=0, total=total)
+    rows = []
+    for row in core.iter_bulk_captions(
+        ideas, platforms, api_key, brand_info, True, services, engine=engine, batch_size=batch_size
+    ):
+        if row['error']:
+            row['caption'] = core.create_fallback_caption(row['idea'], row['platform'], brand_info)
+        rows.append(row)
+        report(done=len(rows), note=f"✍️ {len(rows)}/{total} captions ready")
+
+    result = {'rows': core.sort_caption_rows(rows, platforms)}
+    failed = sum(1 for row in rows if row['error'])
+    if failed:
+        result['warning'] = f"⚠️ {failed} of {total} captions failed. Showing template captions for those."
+    return result
+
+# =========================
+# JOB RESULTS
+# =========================
+def submit_caption(idea, platform, use_cache=True):
+    """Queue a caption job for this session; its result shows in this tab"""
+    return submit_job(
+        'caption',
+        generate_caption,
+        (idea, platform, st.session_state.api_key, dict(st.session_state.brand_info)),
+        {
+            'use_cache': use_cache,
+            'structured': st.session_state.get('structured_output', False),
+            'services': get_services()
+        },
+        label=f"✍️ Caption: {core.summarize_item(idea, 40)} ({platform})",
+        tab=__name__,
+        idea=idea,
+        platform=platform
+    )
+
+def collect(job):
+    """Show a finished caption job in this tab"""
+    result = job['result']
+    show_job_notices(result)
+    if job['kind'] == 'bulk_captions':
+        st.session_state.bulk_captions = result['rows']
+        st.success(f"✅ Bulk captions ready in Caption Generator ({len(result['rows'])} rows)")
+    elif result['text']:
+        st.session_state.last_caption = {
+            'idea': job['idea'],
+            'platform': job['platform'],
+            'caption': result['text'],
+            'records': result['records']
+        }
+        # Kept in history too so captions are part of the bulk export
+        meta = {'records': result['records']} if result['records'] else {}
+        st.session_state.history.add('caption', job['idea'], result['text'], platforms=[job['platform']], **meta)
+        st.success(f"✅ {job['platform']} caption ready in Caption Generator")
+
+# =========================
+# TAB 2: CAPTION GENERATOR
+# =========================
+def render():
+    """Caption tab: single captions and bulk captions for a saved idea set"""
+    st.markdown("## ✍️ Generate Captions")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        caption_idea = st.text_area(
+            "Content Idea or Description",
+            placeholder="e.g., Announcing our new product launch - eco-friendly water bottles",
+            height=100,
+            key=keep("caption_idea")
+        )
+
+    with col2:
+        caption_platform = st.selectbox(
+            "Platform",
+            ["Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok"],
+            key=keep("caption_platform")
+        )
+
+        # "Generate Another" asks for a fresh caption that skips the response cache
+        regenerate_caption = st.session_state.pop('regenerate_caption', False)
+
+        if st.button("✨ Generate Caption", use_container_width=True) or regenerate_caption:
+            if not st.session_state.api_key:
+                st.warning("⚠️ Please enter your Groq API key!")
+            elif not caption_idea:
+                st.warning("⚠️ Please describe your content idea!")
+            else:
+                submit_caption(caption_idea, caption_platform, use_cache=not regenerate_caption)
+
+    # Latest caption is kept in session until the next one is picked up
+    last_caption = st.session_state.get('last_caption')
+    if last_caption:
+        st.markdown("---")
+        st.markdown("### 📱 Your Caption")
+        st.markdown(get_platform_badge(last_caption['platform']), unsafe_allow_html=True)
+        st.markdown(f"<div class='caption-box'>{last_caption['caption']}</div>", unsafe_allow_html=True)
+        if last_caption['records']:
+            st.json(last_caption['records'][0], expanded=False)
+
+        col1b, col2b = st.columns(2)
+        with col1b:
+            if st.button("📋 Copy Caption"):
+                st.code(last_caption['caption'], language=None)
+        with col2b:
+            st.button(
+                "🔄 Generate Another",
+                on_click=lambda: st.session_state.update(regenerate_caption=True)
+            )
+
+    # Bulk mode: caption a stored idea set for several platforms in one action
+    st.markdown("---")
+    st.markdown("### 📚 Bulk Captions")
+
+    idea_sets, _ = st.session_state.history.page('ideas', page=1, page_size=50)
+    if not idea_sets:
+        st.info("💡 Generate ideas in the Content Ideas tab to caption a whole list at once.")
+    else:
+        sets_by_id = {entry.entry_id: entry for entry in idea_sets}
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            idea_set_id = st.selectbox(
+                "Idea set",
+                list(sets_by_id),
+                format_func=lambda entry_id: (
+                    f"{sets_by_id[entry_id].topic} - {sets_by_id[entry_id].platform} "
+                    f"({sets_by_id[entry_id].timestamp.strftime('%Y-%m-%d %H:%M')})"
+                ),
+                key=keep("bulk_idea_set")
+            )
+        with col2:
+            bulk_platforms = st.multiselect(
+                "Platforms",
+                ["Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok"],
+                default=["Instagram"],
+                key=keep("bulk_platforms")
+            )
+
+        idea_set = sets_by_id[idea_set_id]
+        bulk_ideas = core.idea_list(st.session_state.history.body(idea_set), idea_set.meta.get('records'))
+
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            bulk_mode = st.radio(
+                "Mode",
+                ["Batched", "Concurrent"],
+                horizontal=True,
+                key=keep("bulk_mode"),
+                help=f"Batched captions up to {settings.BULK_CAPTION_BATCH} ideas per request; Concurrent sends one request per caption"
+            )
+            st.caption(f"{len(bulk_ideas)} ideas × {len(bulk_platforms)} platforms = {len(bulk_ideas) * len(bulk_platforms)} captions")
+        with col2:
+            if st.button("📚 Caption All", use_container_width=True):
+                if not st.session_state.api_key:
+                    st.warning("⚠️ Please enter your Groq API key!")
+                elif not bulk_platforms:
+                    st.warning("⚠️ Please choose at least one platform!")
+                else:
+                    submit_job(
+                        'bulk_captions',
+                        generate_bulk_captions,
+                        (
+                            bulk_ideas,
+                            bulk_platforms,
+                            st.session_state.api_key,
+                            dict(st.session_state.brand_info),
+                            settings.BULK_CAPTION_BATCH if bulk_mode == "Batched" else 1
+                        ),
+                        {'services': get_services(), 'engine': fanout_engine()},
+                        label=f"📚 Captions: {idea_set.topic} × {len(bulk_platforms)} platforms",
+                        tab=__name__
+                    )
+
+        caption_rows = st.session_state.get('bulk_captions')
+        if caption_rows:
+            st.dataframe(
+                caption_rows,
+                hide_index=True,
+                column_order=[f for f in core.BULK_CAPTION_FIELDS if f != 'error' or any(r['error'] for r in caption_rows)]
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "⬇️ Download CSV",
+                    core.caption_rows_to_csv(caption_rows),
+                    file_name="captions.csv",
+                    mime="text/csv",
+                    key="bulk_csv"
+                )
+            with col2:
+                st.download_button(
+                    "⬇️ Download JSONL",
+                    core.caption_rows_to_jsonl(caption_rows),
+                    file_name="captions.jsonl",
+                    mime="application/jsonl",
+                    key="bulk_jsonl"
+                )
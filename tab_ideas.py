@@ -0,0 +1,199 @@
+import json
+
+import streamlit as st
+
+import agent_core as core
+import settings
+import tab_captions
+from structured_output import parse_records, records_to_text
+from ui_common import (
+    check_duplicates,
+    fanout_engine,
+    get_platform_badge,
+    get_services,
+    history_page,
+    keep,
+    lazy_body,
+    prefetch_captions,
+    show_job_notices,
+    stream_job_records,
+    stream_job_text,
+    submit_job,
+)
+
+# =========================
+# GENERATION FUNCTIONS
+# =========================
+# These run as background jobs (see ui_common.submit_job) and must not call Streamlit
+def generate_content_ideas(report, topic, platform, count, api_key, brand_info, use_cache=True, structured=False, services=None, engine=None):
+    """Job: generate content ideas, falling back to templates; returns {'text', 'records', 'warning', 'error'}"""
+    if platform == "All Platforms" and settings.IDEAS_FANOUT:
+        return generate_ideas_fanout(report, topic, count, api_key, brand_info, use_cache, structured, services, engine)
+
+    error = None
+    try:
+        if structured:
+            records = stream_job_records(
+                report, 'idea', core.ideas_request(topic, platform, count, brand_info, True), api_key, use_cache, services
+            )
+            records = [dict(r, platform=r['platform'] or platform) for r in records]
+            if records:
+                return {'text': records_to_text('idea', records), 'records': records}
+        else:
+            text = stream_job_text(report, core.ideas_request(topic, platform, count, brand_info), api_key, use_cache, services)
+            if text:
+                return {'text': text, 'records': []}
+    except Exception as e:
+        error = e
+
+    result = {'warning': "⚠️ API request failed. Showing fallback ideas instead.", 'error': error}
+    if structured:
+        records = core.fallback_idea_records(topic, platform, count, brand_info)
+        return dict(result, text=core.ideas_text(records, platform), records=records)
+    return dict(result, text=core.fallback_ideas(topic, platform, count, brand_info), records=[])
+
+def generate_ideas_fanout(report, topic, count, api_key, brand_info, use_cache=True, structured=False, services=None, engine=None):
+    """Job: generate ideas for every platform concurrently and merge them per platform"""
+    results = {}
+    records = {}
+    failed = []
+    report(done=0, total=len(core.FANOUT_PLATFORMS))
+    for platform, ideas, error in core.iter_ideas_fanout(
+        topic, count, api_key, brand_info, use_cache, services, engine=engine, structured=structured
+    ):
+        if error is None and structured:
+            records[platform] = [dict(r, platform=r['platform'] or platform) for r in parse_records('idea', ideas)]
+            ideas = records_to_text('idea', records[platform]) if records[platform] else None
+        if error is not None or not ideas:
+            failed.append(platform)
+            if structured:
+                records[platform] = core.fallback_idea_records(topic, platform, count, brand_info)
+            ideas = core.fallback_ideas(topic, platform, count, brand_info)
+        results[platform] = ideas
+        report(done=len(results), note=f"{platform} {'⚠️' if platform in failed else '✅'}")
+
+    merged_records = [r for platform in core.FANOUT_PLATFORMS for r in records.get(platform, [])]
+    result = {'text': core.merge_fanout_ideas(results), 'records': merged_records}
+    if failed:
+        result['warning'] = f"⚠️ API request failed for {', '.join(failed)}. Showing fallback ideas for those platforms."
+    return result
+
+# =========================
+# JOB RESULTS
+# =========================
+def collect(job):
+    """Save a finished ideas job to history, flagging near-duplicates"""
+    result = job['result']
+    show_job_notices(result)
+    if not result['text']:
+        return
+    ideas, records, duplicates = check_duplicates('ideas', job['topic'], [job['platform']], result['text'], result['records'])
+    meta = {'records': records} if records else {}
+    if duplicates:
+        meta['duplicates'] = duplicates
+    st.session_state.history.add('ideas', job['topic'], ideas, platforms=[job['platform']], **meta)
+    prefetch_captions(ideas, records, job['platform'])
+    st.success(f"✅ Content ideas for '{job['topic']}' generated!")
+
+# =========================
+# TAB 1: CONTENT IDEAS
+# =========================
+def render():
+    """Content ideas tab: generate ideas and browse saved idea sets"""
+    st.markdown("## 💡 Generate Content Ideas")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        topic = st.text_input(
+            "What topic or theme?",
+            placeholder="e.g., Productivity tips for remote workers",
+            key=keep("ideas_topic")
+        )
+
+    with col2:
+        platform = st.selectbox(
+            "Platform",
+            ["Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok", "All Platforms"],
+            key=keep("ideas_platform")
+        )
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        num_ideas = st.slider("Number of ideas", 3, 10, 5, key=keep("ideas_count"))
+
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("🚀 Generate Ideas", use_container_width=True):
+            if not st.session_state.api_key:
+                st.warning("⚠️ Please enter your Groq API key in the sidebar first!")
+            elif not topic:
+                st.warning("⚠️ Please enter a topic!")
+            else:
+                submit_job(
+                    'ideas',
+                    generate_content_ideas,
+                    (topic, platform, num_ideas, st.session_state.api_key, dict(st.session_state.brand_info)),
+                    {
+                        'structured': st.session_state.get('structured_output', False),
+                        'services': get_services(),
+                        'engine': fanout_engine()
+                    },
+                    label=f"💡 Ideas: {topic} ({platform})",
+                    tab=__name__,
+                    topic=topic,
+                    platform=platform
+                )
+
+    # Display generated ideas
+    if st.session_state.history.count('ideas'):
+        st.markdown("---")
+        st.markdown("### 📝 Generated Ideas")
+
+        entries, offset = history_page('ideas', "ideas_history")
+        for idx, entry in enumerate(entries, start=offset):
+            with st.expander(
+                f"💡 {entry.topic} - {entry.platform} ({entry.timestamp.strftime('%Y-%m-%d %H:%M')})",
+                expanded=(idx == 0)
+            ):
+                if entry.platform == "All Platforms":
+                    st.markdown(''.join(get_platform_badge(p) for p in core.FANOUT_PLATFORMS), unsafe_allow_html=True)
+                else:
+                    st.markdown(get_platform_badge(entry.platform), unsafe_allow_html=True)
+                if entry.meta.get('duplicates'):
+                    st.caption(f"🔁 {len(entry.meta['duplicates'])} near-duplicate idea(s) flagged when generated")
+
+                ideas = lazy_body(entry, expanded=(idx == 0))
+                if ideas is not None:
+                    st.markdown(f"<div class='content-card'>{ideas}</div>", unsafe_allow_html=True)
+
+                    if st.button("📋 Copy Ideas", key=f"copy_{entry.entry_id}"):
+                        st.code(ideas, language=None)
+
+                    # Captions of the first ideas may already be warm (sidebar "Prefetch captions")
+                    targets = core.idea_targets(ideas, entry.meta.get('records'), entry.platform)
+                    if targets:
+                        col1b, col2b = st.columns([3, 1])
+                        with col1b:
+                            choice = st.selectbox(
+                                "Caption an idea",
+                                range(len(targets)),
+                                format_func=lambda i: f"{targets[i][1]}: {core.summarize_item(targets[i][0], 90)}",
+                                key=f"caption_pick_{entry.entry_id}"
+                            )
+                        with col2b:
+                            st.markdown("<br>", unsafe_allow_html=True)
+                            if st.button("✍️ Caption this", key=f"caption_this_{entry.entry_id}", use_container_width=True):
+                                idea, idea_platform = targets[choice]
+                                # Fill the caption tab's inputs so "Generate Another" works on this idea
+                                st.session_state.caption_idea = idea
+                                st.session_state.caption_platform = idea_platform
+                                tab_captions.submit_caption(idea, idea_platform)
+                    if entry.meta.get('records'):
+                        st.download_button(
+                            "⬇️ Download JSON",
+                            json.dumps(entry.meta['records'], ensure_ascii=False, indent=2),
+                            file_name=f"content_ideas_{entry.timestamp.strftime('%Y%m%d_%H%M')}.json",
+                            mime="application/json",
+                            key=f"json_{entry.entry_id}"
+                        )
@@ -0,0 +1,230 @@
+from datetime import datetime
+
+import streamlit as st
+
+import agent_core as core
+import settings
+from history_export import iter_ics
+from ui_common import (
+    fanout_engine,
+    get_services,
+    history_page,
+    keep,
+    lazy_body,
+    show_job_notices,
+    stream_job_text,
+    submit_job,
+)
+
+# =========================
+# GENERATION FUNCTIONS
+# =========================
+# These run as background jobs (see ui_common.submit_job) and must not call Streamlit
+def generate_content_plan(report, num_days, platform, brand_voice, content_focus, posting_frequency, topic, api_key, services=None, engine=None):
+    """Job: generate a Tab 4 plan, splitting long plans into parallel day-window chunks; returns {'text', 'chunks', 'error'}"""
+    if num_days <= max(settings.PLAN_CHUNK_DAYS, 1):
+        request = core.plan_request(num_days, platform, brand_voice, content_focus, posting_frequency, topic)
+        try:
+            return {'text': stream_job_text(report, request, api_key, services=services), 'chunks': []}
+        except Exception as e:
+            return {'text': None, 'chunks': [], 'error': e}
+
+    windows = core.split_plan_windows(num_days, max(settings.PLAN_CHUNK_DAYS, 1))
+    report(done=0, total=len(windows))
+    reports = []
+    for chunk in core.iter_plan_chunks(
+        num_days, platform, brand_voice, content_focus, posting_frequency, topic, api_key, services,
+        engine=engine
+    ):
+        reports.append(chunk)
+        report(
+            done=len(reports),
+            note=(
+                f"✅ Days {chunk['start_day']}-{chunk['end_day']} ({chunk['latency']:.1f}s)" if chunk['text']
+                else f"❌ Days {chunk['start_day']}-{chunk['end_day']} failed after {chunk['attempts']} attempts"
+            )
+        )
+    reports.sort(key=lambda r: r['index'])
+
+    if all(not r['text'] for r in reports):
+        return {'text': None, 'chunks': reports}
+    return {'text': core.stitch_plan(reports), 'chunks': reports}
+
+# =========================
+# JOB RESULTS
+# =========================
+def collect(job):
+    """Show a finished plan job as the current plan"""
+    result = job['result']
+    show_job_notices(result)
+    chunk_reports = result['chunks']
+    failed = [r for r in chunk_reports if not r['text']]
+    if not result['text']:
+        if failed:
+            st.error(f"❌ Could not generate the content plan: {failed[0]['error']}")
+        return
+    if failed:
+        st.warning(
+            "⚠️ Some days could not be generated: "
+            + ", ".join(f"Days {r['start_day']}-{r['end_day']}" for r in failed)
+            + ". Generate again to retry only those days; finished days are cached."
+        )
+
+    st.session_state.current_plan = {
+        'plan': result['text'],
+        'topic': job['topic'],
+        'days': job['days'],
+        'platform': job['platform'],
+        'timestamp': datetime.fromtimestamp(job['finished']),
+        'chunks': chunk_reports
+    }
+    st.success(f"✅ {job['days']}-day content plan ready in Generate & Plan")
+
+# =========================
+# TAB 4: FULL PLAN
+# =========================
+def render():
+    """Full plan tab: multi-day content plans and saved plans"""
+    st.markdown("## 🚀 Generate Content Ideas, Daily Captions & Plans")
+    st.info("💼 Create a complete content strategy with AI-powered ideas, captions, and planning!")
+
+    # Plan Configuration
+    col1, col2 = st.columns(2)
+
+    with col1:
+        num_days = st.slider(
+            "Number of Days to Plan",
+            min_value=1,
+            max_value=30,
+            value=7,
+            step=1,
+            key=keep("plan_days")
+        )
+
+        primary_platform = st.selectbox(
+            "Primary Platform",
+            ["Instagram", "LinkedIn", "Twitter", "TikTok", "Facebook"],
+            key=keep("plan_platform")
+        )
+
+    with col2:
+        content_focus = st.multiselect(
+            "Content Focus Areas",
+            ["Educational", "Entertaining", "Promotional", "Community", "Behind-the-Scenes", "Tips & Tricks"],
+            default=["Educational", "Entertaining"],
+            key=keep("plan_focus")
+        )
+
+        posting_frequency = st.selectbox(
+            "Daily Posting Frequency",
+            ["1 post per day", "2 posts per day", "3+ posts per day"],
+            key=keep("posting_freq")
+        )
+
+    # Additional Parameters
+    plan_topic = st.text_input(
+        "Main Topic/Theme for the Week",
+        placeholder="e.g., Product Launch, Holiday Campaign, Industry Tips...",
+        key=keep("plan_topic")
+    )
+
+    brand_voice = st.selectbox(
+        "Brand Voice",
+        ["Professional", "Casual", "Humorous", "Inspirational", "Technical"],
+        key=keep("plan_voice")
+    )
+
+    if st.button("🎯 Generate Full Content Plan", use_container_width=True, key="gen_plan_btn"):
+        if st.session_state.api_key:
+            submit_job(
+                'plan',
+                generate_content_plan,
+                (
+                    num_days,
+                    primary_platform,
+                    brand_voice,
+                    list(content_focus),
+                    posting_frequency,
+                    plan_topic,
+                    st.session_state.api_key
+                ),
+                {'services': get_services(), 'engine': fanout_engine()},
+                label=f"🚀 Plan: {plan_topic or 'Untitled'} ({num_days} days, {primary_platform})",
+                tab=__name__,
+                topic=plan_topic,
+                days=num_days,
+                platform=primary_platform
+            )
+        else:
+            st.warning("⚠️ Please enter your Groq API key in the sidebar first!")
+
+    # Latest generated plan is kept in session so saving works after a rerun
+    current_plan = st.session_state.get('current_plan')
+    if current_plan:
+        st.markdown("### 📋 Your Content Plan")
+        if current_plan.get('chunks'):
+            st.caption("⏱️ " + " · ".join(
+                f"Days {c['start_day']}-{c['end_day']}: {c['latency']:.1f}s"
+                + (f" ({c['attempts']} attempts)" if c['attempts'] > 1 else "")
+                + (" ❌" if c['error'] else "")
+                for c in current_plan['chunks']
+            ))
+        st.markdown(current_plan['plan'])
+
+        if st.button("💾 Save to Content Calendar", key="save_plan_btn"):
+            st.session_state.history.add(
+                'plan',
+                current_plan['topic'],
+                current_plan['plan'],
+                platforms=[current_plan['platform']],
+                timestamp=current_plan['timestamp'],
+                days=current_plan['days']
+            )
+            st.session_state.current_plan = None
+            st.success("✅ Plan saved to Content Calendar!")
+
+        st.download_button(
+            "📥 Download Plan as Text",
+            current_plan['plan'],
+            file_name=f"content_plan_{current_plan['timestamp'].strftime('%Y%m%d_%H%M%S')}.txt",
+            mime="text/plain",
+            key="download_plan_btn"
+        )
+
+    # Display saved plans
+    if st.session_state.history.count('plan'):
+        st.markdown("---")
+        st.markdown("### 📚 Saved Content Plans")
+
+        plans, offset = history_page('plan', "plan_history", newest_first=False)
+        for idx, plan in enumerate(plans, start=offset):
+            with st.expander(
+                f"📅 Plan {idx + 1} - {plan.topic or 'Untitled'} "
+                f"({plan.meta.get('days', 'N/A')} days) - {plan.timestamp.strftime('%Y-%m-%d')}"
+            ):
+                plan_text = lazy_body(plan)
+                if plan_text is not None:
+                    st.markdown(plan_text)
+
+                col1b, col2b, col3b = st.columns(3)
+                if plan_text is not None:
+                    with col1b:
+                        st.download_button(
+                            "📥 Download",
+                            plan_text,
+                            file_name=f"content_plan_{idx}_{plan.timestamp.strftime('%Y%m%d')}.txt",
+                            key=f"download_saved_plan_{plan.entry_id}"
+                        )
+                    with col2b:
+                        # Day 1 is the day the plan was generated
+                        st.download_button(
+                            "📅 Download .ics",
+                            "".join(iter_ics([(plan, plan_text)])),
+                            file_name=f"content_plan_{idx}_{plan.timestamp.strftime('%Y%m%d')}.ics",
+                            mime="text/calendar",
+                            key=f"ics_saved_plan_{plan.entry_id}"
+                        )
+                with col3b:
+                    if st.button("🗑️ Delete", key=f"delete_plan_{plan.entry_id}"):
+                        st.session_state.history.remove(plan.entry_id)
+                        st.rerun()
@@ -0,0 +1,340 @@
+import random
+import re
+import string
+import zlib
+
+PLATFORMS = ("Instagram", "Twitter", "LinkedIn", "Facebook", "TikTok")
+
+# Slots a template may use; idea is only filled in caption lines
+SLOTS = frozenset({"topic", "brand", "audience", "industry", "adjective", "number", "emoji", "idea"})
+
+# Words and phrasing per brand tone (sidebar tones plus the plan tab's brand voices)
+TONES = {
+    'Professional': {
+        'adjectives': ["proven", "practical", "data-backed", "essential", "strategic"],
+        'openers': ["Here's what we've learned about {topic}.", "A practical look at {topic}.", "{topic}: what actually works."],
+    },
+    'Friendly': {
+        'adjectives': ["easy", "helpful", "simple", "feel-good", "handy"],
+        'openers': ["Let's talk {topic}!", "We've got you covered on {topic}.", "A little {topic} love for you today."],
+    },
+    'Casual': {
+        'adjectives': ["quick", "no-fuss", "easy", "everyday", "low-key"],
+        'openers': ["Real talk about {topic}.", "So, {topic}. Here's the deal.", "Quick one on {topic}."],
+    },
+    'Playful': {
+        'adjectives': ["fun", "surprising", "sneaky", "delightful", "unexpected"],
+        'openers': ["Plot twist: {topic} just got fun.", "Warning: {topic} content ahead {emoji}", "Who's ready for some {topic}?"],
+    },
+    'Inspirational': {
+        'adjectives': ["bold", "life-changing", "powerful", "inspiring", "transformative"],
+        'openers': ["Every big change starts small, even with {topic}.", "Dream bigger with {topic}.", "This is your sign to rethink {topic}."],
+    },
+    'Humorous': {
+        'adjectives': ["ridiculous", "weirdly effective", "hilarious", "brutally honest", "unhinged"],
+        'openers': ["Nobody asked, but here's our take on {topic}.", "{topic}: expectations vs. reality.", "We need to talk about {topic} {emoji}"],
+    },
+    'Technical': {
+        'adjectives': ["in-depth", "step-by-step", "advanced", "under-the-hood", "precise"],
+        'openers': ["A technical breakdown of {topic}.", "How {topic} works, step by step.", "The details behind {topic}."],
+    },
+}
+DEFAULT_TONE = 'Professional'
+
+# Idea angles shared by every platform; each platform adds its own
+ANGLES = [
+    "{number} {adjective} tips for getting started with {topic}",
+    "{number} mistakes people make with {topic} (and how to fix them)",
+    "Behind the scenes: how {brand} approaches {topic}",
+    "Myth vs. fact: what {audience} get wrong about {topic}",
+    "Before and after: a {adjective} {topic} transformation",
+    "A day in the life with {topic}",
+    "Answering the most common questions about {topic}",
+    "The {adjective} {topic} checklist for {audience}",
+    "What {topic} looked like when we started vs. now",
+    "Our favourite {adjective} tools for {topic}",
+    "A customer story: real results with {topic}",
+    "Trends in {topic} that {audience} should watch",
+    "One {adjective} habit that changes how you do {topic}",
+    "Unpopular opinion about {topic}",
+    "{number} signs you're ready to level up your {topic}",
+    "Lessons {brand} learned the hard way about {topic}",
+]
+
+HOOKS = [
+    "Stop scrolling if you care about {topic} {emoji}",
+    "Most {audience} get this wrong about {topic}.",
+    "Save this for later: {number} things about {topic}.",
+    "We tested it so you don't have to.",
+    "This took us years to figure out.",
+    "Here's the {adjective} shortcut nobody talks about.",
+    "Quick question: how do you handle {topic}?",
+    "The secret? It's simpler than you think.",
+]
+
+# Platform bank: formats are (content type, concept template); angles are added to the shared ones
+TEMPLATE_BANK = {
+    'Instagram': {
+        'formats': [
+            ("Carousel", "A swipeable carousel for {audience}, one {adjective} point per slide"),
+            ("Reel", "A 30-second reel with a quick cut for every step"),
+            ("Story", "A story sequence with a poll sticker so {audience} can vote"),
+            ("Image", "A single {adjective} photo with the key takeaway in the caption"),
+            ("Reel", "A tutorial reel filmed by the {brand} team"),
+            ("Carousel", "A step-by-step guide {audience} can save and come back to"),
+        ],
+        'angles': [
+            "User-generated content featuring {topic}",
+            "A {adjective} aesthetic flat lay of {topic}",
+        ],
+        'ctas': ["Save this post for later 📌", "Tag someone who needs this 👇", "Double-tap if you agree ❤️", "Tap the link in bio to learn more"],
+        'hashtags': ["#InstaDaily", "#ContentCreation", "#SocialMedia", "#Inspo", "#Explore", "#Community", "#Growth"],
+        'hashtag_count': 5,
+        'emojis': ["✨", "💫", "🌟", "📸", "💖"],
+        'times': ["9:00 AM", "11:00 AM", "1:00 PM", "5:00 PM", "7:00 PM"],
+    },
+    'Twitter': {
+        'formats': [
+            ("Thread", "A {number}-tweet thread, one {adjective} point per tweet"),
+            ("Poll", "A poll with four options and a follow-up reply with the answer"),
+            ("Tweet", "A punchy single tweet that invites replies"),
+            ("Tweet", "A one-line tip followed by a short example"),
+            ("Quote Tweet", "A quote tweet adding the {brand} take to a trending post"),
+        ],
+        'angles': [
+            "What's your biggest challenge with {topic}?",
+            "One surprising stat about {topic}",
+        ],
+        'ctas': ["Retweet if this helped 🔁", "Reply with your take 👇", "Follow for more on {topic}", "Bookmark this thread"],
+        'hashtags': ["#Growth", "#Tips", "#Thread", "#Marketing", "#Startups"],
+        'hashtag_count': 2,
+        'emojis': ["🔥", "💡", "🚀", "🧵", "👀"],
+        'times': ["8:00 AM", "12:00 PM", "3:00 PM", "5:00 PM", "9:00 PM"],
+    },
+    'LinkedIn': {
+        'formats': [
+            ("Article", "A short article with {brand}'s point of view and {number} takeaways"),
+            ("Document", "A PDF carousel with one {adjective} insight per page"),
+            ("Text", "A personal story post with a clear lesson at the end"),
+            ("Image", "An infographic summarising the key numbers"),
+            ("Video", "A 60-second expert video from the {brand} team"),
+            ("Poll", "A poll asking {audience} how they handle it today"),
+        ],
+        'angles': [
+            "Case study: how {brand} helped a client with {topic}",
+            "Future predictions for {topic} in {industry}",
+        ],
+        'ctas': ["What's your experience? Share in the comments.", "Follow {brand} for more insights.", "Repost to help your network.", "Let's connect and talk {topic}."],
+        'hashtags': ["#Leadership", "#Business", "#ContentStrategy", "#Innovation", "#CareerGrowth", "#Marketing"],
+        'hashtag_count': 3,
+        'emojis': ["💼", "📊", "🎯", "📈", "🤝"],
+        'times': ["7:30 AM", "8:00 AM", "10:00 AM", "12:00 PM", "5:00 PM"],
+    },
+    'Facebook': {
+        'formats': [
+            ("Image", "A photo post with a question to start the conversation"),
+            ("Video", "A short video with captions for sound-off viewing"),
+            ("Live", "A live Q&A where {audience} ask questions in real time"),
+            ("Event", "A community event with a {adjective} theme"),
+            ("Poll", "A group poll followed by a recap post of the results"),
+        ],
+        'angles': [
+            "Community spotlight: members sharing their {topic} wins",
+            "A {adjective} giveaway around {topic}",
+        ],
+        'ctas': ["Share this with a friend 💬", "Drop a comment below 👇", "Join our community for more.", "Hit like if you agree 👍"],
+        'hashtags': ["#Community", "#Business", "#SocialMedia", "#SmallBusiness", "#Marketing"],
+        'hashtag_count': 3,
+        'emojis': ["👥", "💬", "❤️", "🎉", "👍"],
+        'times': ["9:00 AM", "11:00 AM", "1:00 PM", "3:00 PM", "7:00 PM"],
+    },
+    'TikTok': {
+        'formats': [
+            ("Video", "A fast-paced video with a text hook in the first second"),
+            ("Video", "A remix of a trending sound with a {adjective} twist"),
+            ("Duet", "A duet reacting to a popular video in the niche"),
+            ("Video", "A POV-style video that puts {audience} in the scene"),
+            ("Video", "A get-ready-with-me video that weaves in the tips"),
+            ("Video", "A storytime video told by someone from {brand}"),
+        ],
+        'angles': [
+            "POV: you just discovered {topic}",
+            "{topic} hacks in under 30 seconds",
+        ],
+        'ctas': ["Follow for part 2 👀", "Comment 'more' for the full guide", "Stitch this with your version", "Save it so you don't forget"],
+        'hashtags': ["#FYP", "#ForYou", "#LearnOnTikTok", "#TikTokTips", "#Viral", "#HowTo"],
+        'hashtag_count': 4,
+        'emojis': ["🎵", "🔥", "✨", "😱", "👀"],
+        'times': ["7:00 AM", "12:00 PM", "4:00 PM", "7:00 PM", "10:00 PM"],
+    },
+}
+
+# Caption bodies: opener (from the tone) + idea line + a closing line
+CAPTION_LINES = [
+    "{emoji} {idea}",
+    "{idea} {emoji}",
+    "Today's focus: {idea} {emoji}",
+]
+CAPTION_CLOSERS = [
+    "What do you think? Let us know in the comments! 👇",
+    "Which tip are you trying first?",
+    "Built for {audience}, by {brand}.",
+    "More {adjective} {topic} content coming soon.",
+]
+
+CALENDAR_GOALS = ["Engage and educate audience", "Grow reach", "Drive saves and shares", "Start conversations", "Build trust"]
+
+
+class Template:
+    """A template string whose slots are checked once; render(slots) fills it"""
+
+    __slots__ = ("text", "fields", "render")
+
+    def __init__(self, text):
+        fields = {name for _, name, _, _ in string.Formatter().parse(text) if name}
+        unknown = fields - SLOTS
+        if unknown:
+            raise ValueError(f"Unknown template slots {sorted(unknown)} in {text!r}")
+        self.text = text
+        self.fields = frozenset(fields)
+        self.render = text.format_map
+
+
+def compile_bank(bank=None):
+    """Templates of every platform and tone parsed and checked, ready to render"""
+    bank = TEMPLATE_BANK if bank is None else bank
+    compiled = {}
+    for platform, spec in bank.items():
+        compiled[platform] = dict(
+            spec,
+            formats=[(content_type, Template(text)) for content_type, text in spec['formats']],
+            angles=[Template(text) for text in ANGLES + spec['angles']],
+            ctas=[Template(text) for text in spec['ctas']],
+        )
+    compiled['_shared'] = {
+        'hooks': [Template(text) for text in HOOKS],
+        'lines': [Template(text) for text in CAPTION_LINES],
+        'closers': [Template(text) for text in CAPTION_CLOSERS],
+        'openers': {tone: [Template(text) for text in spec['openers']] for tone, spec in TONES.items()},
+    }
+    return compiled
+
+
+BANK = compile_bank()
+
+
+def stable_seed(*parts):
+    """Seed derived from the inputs, so the same request gets the same variant"""
+    return zlib.crc32("\x1f".join(str(part) for part in parts).encode("utf-8"))
+
+
+def slot_values(topic, brand_info, rng, platform):
+    """Values for every slot, drawn from the tone's word list and the platform's emojis"""
+    brand_info = brand_info or {}
+    tone = TONES.get(brand_info.get('tone'), TONES[DEFAULT_TONE])
+    return {
+        'topic': topic or "your niche",
+        'brand': brand_info.get('name') or "our team",
+        'audience': brand_info.get('target_audience') or "beginners",
+        'industry': brand_info.get('industry') or "your industry",
+        'adjective': rng.choice(tone['adjectives']),
+        'number': rng.choice((3, 5, 7, 10)),
+        'emoji': rng.choice(BANK[platform]['emojis']),
+    }
+
+
+def platform_bank(platform):
+    """Compiled templates of platform; unknown platforms raise ValueError"""
+    if platform not in BANK or platform.startswith('_'):
+        raise ValueError(f"No templates for platform '{platform}'. Expected one of: {', '.join(PLATFORMS)}")
+    return BANK[platform]
+
+
+def idea_records(topic, platform, count, brand_info=None, seed=None):
+    """count distinct idea records (format x angle combinations) for one platform"""
+    bank = platform_bank(platform)
+    rng = random.Random(stable_seed(seed, 'ideas', topic, platform, (brand_info or {}).get('tone')))
+    formats, angles = bank['formats'], bank['angles']
+    count = max(int(count), 0)
+    # Distinct combinations without building the full product
+    picks = rng.sample(range(len(formats) * len(angles)), min(count, len(formats) * len(angles)))
+    records = []
+    for pick in picks:
+        content_type, concept = formats[pick // len(angles)]
+        slots = slot_values(topic, brand_info, rng, platform)
+        title = angles[pick % len(angles)].render(slots)
+        records.append({
+            'title': title[:1].upper() + title[1:],
+            'concept': concept.render(slots),
+            'content_type': content_type,
+            'hook': rng.choice(BANK['_shared']['hooks']).render(slots),
+            'platform': platform,
+        })
+    return records
+
+
+def hashtags(topic, platform, rng, brand_info=None):
+    """Topic hashtag, brand hashtag and a seeded pick of the platform's tags"""
+    bank = platform_bank(platform)
+    tags = []
+    words = re.findall(r"[A-Za-z0-9]+", str(topic or ''))[:3]
+    if words:
+        tags.append("#" + "".join(word[:1].upper() + word[1:] for word in words))
+    brand = re.findall(r"[A-Za-z0-9]+", str((brand_info or {}).get('name') or ''))
+    if brand:
+        tags.append("#" + "".join(brand))
+    tags += rng.sample(bank['hashtags'], min(bank['hashtag_count'], len(bank['hashtags'])))
+    return tags
+
+
+def caption_record(idea, platform, brand_info=None, seed=None, topic=None):
+    """Caption record (body, cta, hashtags) for one idea"""
+    bank = platform_bank(platform)
+    shared = BANK['_shared']
+    rng = random.Random(stable_seed(seed, 'caption', idea, platform, (brand_info or {}).get('tone')))
+    topic = topic or idea
+    slots = dict(slot_values(topic, brand_info, rng, platform), idea=str(idea).strip())
+    openers = shared['openers'].get((brand_info or {}).get('tone'), shared['openers'][DEFAULT_TONE])
+    lines = [rng.choice(shared['lines']).render(slots)]
+    if platform != 'Twitter':
+        # Twitter captions stay short; the rest get an opener and a closing line
+        lines.insert(0, rng.choice(openers).render(dict(slots, topic=topic)))
+        lines.append(rng.choice(shared['closers']).render(dict(slots, topic=topic)))
+    return {
+        'body': "\n\n".join(lines),
+        'cta': rng.choice(bank['ctas']).render(slots),
+        'hashtags': hashtags(topic if topic != idea else '', platform, rng, brand_info),
+    }
+
+
+def calendar_records(topic, platforms, dates, brand_info=None, seed=None):
+    """One calendar entry per platform per date, in date order
+
+    Each (platform, date) draws from its own seed, so a slot is the same
+    whatever range or platform set it is generated with. Angles step
+    through the list by date, so nearby days never repeat one.
+    """
+    offsets = {platform: stable_seed(seed, 'calendar', topic, platform) for platform in platforms}
+    records = []
+    for day in dates:
+        for platform in platforms:
+            bank = platform_bank(platform)
+            rng = random.Random(stable_seed(seed, 'calendar', topic, platform, day.isoformat()))
+            content_type, _ = rng.choice(bank['formats'])
+            slots = slot_values(topic, brand_info, rng, platform)
+            # 7 is coprime with the angle count, so consecutive dates get distinct angles
+            angles = bank['angles']
+            idea = angles[(day.toordinal() * 7 + offsets[platform]) % len(angles)].render(slots)
+            records.append({
+                'date': day.isoformat(),
+                'platform': platform,
+                'time': rng.choice(bank['times']),
+                'type': content_type,
+                'idea': idea[:1].upper() + idea[1:],
+            })
+    return records
+
+
+def calendar_goal(record):
+    """Goal line for a calendar entry, stable for the same entry"""
+    return CALENDAR_GOALS[stable_seed(record['date'], record['platform'], record['type']) % len(CALENDAR_GOALS)]
@@ -0,0 +1,249 @@
+import json
+from datetime import date
+
+import pytest
+import requests
+
+import agent_core as core
+from groq_client import GroqAPIError, GroqClient
+from mock_groq import MockGroqServer
+from rate_limiter import RateLimitScheduler, is_retryable
+from response_cache import ResponseCache
+
+
+# =========================
+# PLAN CHUNKS
+# =========================
+def test_plan_chunk_retries_transient_errors():
+    assert core.plan_chunk_retry_delay(GroqAPIError(503, "busy"), 1, 1, is_retryable) > 0
+    assert core.plan_chunk_retry_delay(requests.exceptions.ConnectionError(), 1, 1, is_retryable) > 0
+
+
+def test_plan_chunk_never_retries_auth_or_bad_requests():
+    for status in (400, 401, 403, 404):
+        assert core.plan_chunk_retry_delay(GroqAPIError(status, "no"), 1, 5, is_retryable) is None
+    assert core.plan_chunk_retry_delay(ValueError("bad"), 1, 5, is_retryable) is None
+
+
+def test_plan_chunk_gives_up_after_retries():
+    assert core.plan_chunk_retry_delay(GroqAPIError(429, "slow down"), 2, 1, is_retryable) is None
+    assert core.plan_chunk_retry_delay(GroqAPIError(429, "slow down"), 1, 0, is_retryable) is None
+
+
+def test_failed_plan_chunk_is_not_resent_on_auth_error(monkeypatch):
+    calls = []
+
+    class Scheduler:
+        retryable = staticmethod(is_retryable)
+
+    class Services:
+        scheduler = Scheduler()
+
+    def fail(**kwargs):
+        calls.append(kwargs)
+        raise GroqAPIError(401, "invalid key")
+
+    window = {'index': 0, 'start_day': 1, 'end_day': 7}
+    monkeypatch.setattr(core, "fetch_completion", fail)
+    report = core.run_plan_chunk(window, {'prompt': 'p'}, 'key', retries=3, services=Services())
+    assert len(calls) == 1
+    assert report['attempts'] == 1 and report['text'] is None and '401' in report['error']
+
+
+# =========================
+# IDEAS FAN-OUT
+# =========================
+def test_all_platforms_ideas_keep_successful_platforms(monkeypatch):
+    def fanout(topic, count, api_key, brand_info, use_cache=True, services=None):
+        yield "Instagram", "1. Insta idea", None
+        yield "Twitter", None, GroqAPIError(503, "busy")
+
+    monkeypatch.setattr(core, "iter_ideas_fanout", fanout)
+    monkeypatch.setattr(core.settings, "IDEAS_FANOUT", True)
+    text = core.generate_content_ideas("coffee", "All Platforms", 3, "key", core.DEFAULT_BRAND_INFO)
+    assert "**Instagram**\n\n1. Insta idea" in text
+    # The failed platform gets template ideas instead of aborting the whole set
+    assert "**Twitter**" in text
+
+
+def test_all_platforms_ideas_raise_when_every_platform_failed(monkeypatch):
+    def fanout(topic, count, api_key, brand_info, use_cache=True, services=None):
+        yield "Instagram", None, GroqAPIError(401, "invalid key")
+
+    monkeypatch.setattr(core, "iter_ideas_fanout", fanout)
+    monkeypatch.setattr(core.settings, "IDEAS_FANOUT", True)
+    with pytest.raises(GroqAPIError) as raised:
+        core.generate_content_ideas("coffee", "All Platforms", 3, "key", core.DEFAULT_BRAND_INFO)
+    assert raised.value.status_code == 401
+
+
+# =========================
+# STRUCTURED STREAMING
+# =========================
+def test_stream_records_falls_back_when_nothing_streams(monkeypatch):
+    # One bare idea where an {"ideas": [...]} collection was asked for
+    chunks = ['{"title": "Latte', ' art", "concept": "Three pours"}']
+    monkeypatch.setattr(core, "stream_completion", lambda **kwargs: iter(chunks))
+    records = list(core.stream_records('idea', {'prompt': 'p'}, 'key'))
+    assert [r['title'] for r in records] == ["Latte art"]
+
+
+def test_stream_records_streams_bare_arrays(monkeypatch):
+    chunks = ['[{"title": "A", "concept": "a"},', ' {"title": "B", "concept": "b"}]']
+    monkeypatch.setattr(core, "stream_completion", lambda **kwargs: iter(chunks))
+    assert [r['title'] for r in core.stream_records('idea', {'prompt': 'p'}, 'key')] == ["A", "B"]
+
+
+# =========================
+# CALENDAR WEEKS
+# =========================
+def spans(weeks):
+    return [(w['start_date'].isoformat(), w['end_date'].isoformat()) for w in weeks]
+
+
+def test_a_week_starting_any_day_is_one_window():
+    # Sat 2026-10-17 to Fri 2026-10-23
+    assert spans(core.split_calendar_weeks(date(2026, 10, 17), date(2026, 10, 23))) == [('2026-10-17', '2026-10-23')]
+    assert len(core.split_calendar_weeks(date(2026, 10, 17), date(2026, 10, 17))) == 1
+
+
+def test_longer_ranges_split_into_windows_from_the_start_date():
+    weeks = core.split_calendar_weeks(date(2026, 10, 17), date(2026, 11, 2))
+    assert spans(weeks) == [
+        ('2026-10-17', '2026-10-23'), ('2026-10-24', '2026-10-30'), ('2026-10-31', '2026-11-02')
+    ]
+    assert [w['index'] for w in weeks] == [0, 1, 2]
+
+
+# =========================
+# BULK CAPTIONS
+# =========================
+IDEAS = ["Latte art basics", "Meet our roaster", "Cold brew at home", "Cup recycling"]
+
+
+class CaptionStub:
+    """Stand-in for fetch_completion: batches answer through batch(ideas), single captions always succeed"""
+
+    def __init__(self, batch=None, fail_single=()):
+        self.batch = batch or (lambda ideas: {'captions': [
+            {'idea': str(number), 'body': f"About {idea}"} for number, idea in enumerate(ideas, start=1)
+        ]})
+        self.fail_single = fail_single
+        self.batches = []
+        self.singles = []
+
+    def __call__(self, prompt, **kwargs):
+        platform = prompt.split()[3]
+        if "for each of these" in prompt:
+            ideas = [line.split('. ', 1)[1] for line in prompt.splitlines() if line[:1].isdigit()]
+            self.batches.append((platform, ideas))
+            response = self.batch(ideas)
+            if isinstance(response, Exception):
+                raise response
+            return response if isinstance(response, str) else json.dumps(response)
+        idea = prompt.split('\n\n')[1]
+        self.singles.append((platform, idea))
+        if idea in self.fail_single:
+            raise GroqAPIError(503, "busy")
+        return json.dumps({'body': f"Single {idea}", 'cta': 'Visit us', 'hashtags': ['#coffee']})
+
+
+def bulk_rows(monkeypatch, stub, platforms=("Instagram",), batch_size=3):
+    monkeypatch.setattr(core, "fetch_completion", stub)
+    rows = core.iter_bulk_captions(IDEAS, list(platforms), "key", core.DEFAULT_BRAND_INFO, batch_size=batch_size)
+    return {(row['idea_number'], row['platform']): row for row in rows}
+
+
+def test_bulk_captions_share_one_request_per_batch_and_platform(monkeypatch):
+    stub = CaptionStub()
+    rows = bulk_rows(monkeypatch, stub, platforms=("Instagram", "Twitter"))
+    assert sorted(stub.batches) == [("Instagram", IDEAS[:3]), ("Twitter", IDEAS[:3])]
+    # The idea left over after full batches is captioned alone
+    assert sorted(stub.singles) == [("Instagram", IDEAS[3]), ("Twitter", IDEAS[3])]
+    assert len(rows) == 8
+    assert rows[(3, "Twitter")]['caption'] == "About Cold brew at home"
+    assert rows[(4, "Instagram")]['caption'] == "Single Cup recycling"
+
+
+def test_batch_size_one_sends_a_request_per_caption(monkeypatch):
+    stub = CaptionStub()
+    rows = bulk_rows(monkeypatch, stub, batch_size=1)
+    assert stub.batches == [] and sorted(stub.singles) == sorted(("Instagram", idea) for idea in IDEAS)
+    assert rows[(1, "Instagram")]['hashtags'] == "#coffee"
+
+
+def test_malformed_or_failed_batches_fall_back_to_single_captions(monkeypatch):
+    for response in ("Sorry, here are some captions!", GroqAPIError(503, "busy")):
+        stub = CaptionStub(batch=lambda ideas, response=response: response)
+        rows = bulk_rows(monkeypatch, stub, batch_size=2)
+        assert len(stub.batches) == 2
+        assert sorted(idea for _, idea in stub.singles) == sorted(IDEAS)
+        assert [rows[(n, "Instagram")]['caption'] for n in (1, 2, 3, 4)] == [f"Single {idea}" for idea in IDEAS]
+        assert not any(row['error'] for row in rows.values())
+
+
+def test_captions_missing_from_a_batch_are_requested_alone(monkeypatch):
+    # Idea 2 is left out, idea 7 does not exist and idea 3 comes back twice
+    stub = CaptionStub(batch=lambda ideas: {'captions': [
+        {'idea': '1', 'body': f"About {ideas[0]}"},
+        {'idea': '7', 'body': "Unknown idea"},
+        {'idea': '3', 'body': f"About {ideas[-1]}"},
+        {'idea': '3', 'body': "Repeat"},
+    ]})
+    rows = bulk_rows(monkeypatch, stub)
+    assert sorted(idea for _, idea in stub.singles) == ["Cup recycling", "Meet our roaster"]
+    assert rows[(2, "Instagram")]['caption'] == "Single Meet our roaster"
+    assert rows[(3, "Instagram")]['caption'] == "About Cold brew at home"
+    assert len(rows) == 4
+
+
+def test_a_failed_single_caption_becomes_an_error_row(monkeypatch):
+    stub = CaptionStub(batch=lambda ideas: GroqAPIError(500, "down"), fail_single=("Meet our roaster",))
+    rows = bulk_rows(monkeypatch, stub)
+    assert rows[(2, "Instagram")]['error'] == "GroqAPIError: " + str(GroqAPIError(503, "busy"))
+    assert rows[(2, "Instagram")]['caption'] == ''
+    assert rows[(1, "Instagram")]['caption'] == "Single Latte art basics"
+
+
+# =========================
+# CAPTION PREFETCH
+# =========================
+def prefetch_services(server, requests_per_minute=1000):
+    return core.Services(
+        client=GroqClient(api_url=server.url),
+        cache=ResponseCache(),
+        scheduler=RateLimitScheduler(requests_per_minute=requests_per_minute, tokens_per_minute=10_000_000),
+    )
+
+
+def test_prefetched_caption_answers_the_later_caption_request():
+    with MockGroqServer(latency=0, tokens_per_second=0) as server:
+        services = prefetch_services(server)
+        targets = [("Latte art basics", "Instagram"), ("Meet our roaster", "Twitter")]
+        outcome = core.prefetch_captions(targets, "gsk_test", core.DEFAULT_BRAND_INFO, services=services)
+        assert outcome == {'warmed': 2, 'cached': 0, 'skipped': 0, 'failed': 0}
+
+        text = core.generate_caption("Meet our roaster", "Twitter", "gsk_test", core.DEFAULT_BRAND_INFO, services=services)
+        assert text and server.stats()["requests"] == 2
+        assert services.metrics.records("caption")[-1]["cache_hit"]
+        # Captions already in the cache are not prefetched again
+        again = core.prefetch_captions(targets, "gsk_test", core.DEFAULT_BRAND_INFO, services=services)
+        assert again['cached'] == 2 and server.stats()["requests"] == 2
+
+
+def test_prefetch_skips_the_rest_when_headroom_stays_below_the_reserve(monkeypatch):
+    monkeypatch.setattr(core, "PREFETCH_POLL_SECONDS", 0.01)
+    with MockGroqServer(latency=0, tokens_per_second=0) as server:
+        # Two requests a minute: after one call only half the budget is left, which is the reserve
+        services = prefetch_services(server, requests_per_minute=2)
+        targets = [(f"Idea {n}", "Instagram") for n in range(4)]
+        outcome = core.prefetch_captions(
+            targets, "gsk_test", core.DEFAULT_BRAND_INFO, services=services, reserve=0.5, max_wait=0.05
+        )
+        assert outcome == {'warmed': 1, 'cached': 0, 'skipped': 3, 'failed': 0}
+        assert server.stats()["requests"] == 1
+
+        outcome = core.prefetch_captions(
+            targets[1:], "gsk_test", core.DEFAULT_BRAND_INFO, services=services, reserve=1.0, max_wait=0
+        )
+        assert outcome['skipped'] == 3 and server.stats()["requests"] == 1
@@ -0,0 +1,105 @@
+import threading
+
+import httpx
+import pytest
+
+import agent_core as core
+from async_engine import AsyncEngine, is_retryable
+from groq_client import GroqAPIError
+from mock_groq import MockGroqServer
+from model_router import ModelRouter
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def engine_for():
+    """engine_for(server, **router_kwargs) builds an engine on fresh services; closed after the test"""
+    engines = []
+
+    def build(server, routes=None, max_retries=4):
+        services = core.Services(
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(
+                requests_per_minute=1000, tokens_per_minute=10_000_000,
+                max_retries=max_retries, base_delay=0.01, max_delay=0.05
+            ),
+            router=ModelRouter(routes=routes or {"ideas": ["fast", "big"], "other": ["big"]}),
+        )
+        engine = AsyncEngine(services, api_url=server.url, max_concurrency=4)
+        engines.append(engine)
+        return engine
+
+    yield build
+    for engine in engines:
+        engine.close()
+
+
+def test_transport_errors_are_retryable():
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(GroqAPIError(429, "slow down"))
+    assert not is_retryable(GroqAPIError(401, "invalid key"))
+
+
+def test_complete_caches_the_answer(engine_for):
+    with MockGroqServer(latency=0, tokens_per_second=0) as server:
+        engine = engine_for(server)
+        text = engine.complete("Ideas", "gsk_test", generator="ideas")
+        assert text and engine.complete("Ideas", "gsk_test", generator="ideas") == text
+        assert server.stats()["requests"] == 1
+        assert engine.services.metrics.records()[-1]["cache_hit"]
+
+
+def test_gather_runs_every_request(engine_for):
+    with MockGroqServer(latency=0.05, tokens_per_second=0) as server:
+        engine = engine_for(server)
+        prompts = [f"Ideas {i}" for i in range(6)]
+        results = engine.gather(prompts + [{"prompt": "Caption", "temperature": 0.2}], "gsk_test")
+        assert len(results) == 7 and all(isinstance(r, str) and r for r in results)
+        assert server.stats()["requests"] == 7
+
+
+def test_rate_limited_requests_are_retried(engine_for):
+    with MockGroqServer(latency=0, tokens_per_second=0, rate_429=0.5, retry_after=0.01, seed=3) as server:
+        engine = engine_for(server, max_retries=10)
+        results = engine.gather([f"Ideas {i}" for i in range(8)], "gsk_test")
+        assert all(isinstance(r, str) for r in results)
+        stats = server.stats()
+        assert stats["status_429"] > 0
+        assert engine.services.scheduler.stats()["retries"] == stats["status_429"]
+
+
+def test_retries_stop_at_max_retries(engine_for):
+    with MockGroqServer(latency=0, tokens_per_second=0, rate_429=1.0, retry_after=0.01) as server:
+        engine = engine_for(server, max_retries=2)
+        with pytest.raises(GroqAPIError):
+            engine.complete("Ideas", "gsk_test")
+        # The first try plus max_retries retries
+        assert server.stats()["requests"] == 3
+        assert engine.services.scheduler.stats()["failures"] == 1
+
+
+def test_failing_model_falls_back(engine_for):
+    with MockGroqServer(latency=0, tokens_per_second=0, failing_models={"fast"}) as server:
+        engine = engine_for(server, max_retries=0)
+        assert engine.complete("Ideas", "gsk_test", generator="ideas")
+        assert server.stats()["models"] == {"fast": 1, "big": 1}
+        rows = {row["model"]: row for row in engine.services.router.stats()}
+        assert rows["fast"]["fallbacks"] == 1 and rows["big"]["calls"] == 1
+
+
+def test_submit_from_many_threads(engine_for):
+    with MockGroqServer(latency=0.02, tokens_per_second=0) as server:
+        engine = engine_for(server)
+        results = {}
+
+        def worker(n):
+            results[n] = engine.submit(f"Ideas {n}", "gsk_test").result(timeout=10)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results) == list(range(5)) and all(results.values())
+        assert server.stats()["requests"] == 5
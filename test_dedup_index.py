@@ -0,0 +1,122 @@
+import agent_core as core
+from dedup_index import MinHashLSH, normalize_words, shingles
+from history_store import HistoryStore, SQLiteHistoryStore
+
+
+# =========================
+# SHINGLES
+# =========================
+def test_normalize_drops_stopwords_and_folds_plurals():
+    assert normalize_words("The 5 tips for your Bottles") == ['5', 'tip', 'bottle']
+    assert normalize_words("glass") == ['glass']
+
+
+def test_shingles_include_words_and_pairs():
+    assert len(shingles("cold brew coffee")) == 5
+    assert shingles("the and of").size == 0
+
+
+# =========================
+# INDEX
+# =========================
+def test_similar_texts_match_above_threshold():
+    index = MinHashLSH(threshold=0.5)
+    index.add("5 easy tips for brewing cold brew coffee at home", topic="coffee")
+    index.add("Behind the scenes at our roastery", topic="roastery")
+    matches = index.query("5 easy tips for brewing cold brew at home")
+    assert len(matches) == 1
+    similarity, info = matches[0]
+    assert similarity >= 0.5 and info['topic'] == 'coffee'
+    assert index.query("Unboxing our new reusable water bottle") == []
+
+
+def test_threshold_decides_what_counts_as_duplicate():
+    index = MinHashLSH(threshold=0.9)
+    index.add("5 easy tips for brewing cold brew coffee at home")
+    assert index.query("5 easy tips for brewing cold brew at home") == []
+    assert index.query("5 easy tips for brewing cold brew at home", threshold=0.5)
+    assert index.query("5 easy tips for brewing cold brew coffee at home")[0][0] == 1.0
+
+
+def test_check_compares_with_earlier_items_of_the_list():
+    index = MinHashLSH()
+    texts = ["Cold brew recipes for summer", "Meet the team", "Cold brew recipes for the summer"]
+    matches = index.check(texts)
+    assert matches[0] is None and matches[1] is None
+    assert matches[2][1] == {'number': 1, 'text': texts[0]}
+
+
+def test_remove_and_clear_forget_items():
+    index = MinHashLSH()
+    index.add("Cold brew recipes for summer", group="a")
+    index.add("Cold brew recipes for summer nights", group="b")
+    index.remove("a")
+    assert len(index) == 1
+    assert [info['group'] for _, info in index.query("Cold brew recipes for summer")] == ['b']
+    index.clear()
+    assert len(index) == 0 and index.query("Cold brew recipes for summer") == []
+
+
+def test_index_grows_past_initial_capacity():
+    index = MinHashLSH()
+    for i in range(200):
+        index.add(f"idea number {i} about topic {i * 7}")
+    assert len(index) == 200
+    assert index.query("idea number 150 about topic 1050")[0][1]['text'] == "idea number 150 about topic 1050"
+
+
+def test_history_ideas_are_indexed_per_entry():
+    history = HistoryStore()
+    entry = history.add('ideas', 'coffee', "1. Cold brew recipes for summer\n2. Meet our baristas")
+    history.add('caption', 'coffee', "Cold brew recipes for summer")
+    index = core.sync_history_index(MinHashLSH(), history)
+    assert len(index) == 2
+    match = index.query("Cold brew recipes for the summer")[0][1]
+    assert (match['group'], match['kind'], match['number']) == (entry.entry_id, 'ideas', 1)
+
+
+def test_evicted_history_entries_are_no_longer_flagged():
+    history = HistoryStore(max_entries=2)
+    index = MinHashLSH()
+    first = history.add('ideas', 'coffee', "1. Cold brew recipes for summer")
+    core.sync_history_index(index, history)
+    assert index.query("Cold brew recipes for summer")
+    history.add('ideas', 'tea', "1. Matcha latte art")
+    history.add('ideas', 'tea', "1. Iced chai for hot days")
+    core.sync_history_index(index, history)
+    assert first.entry_id not in index.groups()
+    assert index.query("Cold brew recipes for summer") == []
+    assert index.query("Iced chai for hot days")
+
+
+def test_sync_forgets_removed_entries_and_indexes_new_ones_once():
+    history = HistoryStore()
+    index = MinHashLSH()
+    entry = history.add('ideas', 'coffee', "1. Cold brew recipes for summer\n2. Meet our baristas")
+    core.sync_history_index(index, history)
+    history.add('calendar', 'tea', "1. Matcha latte art")
+    core.sync_history_index(index, history)
+    core.sync_history_index(index, history)
+    assert len(index) == 3
+    history.remove(entry.entry_id)
+    core.sync_history_index(index, history)
+    assert len(index) == 1 and index.query("Meet our baristas") == []
+
+
+def test_shared_sqlite_index_follows_other_writers(tmp_path):
+    path = str(tmp_path / "history.db")
+    ours, theirs = SQLiteHistoryStore(path, max_entries=1), SQLiteHistoryStore(path, max_entries=1)
+    index = MinHashLSH()
+    ours.add('ideas', 'coffee', "1. Cold brew recipes for summer")
+    core.sync_history_index(index, ours)
+    theirs.add('ideas', 'tea', "1. Iced chai for hot days")
+    core.sync_history_index(index, ours)
+    assert index.query("Cold brew recipes for summer") == []
+    assert index.query("Iced chai for hot days")
+    # Unchanged history costs one id query, no row or body reads
+    statements = []
+    ours._db.set_trace_callback(statements.append)
+    core.sync_history_index(index, ours)
+    assert all(statement.startswith("SELECT entry_id FROM history") for statement in statements)
+    ours.close()
+    theirs.close()
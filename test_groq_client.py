@@ -0,0 +1,100 @@
+import json
+
+import pytest
+import requests
+
+import agent_core as core
+from groq_client import GroqAPIError, GroqClient, iter_sse_tokens
+from mock_groq import MockGroqServer
+
+
+class ChunkedRaw:
+    """Raw body that hands requests its bytes in fixed-size pieces, splitting lines anywhere"""
+
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    def stream(self, chunk_size, decode_content=True):
+        for i in range(0, len(self.data), self.size):
+            yield self.data[i:i + self.size]
+
+    def close(self):
+        pass
+
+
+def sse_response(*events, size=7):
+    body = "".join(f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n" for event in events)
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = ChunkedRaw(body.encode("utf-8"), size)
+    return response
+
+
+def delta(content, finish_reason=None):
+    return {"choices": [{"index": 0, "delta": {"content": content}, "finish_reason": finish_reason}]}
+
+
+# =========================
+# SSE PARSING
+# =========================
+def test_tokens_survive_lines_split_across_chunks():
+    response = sse_response(delta("Cold "), delta("brew ☕"), delta(""), "[DONE]", size=3)
+    assert list(iter_sse_tokens(response)) == ["Cold ", "brew ☕"]
+
+
+def test_parsing_stops_at_done():
+    response = sse_response(delta("a"), "[DONE]", delta("never"))
+    assert list(iter_sse_tokens(response)) == ["a"]
+
+
+def test_comments_and_other_fields_are_skipped():
+    response = requests.Response()
+    response.raw = ChunkedRaw(b": keep-alive\n\nevent: message\ndata: " + json.dumps(delta("a")).encode() + b"\n\n", 5)
+    assert list(iter_sse_tokens(response)) == ["a"]
+
+
+def test_usage_and_finish_reason_are_collected():
+    final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "length"}],
+             "x_groq": {"usage": {"prompt_tokens": 12, "completion_tokens": 2}}}
+    usage = {}
+    assert list(iter_sse_tokens(sse_response(delta("a"), delta("b"), final, "[DONE]"), usage)) == ["a", "b"]
+    assert usage == {"prompt_tokens": 12, "completion_tokens": 2, "finish_reason": "length"}
+
+
+def test_error_event_raises():
+    response = sse_response(delta("a"), {"error": {"message": "overloaded", "type": "internal_server_error"}})
+    tokens = iter_sse_tokens(response)
+    assert next(tokens) == "a"
+    with pytest.raises(GroqAPIError, match="overloaded"):
+        next(tokens)
+
+
+# =========================
+# STREAMING AGAINST THE MOCK
+# =========================
+def test_stream_from_mock_server_reports_truncation():
+    with MockGroqServer(latency=0, tokens_per_second=0, completion_tokens=30) as server:
+        client = GroqClient(api_url=server.url)
+        headers, payload = core.build_groq_request("Ideas", "gsk_test", 10, 0.7, stream=True)
+        usage = {}
+        with client.send(headers, payload, stream=True) as response:
+            tokens = list(iter_sse_tokens(response, usage))
+        assert len(tokens) == 10
+        assert usage["finish_reason"] == "length" and usage["completion_tokens"] == 10
+        assert server.stats()["streamed"] == 1
+        client.close()
+
+
+def test_stream_cut_by_an_error_event_is_not_cached(monkeypatch):
+    services = core.Services(client=GroqClient(api_url="http://127.0.0.1:9"))
+    monkeypatch.setattr(services.router, "models", lambda generator: ["only"])
+    monkeypatch.setattr(
+        services.client, "send",
+        lambda headers, payload, stream=False: sse_response(delta("Cold "), {"error": {"message": "overloaded"}})
+    )
+    tokens = core.stream_completion("Ideas", "gsk_test", services=services, generator="ideas")
+    assert next(tokens) == "Cold "
+    with pytest.raises(GroqAPIError):
+        next(tokens)
+    assert services.cache.stats()["size"] == 0
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import date, datetime
+
+import pytest
+
+from history_export import (
+    export_history,
+    ics_escape,
+    ics_line,
+    iter_format,
+    parse_time,
+    slot_date,
+    sweep_exports,
+)
+from history_store import HistoryStore
+from structured_output import records_to_text
+from template_engine import calendar_records
+
+
+def sample_history():
+    history = HistoryStore()
+    history.add('ideas', 'cold brew', "1. Iced, not watered down", platforms=['TikTok'], timestamp=datetime(2026, 3, 1, 9))
+    start, end = date(2026, 3, 2), date(2026, 3, 3)
+    records = calendar_records('cold brew', ['Instagram'], [start, end])
+    history.add(
+        'calendar', 'cold brew', records_to_text('calendar_entry', records), platforms=['Instagram'],
+        timestamp=datetime(2026, 3, 1, 10), start_date=start, end_date=end, records=records
+    )
+    history.add('plan', 'launch', "Day 1: Teaser\nPost a countdown\nDay 2: Reveal", platforms=['Instagram'],
+                timestamp=datetime(2026, 3, 5), days=2)
+    return history
+
+
+def text_of(fmt, history, **kwargs):
+    return ''.join(iter_format(fmt, history, **kwargs))
+
+
+# =========================
+# CSV / JSONL
+# =========================
+def test_csv_has_one_row_per_entry_and_caption():
+    captions = [{'idea': 'Iced', 'platform': 'TikTok', 'caption': 'Cold, "brewed", done'}]
+    rows = list(csv.DictReader(io.StringIO(text_of('csv', sample_history(), captions=captions))))
+    # Bulk captions follow the stored entries
+    assert [row['kind'] for row in rows] == ['ideas', 'calendar', 'plan', 'caption']
+    assert rows[3]['text'] == 'Cold, "brewed", done'
+    assert rows[1]['start_date'] == '2026-03-02' and rows[1]['platforms'] == 'Instagram'
+
+
+def test_jsonl_keeps_records_and_filters_kinds():
+    lines = text_of('jsonl', sample_history(), kinds=('calendar',)).splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['kind'] == 'calendar' and len(record['records']) == 2
+
+
+# =========================
+# ICALENDAR
+# =========================
+def test_parse_time_and_slot_date():
+    assert parse_time("Post at 7:30 PM") == (19, 30)
+    assert parse_time("12 am") == (0, 0)
+    assert parse_time("14:05") == (14, 5)
+    assert parse_time("no time here") is None
+    dates = [date(2026, 3, 2), date(2026, 3, 3)]
+    assert slot_date("**Day 2:** Reveal", dates) == date(2026, 3, 3)
+    assert slot_date("Monday | Instagram", dates) == date(2026, 3, 2)
+    assert slot_date("2026-03-09 | TikTok", dates) == date(2026, 3, 9)
+    assert slot_date("Idea: nothing", dates) is None
+
+
+def test_ics_lines_are_folded_and_escaped():
+    assert ics_escape("a,b;c\\d\ne") == r"a\,b\;c\\d\ne"
+    line = ics_line('DESCRIPTION', "☕" * 60)
+    parts = line[:-2].split('\r\n')
+    assert all(len(part.encode('utf-8')) <= 75 for part in parts)
+    assert ''.join(part[1:] if i else part for i, part in enumerate(parts)) == "DESCRIPTION:" + "☕" * 60
+
+
+def test_ics_has_events_for_calendars_and_plans():
+    text = text_of('ics', sample_history())
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert text.count("BEGIN:VEVENT") == 4
+    assert "DTSTART;VALUE=DATE:20260305" in text and "DTSTART;VALUE=DATE:20260306" in text
+
+
+# =========================
+# EXPORT FILES
+# =========================
+def test_single_format_export(tmp_path):
+    export = export_history(sample_history(), ['jsonl'], directory=str(tmp_path))
+    assert export['file_name'] == 'content_history.jsonl' and export['mime'] == 'application/jsonl'
+    with open(export['path'], encoding='utf-8') as f:
+        assert len(f.readlines()) == 3
+    assert export['size'] == os.path.getsize(export['path'])
+
+
+def test_several_formats_are_zipped(tmp_path):
+    export = export_history(sample_history(), ['csv', 'ics'], directory=str(tmp_path))
+    assert export['file_name'] == 'content_history.zip'
+    with zipfile.ZipFile(export['path']) as archive:
+        assert sorted(archive.namelist()) == ['content_history.csv', 'content_history.ics']
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    with pytest.raises(ValueError):
+        export_history(sample_history(), ['csv', 'pdf'], directory=str(tmp_path))
+
+    class Broken(HistoryStore):
+        def body(self, entry):
+            raise OSError("spill file missing")
+
+    history = Broken()
+    history.add('ideas', 'cold brew', 'x')
+    with pytest.raises(OSError):
+        export_history(history, ['csv'], directory=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_sweep_deletes_only_stale_exports(tmp_path):
+    stale = export_history(sample_history(), ['csv'], directory=str(tmp_path))
+    fresh = export_history(sample_history(), ['csv'], directory=str(tmp_path))
+    other = tmp_path / "notes.txt"
+    other.write_text("keep")
+    old = os.path.getmtime(fresh['path']) - 7200
+    os.utime(stale['path'], (old, old))
+    os.utime(other, (old, old))
+
+    assert sweep_exports(str(tmp_path), max_age=3600) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(fresh['path']), 'notes.txt'])
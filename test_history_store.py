@@ -0,0 +1,178 @@
+import os
+from datetime import date, datetime
+
+from history_store import HistoryStore, SQLiteHistoryStore, paginate, summarize
+
+
+# =========================
+# MEMORY STORE
+# =========================
+def test_summarize_uses_first_non_empty_line():
+    assert summarize("\n\n**Launch week**\nmore") == "Launch week"
+    assert summarize("x" * 50, max_chars=10) == "x" * 9 + "…"
+
+
+def test_paginate_clamps_page():
+    items, page, page_count = paginate(list(range(25)), 9, 10)
+    assert (items, page, page_count) == (list(range(20, 25)), 3, 3)
+    assert paginate([], 1, 10) == ([], 1, 1)
+
+
+def test_oldest_entries_are_evicted():
+    store = HistoryStore(max_entries=2)
+    first = store.add('ideas', 'one', 'body one')
+    store.add('ideas', 'two', 'body two')
+    store.add('plan', 'three', 'body three')
+    assert store.get(first.entry_id) is None
+    assert store.count() == 2 and store.count('ideas') == 1
+    assert store.counts() == {'ideas': 1, 'plan': 1}
+    assert [e.topic for e in store.entries()] == ['three', 'two']
+
+
+def test_large_bodies_are_compressed_and_spilled(tmp_path):
+    store = HistoryStore(compress_threshold=100, spill_dir=str(tmp_path))
+    body = "Day 1: launch\n" * 200
+    entry = store.add('plan', 'launch', body)
+    assert entry._body is None and os.path.exists(entry._spill_path)
+    assert store.body(entry) == body
+    store.remove(entry.entry_id)
+    assert not os.listdir(tmp_path)
+
+
+def test_platforms_follow_removals():
+    store = HistoryStore()
+    entry = store.add('ideas', 'a', 'x', platforms=['Instagram', 'TikTok'])
+    store.add('ideas', 'b', 'y', platforms=['Instagram'])
+    assert store.platforms('ideas') == ['Instagram', 'TikTok']
+    store.remove(entry.entry_id)
+    assert store.platforms('ideas') == ['Instagram']
+    store.clear()
+    assert store.count() == 0 and store.platforms() == []
+
+
+def test_page_returns_total():
+    store = HistoryStore()
+    for i in range(12):
+        store.add('ideas', f"topic {i}", 'body', timestamp=datetime(2026, 1, 1 + i))
+    items, total = store.page('ideas', page=2, page_size=5)
+    assert total == 12
+    assert [e.topic for e in items] == [f"topic {i}" for i in range(6, 1, -1)]
+    assert store.search('ideas', since=date(2026, 1, 3), until=date(2026, 1, 4), newest_first=False)[0].topic == 'topic 2'
+
+
+# =========================
+# SEARCH INDEX
+# =========================
+def search_store():
+    store = HistoryStore()
+    store.add('ideas', 'Coffee launch', 'a', platforms=['Instagram'], timestamp=datetime(2026, 3, 1, 9))
+    store.add('ideas', 'Cold brew recipes', 'b', platforms=['TikTok'], timestamp=datetime(2026, 3, 2, 23, 59))
+    store.add('calendar', 'Coffee week', 'c', platforms=['Instagram', 'TikTok'], timestamp=datetime(2026, 3, 3))
+    # Saved later with an earlier timestamp, as saved plans are
+    store.add('ideas', 'Coconut coffee', 'd', platforms=['Instagram'], timestamp=datetime(2026, 2, 28))
+    return store
+
+
+def topics(entries):
+    return [e.topic for e in entries]
+
+
+def test_prefix_search_matches_every_word():
+    store = search_store()
+    assert topics(store.search('ideas', 'co', newest_first=False)) == ['Coffee launch', 'Cold brew recipes', 'Coconut coffee']
+    assert topics(store.search('ideas', 'coff la')) == ['Coffee launch']
+    assert topics(store.search(None, 'coffee')) == ['Coconut coffee', 'Coffee week', 'Coffee launch']
+    assert store.search('ideas', 'tea') == []
+
+
+def test_platform_and_date_filters_use_indexes():
+    store = search_store()
+    assert topics(store.search('ideas', platform='Instagram')) == ['Coconut coffee', 'Coffee launch']
+    assert topics(store.search('ideas', since=date(2026, 3, 2), until=date(2026, 3, 2))) == ['Cold brew recipes']
+    assert topics(store.search(None, until=date(2026, 2, 28))) == ['Coconut coffee']
+    assert topics(store.search('ideas', 'co', platform='TikTok', since=date(2026, 3, 1))) == ['Cold brew recipes']
+
+
+def test_indexes_drop_removed_entries():
+    store = search_store()
+    for entry in store.search(None, 'coffee'):
+        store.remove(entry.entry_id)
+    assert store._term_list == ['brew', 'cold', 'recipes']
+    assert store.search(None, platform='Instagram') == []
+    assert len(store._by_time) == 1
+    store.add('plan', 'coffee again', 'e', platforms=['Instagram'])
+    assert topics(store.search(None, 'coffee', platform='Instagram')) == ['coffee again']
+
+
+# =========================
+# SQLITE STORE
+# =========================
+def test_sqlite_entries_are_committed_as_added(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = SQLiteHistoryStore(path, compress_threshold=16)
+    entry = store.add('ideas', 'Coffee launch', 'x' * 100, platforms=['Instagram'], day=date(2026, 3, 1))
+    assert store.count('ideas') == 1
+    assert store.body(store.get(entry.entry_id)) == 'x' * 100
+
+    # Another connection sees the row without any flush or close
+    other = SQLiteHistoryStore(path)
+    reopened = other.get(entry.entry_id)
+    assert reopened.platforms == ('Instagram',) and reopened.meta == {'day': date(2026, 3, 1)}
+    store.close()
+    other.close()
+
+
+def test_sqlite_search_page_and_platforms(tmp_path):
+    store = SQLiteHistoryStore(str(tmp_path / "history.db"))
+    store.add('ideas', 'Coffee launch', 'a', platforms=['Instagram'], timestamp=datetime(2026, 3, 1, 9))
+    store.add('ideas', 'Cold brew recipes', 'b', platforms=['TikTok'], timestamp=datetime(2026, 3, 2, 23, 59))
+    store.add('calendar', 'Coffee week', 'c', platforms=['Instagram', 'TikTok'], timestamp=datetime(2026, 3, 3))
+    assert topics(store.search('ideas', 'co', newest_first=False)) == ['Coffee launch', 'Cold brew recipes']
+    assert topics(store.search(None, 'coffee', platform='TikTok')) == ['Coffee week']
+    assert topics(store.search('ideas', since=date(2026, 3, 2), until=date(2026, 3, 2))) == ['Cold brew recipes']
+    assert store.platforms('ideas') == ['Instagram', 'TikTok']
+    items, total = store.page(None, page=2, page_size=2)
+    assert total == 3 and topics(items) == ['Coffee launch']
+
+
+def test_sqlite_stats_and_pages_run_on_indexes(tmp_path):
+    store = SQLiteHistoryStore(str(tmp_path / "history.db"))
+    for i in range(30):
+        store.add('ideas' if i % 3 else 'plan', f"topic {i}", 'body', platforms=['Instagram'])
+    statements = []
+    store._db.set_trace_callback(statements.append)
+    assert store.counts() == {'ideas': 20, 'plan': 10}
+    items, total = store.page('ideas', page=2, page_size=5)
+    assert total == 20 and topics(items) == ['topic 22', 'topic 20', 'topic 19', 'topic 17', 'topic 16']
+    store._db.set_trace_callback(None)
+
+    # What the Quick Stats and history pages run never scans the table or sorts in a temp tree
+    for statement in statements:
+        plan = ' '.join(row[-1] for row in store._db.execute("EXPLAIN QUERY PLAN " + statement))
+        assert 'INDEX' in plan and 'SCAN history' not in plan and 'TEMP B-TREE' not in plan, plan
+    store.close()
+
+
+def test_sqlite_evicts_oldest_beyond_max_entries(tmp_path):
+    store = SQLiteHistoryStore(str(tmp_path / "history.db"), max_entries=3)
+    for i in range(5):
+        store.add('ideas', f"topic {i}", 'body')
+    assert topics(store.entries()) == ['topic 4', 'topic 3', 'topic 2']
+    assert store.count() == 3 and store.search(None, '0') == []
+    store.add('plan', 'topic 5', 'body')
+    assert store.counts() == {'ideas': 2, 'plan': 1}
+
+
+def test_sqlite_namespaces_are_isolated(tmp_path):
+    path = str(tmp_path / "history.db")
+    team_a = SQLiteHistoryStore(path, namespace='a')
+    team_b = SQLiteHistoryStore(path, namespace='b')
+    entry = team_a.add('ideas', 'Coffee launch', 'a')
+    team_b.add('ideas', 'Coffee week', 'b')
+    assert topics(team_b.entries()) == ['Coffee week']
+    assert team_b.get(entry.entry_id) is None
+
+    team_b.remove(entry.entry_id)
+    team_b.clear()
+    assert team_b.count() == 0
+    assert topics(team_a.entries()) == ['Coffee launch']
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+import settings
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue():
+    jobs = JobQueue(workers=1)
+    yield jobs
+    jobs.shutdown()
+
+
+def wait_for(queue, job_id, status, timeout=5.0):
+    """Poll a job until it reaches status and return its snapshot"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job and job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} never became {status}: {queue.get(job_id)}")
+
+
+def blocker():
+    """Job function that runs until its event is set; returns (fn, started, release)"""
+    started, release = threading.Event(), threading.Event()
+
+    def fn(report):
+        started.set()
+        release.wait(5)
+        return "unblocked"
+    return fn, started, release
+
+
+# =========================
+# LIFECYCLE
+# =========================
+def test_job_reports_progress_and_finishes(queue):
+    step, finish = threading.Event(), threading.Event()
+
+    def fn(report, topic, count=1):
+        report(text="1. Cold brew", done=1, total=count)
+        step.set()
+        finish.wait(5)
+        return f"{count} ideas about {topic}"
+
+    job_id = queue.submit("ideas", fn, args=("coffee",), kwargs={"count": 2}, owner="a", topic="coffee")
+    assert step.wait(5)
+    running = wait_for(queue, job_id, "running")
+    assert running["progress"] == {"text": "1. Cold brew", "done": 1, "total": 2}
+    assert running["topic"] == "coffee" and running["label"] == "ideas"
+
+    finish.set()
+    done = wait_for(queue, job_id, "done")
+    assert done["result"] == "2 ideas about coffee" and done["error"] is None
+    assert done["started"] <= done["finished"]
+
+
+def test_errors_are_stored_on_the_job(queue):
+    def fn(report):
+        raise ValueError("API key is empty")
+
+    job_id = queue.submit("plan", fn, owner="a")
+    failed = wait_for(queue, job_id, "failed")
+    assert isinstance(failed["error"], ValueError) and failed["result"] is None
+
+
+def test_collect_returns_each_finished_job_once_per_owner(queue):
+    ids = [queue.submit("ideas", lambda report, n=n: n, owner=owner) for n, owner in enumerate("aab")]
+    for job_id in ids:
+        wait_for(queue, job_id, "done")
+    assert [job["result"] for job in queue.collect("a")] == [0, 1]
+    assert queue.collect("a") == []
+    assert [job["id"] for job in queue.jobs("b")] == [ids[2]]
+
+
+# =========================
+# CANCEL
+# =========================
+def test_queued_job_can_be_cancelled(queue):
+    fn, started, release = blocker()
+    running = queue.submit("calendar", fn)
+    assert started.wait(5)
+    queued = queue.submit("calendar", lambda report: "never runs")
+
+    assert queue.cancel(queued)
+    release.set()
+    wait_for(queue, running, "done")
+    assert queue.get(queued)["status"] == "cancelled"
+    assert queue.get(queued)["result"] is None
+
+
+def test_running_job_is_not_cancelled(queue):
+    fn, started, release = blocker()
+    job_id = queue.submit("calendar", fn)
+    assert started.wait(5)
+
+    assert not queue.cancel(job_id)
+    release.set()
+    assert wait_for(queue, job_id, "done")["result"] == "unblocked"
+    assert not queue.cancel(job_id)
+
+
+# =========================
+# RETENTION
+# =========================
+def test_default_retention_comes_from_settings():
+    jobs = JobQueue(workers=1)
+    assert jobs.max_finished == settings.JOB_RETENTION
+    jobs.shutdown()
+
+
+def test_finished_jobs_are_pruned_collected_first():
+    jobs = JobQueue(workers=1, max_finished=2)
+    first = jobs.submit("ideas", lambda report: 1, owner="a")
+    wait_for(jobs, first, "done")
+    jobs.collect("a")
+    second = jobs.submit("ideas", lambda report: 2, owner="b")
+    wait_for(jobs, second, "done")
+    third = jobs.submit("ideas", lambda report: 3, owner="b")
+    wait_for(jobs, third, "done")
+    assert jobs.get(first) is None
+    assert [job["id"] for job in jobs.jobs()] == [second, third]
+
+    fourth = jobs.submit("ideas", lambda report: 4, owner="b")
+    wait_for(jobs, fourth, "done")
+    assert [job["id"] for job in jobs.jobs()] == [third, fourth]
+    assert jobs.stats()["done"] == 2
+    jobs.shutdown()
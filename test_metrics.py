@@ -0,0 +1,137 @@
+import json
+
+import pytest
+import requests
+
+from metrics import CallMetrics, CallTimer, RerunTimer, percentile, rerun_summary, serve_prometheus
+
+
+def record(generator="ideas", status=200, **fields):
+    """A finished call record with the fields CallTimer fills in"""
+    return dict(CallTimer(None, generator).record, status=status, **fields)
+
+
+# =========================
+# PERCENTILES
+# =========================
+def test_percentile_interpolates_between_ranks():
+    values = [4, 1, 3, 2]
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4
+    assert percentile(values, 95) == pytest.approx(3.85)
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_summary_times_only_sent_calls():
+    metrics = CallMetrics()
+    for latency in (1.0, 2.0, 3.0):
+        metrics.add(record(latency=latency, completion_tokens=100))
+    metrics.add(record(latency=0.001, cache_hit=True))
+    metrics.add(record(latency=0.5, coalesced=True))
+    metrics.add(record(status=429, latency=5.0))
+
+    row, = metrics.summary()
+    assert (row["calls"], row["coalesced"], row["errors"]) == (6, 1, 1)
+    assert row["cache_hit_rate"] == pytest.approx(1 / 6)
+    assert row["latency_p50"] == 2.5
+    assert row["latency_p99"] == pytest.approx(4.94)
+    assert row["avg_completion_tokens"] == 100
+    assert row["ttft_p50"] is None
+
+
+def test_rerun_summary_covers_total_and_each_phase():
+    runs = [{"total": total, "phases": {"sidebar": total / 2}} for total in (0.1, 0.2, 0.3)]
+    runs.append({"total": 0.4, "phases": {}})
+    total, sidebar = rerun_summary(runs)
+    assert (total["phase"], total["runs"], total["max"]) == ("total", 4, 0.4)
+    assert total["p50"] == pytest.approx(0.25)
+    assert (sidebar["phase"], sidebar["runs"], sidebar["p50"]) == ("sidebar", 3, 0.1)
+
+
+def test_rerun_timer_adds_up_repeated_phases():
+    timer = RerunTimer()
+    with timer.phase("tabs"):
+        pass
+    with timer.phase("tabs"):
+        pass
+    run = timer.finish(page="ideas")
+    assert list(run["phases"]) == ["tabs"] and run["page"] == "ideas"
+    assert run["total"] >= run["phases"]["tabs"]
+
+
+# =========================
+# JSONL SINK
+# =========================
+def test_every_record_is_appended_to_the_jsonl_file(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    metrics = CallMetrics(max_records=1, jsonl_path=str(path))
+    timer = metrics.start("caption")
+    timer.sent()
+    timer.finish(200, model="small", completion_tokens=42)
+    metrics.add(record("plan", status="ReadTimeout", latency=1.5))
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["generator"], r["status"]) for r in lines] == [("caption", 200), ("plan", "ReadTimeout")]
+    assert lines[0]["model"] == "small" and lines[0]["attempts"] == 1 and "timestamp" in lines[0]
+    # The file keeps what the ring buffer drops
+    assert len(metrics.records()) == 1
+    assert json.loads(metrics.to_jsonl())["generator"] == "plan"
+
+
+# =========================
+# PROMETHEUS
+# =========================
+def test_prometheus_exposition_format():
+    metrics = CallMetrics()
+    metrics.add(record(latency=1.0, model="small", prompt_tokens=10, completion_tokens=20))
+    metrics.add(record(latency=3.0, model="small", prompt_tokens=10, completion_tokens=20))
+    metrics.add(record(latency=0.001, cache_hit=True))
+    metrics.add(record("plan", status=429, latency=2.0, model="big"))
+
+    text = metrics.to_prometheus()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    samples = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+    assert samples['groq_calls_total{generator="ideas",status="200",cache="miss"}'] == "2"
+    assert samples['groq_calls_total{generator="ideas",status="200",cache="hit"}'] == "1"
+    assert samples['groq_calls_total{generator="plan",status="429",cache="miss"}'] == "1"
+    assert samples['groq_model_calls_total{model="small",status="200"}'] == "2"
+    assert samples['groq_tokens_total{generator="ideas",type="completion"}'] == "40"
+    assert samples['groq_call_latency_seconds{generator="ideas",quantile="0.5"}'] == "2.000000"
+    assert samples['groq_call_latency_seconds_sum{generator="ideas"}'] == "4.001000"
+    assert samples['groq_call_latency_seconds_count{generator="ideas"}'] == "3"
+    assert not any("groq_call_ttft_seconds{" in line for line in lines)
+
+    # Every metric family is announced once with HELP and TYPE before its samples
+    families = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(families) == len(set(families))
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0]
+            assert any(name == family or name.startswith(family + "_") for family in families)
+
+
+def test_counters_outlive_the_ring_buffer():
+    metrics = CallMetrics(max_records=2)
+    for _ in range(5):
+        metrics.add(record(latency=1.0))
+    assert len(metrics.records()) == 2
+    assert 'groq_calls_total{generator="ideas",status="200",cache="miss"} 5' in metrics.to_prometheus()
+
+
+def test_exporter_serves_metrics_endpoint():
+    metrics = CallMetrics()
+    metrics.add(record(latency=1.0))
+    server = serve_prometheus(metrics, 0, host="127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        response = requests.get(f"{base}/metrics", timeout=5)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert response.text == metrics.to_prometheus()
+        assert requests.get(f"{base}/other", timeout=5).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
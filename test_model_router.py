@@ -0,0 +1,116 @@
+import pytest
+
+import agent_core as core
+import model_router
+from groq_client import GroqAPIError, GroqClient
+from mock_groq import MockGroqServer
+from model_router import ModelRouter, should_fall_back
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache
+
+ROUTES = {"ideas": ["fast", "big"], "caption": ["fast", "big"], "other": ["big"]}
+
+
+class Clock:
+    """Stand-in for time.monotonic()"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_router.time, "monotonic", clock)
+    return clock
+
+
+def router(**kwargs):
+    return ModelRouter(routes=ROUTES, slo_seconds={"ideas": 2.0}, **dict({"slo_misses": 2, "cooldown": 60}, **kwargs))
+
+
+# =========================
+# ROUTES
+# =========================
+def test_generators_map_to_routes():
+    models = router()
+    assert models.models("ideas") == ["fast", "big"]
+    # Prefetched captions share the caption route and cache keys
+    assert models.task("prefetch") == "caption" and models.primary("prefetch") == "fast"
+    assert models.task("hashtags") == "other" and models.models(None) == ["big"]
+    assert models.slo("caption") is None
+
+
+def test_only_auth_errors_skip_fallback():
+    assert not should_fall_back(GroqAPIError(401, "invalid key"))
+    assert not should_fall_back(GroqAPIError(403, "forbidden"))
+    for status in (400, 404, 429, 503):
+        assert should_fall_back(GroqAPIError(status, "no"))
+    assert should_fall_back(ValueError("malformed response"))
+
+
+# =========================
+# SLO DEMOTION
+# =========================
+def test_model_missing_its_slo_is_demoted_for_the_cooldown(clock):
+    models = router()
+    models.record("fast", "ideas", latency=3.0)
+    assert models.models("ideas") == ["fast", "big"]
+    models.record("fast", "ideas", latency=3.0)
+    assert models.models("ideas") == ["big", "fast"]
+    # Demotion is per task
+    assert models.models("caption") == ["fast", "big"]
+    clock.now += 61
+    assert models.models("ideas") == ["fast", "big"]
+
+
+def test_fast_answer_resets_the_miss_count(clock):
+    models = router()
+    models.record("fast", "ideas", latency=3.0)
+    models.record("fast", "ideas", latency=1.0)
+    models.record("fast", "ideas", latency=3.0)
+    assert models.models("ideas") == ["fast", "big"]
+
+
+def test_single_model_route_is_never_demoted(clock):
+    models = ModelRouter(routes={"other": ["big"]}, slo_seconds={"other": 1.0}, slo_misses=1)
+    models.record("big", None, latency=5.0)
+    assert models.models(None) == ["big"]
+
+
+def test_stats_rows(clock):
+    models = router()
+    models.record("fast", "ideas", error=GroqAPIError(503, "busy"), fell_back=True)
+    models.record("big", "ideas", latency=1.0, finish_reason="length", completion_tokens=100, invalid_json=True)
+    models.record("fast", "ideas", latency=3.0)
+    models.record("fast", "ideas", latency=3.0)
+    rows = {row["model"]: row for row in models.stats()}
+    assert (rows["fast"]["calls"], rows["fast"]["errors"], rows["fast"]["fallbacks"]) == (3, 1, 1)
+    assert (rows["fast"]["slo_misses"], rows["fast"]["demotions"], rows["fast"]["demoted_for"]) == (2, 1, ["ideas"])
+    assert (rows["big"]["truncated"], rows["big"]["invalid_json"]) == (1, 1)
+    assert rows["big"]["avg_completion_tokens"] == 100 and rows["big"]["latency_p50"] == 1.0
+
+
+# =========================
+# FALLBACK
+# =========================
+@pytest.mark.parametrize("stream", [False, True])
+def test_failing_model_falls_back_to_the_next(stream):
+    with MockGroqServer(latency=0, tokens_per_second=0, failing_models={"fast"}) as server:
+        services = core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000, max_retries=0),
+            router=router(),
+        )
+        if stream:
+            text = ''.join(core.stream_completion("Ideas", "gsk_test", services=services, generator="ideas"))
+        else:
+            text = core.fetch_completion("Ideas", "gsk_test", services=services, generator="ideas")
+        assert text
+        assert server.stats()["models"] == {"fast": 1, "big": 1}
+        rows = {row["model"]: row for row in services.router.stats()}
+        assert rows["fast"]["fallbacks"] == 1 and rows["big"]["errors"] == 0
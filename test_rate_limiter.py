@@ -0,0 +1,147 @@
+import pytest
+import requests
+
+import rate_limiter
+from groq_client import GroqAPIError
+from rate_limiter import RateLimitScheduler, TokenBucket, is_retryable, parse_duration
+
+
+class Clock:
+    """Stand-in for time.monotonic() and time.sleep() that advances only on sleep"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+# =========================
+# PARSING
+# =========================
+def test_parse_duration_formats():
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("1h") == 3600
+    assert parse_duration("3") == 3.0
+    assert parse_duration(None) is None
+    assert parse_duration("soon") is None
+
+
+def test_retryable_errors():
+    for status in (429, 500, 502, 503, 504):
+        assert is_retryable(GroqAPIError(status, "busy"))
+    for status in (400, 401, 403, 404):
+        assert not is_retryable(GroqAPIError(status, "no"))
+    assert is_retryable(requests.exceptions.ReadTimeout())
+    assert is_retryable(requests.exceptions.ConnectionError())
+    assert not is_retryable(ValueError("bad"))
+
+
+# =========================
+# TOKEN BUCKET
+# =========================
+def test_bucket_reservations_queue_behind_each_other(clock):
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1)
+    assert bucket.reserve() == pytest.approx(2)
+    clock.now += 10
+    assert bucket.available() == 2
+
+
+def test_bucket_reservation_is_capped_at_capacity(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    assert bucket.reserve(50) == 0
+    assert bucket.available() == 0
+
+
+def test_server_reported_limits_pause_the_bucket(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    bucket.observe(remaining=0, reset_seconds=5)
+    assert bucket.available() == 0
+    assert bucket.reserve() == pytest.approx(6)
+    clock.now += 5
+    # Nothing refills during the pause
+    assert bucket.available() == -1
+
+
+# =========================
+# SCHEDULER
+# =========================
+def test_headers_sync_both_buckets(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=30, tokens_per_minute=6000)
+    scheduler.observe_headers({
+        "X-RateLimit-Remaining-Requests": "3",
+        "X-RateLimit-Remaining-Tokens": "0",
+        "X-RateLimit-Reset-Tokens": "7.5s",
+    })
+    assert scheduler.requests.available() == 3
+    assert scheduler.tokens.reserve(1) == pytest.approx(7.5 + 0.01)
+
+
+def test_retry_after_pauses_requests(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=6000)
+    scheduler.observe_headers({"Retry-After": "2"})
+    assert scheduler.reserve(1) == pytest.approx(2)
+
+
+def test_call_retries_transient_errors(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=60000, max_retries=3)
+    attempts = []
+
+    def flaky():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise GroqAPIError(429, "slow down", headers={"retry-after": "1"})
+        return "ok"
+
+    assert scheduler.call(flaky) == "ok"
+    assert len(attempts) == 3
+    # Retry-After is honoured before each retry
+    assert all(b - a >= 1 for a, b in zip(attempts, attempts[1:]))
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["failures"]) == (2, 0)
+
+
+def test_call_does_not_retry_client_errors(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=60000, max_retries=3)
+    attempts = []
+
+    def unauthorized():
+        attempts.append(1)
+        raise GroqAPIError(401, "invalid key")
+
+    with pytest.raises(GroqAPIError):
+        scheduler.call(unauthorized)
+    assert len(attempts) == 1
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_call_gives_up_after_max_retries(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=60000, max_retries=2)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise GroqAPIError(503, "unavailable")
+
+    with pytest.raises(GroqAPIError):
+        scheduler.call(down)
+    assert len(attempts) == 3
+    assert scheduler.stats()["retries"] == 2
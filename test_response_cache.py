@@ -0,0 +1,251 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import agent_core as core
+import response_cache
+from groq_client import GroqClient
+from mock_groq import MockGroqServer
+from model_router import ModelRouter
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache, SingleFlight, key_scope, make_cache_key
+
+
+class Clock:
+    """Stand-in for time.time() that only moves when told to"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# =========================
+# CACHE KEYS
+# =========================
+def test_cache_key_covers_every_request_field():
+    key = make_cache_key("m", "sys", "prompt", 0.7, 500)
+    assert key == make_cache_key("m", "sys", "prompt", 0.70001, 500)
+    assert key != make_cache_key("m", "sys", "prompt", 0.8, 500)
+    assert key != make_cache_key("m", "sys", "prompt", 0.7, 501)
+    assert key != make_cache_key("other", "sys", "prompt", 0.7, 500)
+    assert key != make_cache_key("m", "sys", "prompt", 0.7, 500, {"type": "json_object"})
+    assert key != make_cache_key("m", "sys", "prompt", 0.7, 500, scope=key_scope("gsk_a"))
+    assert key_scope("gsk_a") == key_scope(" gsk_a ") != key_scope("gsk_b")
+
+
+# =========================
+# MEMORY TIER
+# =========================
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["size"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set("a", "A")
+    clock.now += 59
+    assert cache.contains("a") and cache.get("a") == "A"
+    clock.now += 2
+    assert not cache.contains("a")
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_empty_responses_are_not_cached():
+    cache = ResponseCache()
+    cache.set("a", "")
+    assert not cache.contains("a")
+
+
+def test_stats_count_hits_and_misses():
+    cache = ResponseCache()
+    cache.set("a", "A")
+    cache.get("a")
+    cache.get("b")
+    # contains() is not a lookup
+    cache.contains("a")
+    stats = cache.stats()
+    assert (stats["hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+# =========================
+# SQLITE TIER
+# =========================
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=path).set("a", "A")
+    cache = ResponseCache(db_path=path)
+    assert cache.contains("a")
+    assert cache.get("a") == "A"
+    assert cache.get("a") == "A"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_disk_tier_outlives_memory_eviction(tmp_path):
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.db"))
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_disk_entries_are_deleted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    path = str(tmp_path / "cache.db")
+    ResponseCache(ttl_seconds=60, db_path=path).set("a", "A")
+    clock.now += 61
+    cache = ResponseCache(ttl_seconds=60, db_path=path)
+    assert cache.get("a") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(db_path=path)
+    cache.set("a", "A")
+    cache.clear()
+    assert cache.get("a") is None
+    assert ResponseCache(db_path=path).get("a") is None
+
+
+# =========================
+# SINGLE FLIGHT
+# =========================
+def test_first_caller_leads_and_later_callers_wait():
+    flights = SingleFlight()
+    future, leader = flights.join("k")
+    waiter, follower = flights.join("k")
+    assert leader and not follower and waiter is future
+    flights.settle("k", "done")
+    assert waiter.result(timeout=1) == "done"
+    # A settled key starts a new flight
+    assert flights.join("k")[1]
+
+
+def test_leader_error_reaches_waiters():
+    flights = SingleFlight()
+    flights.join("k")
+    waiter, _ = flights.join("k")
+
+    def fail():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        flights.lead("k", fail)
+    with pytest.raises(ValueError):
+        waiter.result(timeout=1)
+
+
+def test_interrupted_leader_releases_waiters_with_none():
+    flights = SingleFlight()
+    flights.join("k")
+    waiter, _ = flights.join("k")
+
+    def interrupt():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        flights.lead("k", interrupt)
+    assert waiter.result(timeout=1) is None
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_stats_count_coalesced_calls():
+    flights = SingleFlight()
+    flights.join("k")
+    flights.join("k")
+    flights.join("k")
+    stats = flights.stats()
+    assert (stats["leaders"], stats["coalesced"], stats["in_flight"]) == (1, 2, 1)
+    assert stats["coalesced_rate"] == pytest.approx(2 / 3)
+
+
+def test_identical_concurrent_completions_share_one_request():
+    with MockGroqServer(latency=0.3, tokens_per_second=10000) as server:
+        services = core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000),
+        )
+        start = threading.Barrier(4)
+
+        def fetch(_):
+            start.wait()
+            return core.fetch_completion("Ideas about cold brew", "gsk_test", services=services, generator="ideas")
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(fetch, range(4)))
+        assert len(set(results)) == 1 and results[0]
+        assert server.stats()["requests"] == 1
+        assert services.inflight.stats()["coalesced"] == 3
+
+
+def test_uncached_completions_are_not_coalesced():
+    with MockGroqServer(latency=0.3, tokens_per_second=10000) as server:
+        services = core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000),
+        )
+        start = threading.Barrier(3)
+
+        def fetch(_):
+            start.wait()
+            return core.fetch_completion(
+                "Ideas about cold brew", "gsk_test", use_cache=False, services=services, generator="ideas"
+            )
+
+        with ThreadPoolExecutor(3) as pool:
+            list(pool.map(fetch, range(3)))
+        assert server.stats()["requests"] == 3
+        assert services.inflight.stats()["leaders"] == 0
+
+
+# =========================
+# REQUEST SCOPE
+# =========================
+def test_cached_and_coalesced_results_are_scoped_to_the_api_key():
+    with MockGroqServer(latency=0, tokens_per_second=0) as server:
+        services = core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000),
+        )
+        core.fetch_completion("Ideas about cold brew", "gsk_a", services=services, generator="ideas")
+        core.fetch_completion("Ideas about cold brew", "gsk_a", services=services, generator="ideas")
+        assert server.stats()["requests"] == 1
+        # Another key is checked by the API, not served from the first key's cache
+        core.fetch_completion("Ideas about cold brew", "gsk_b", services=services, generator="ideas")
+        assert server.stats()["requests"] == 2
+
+
+def test_fallback_answers_are_cached_under_the_model_that_gave_them():
+    with MockGroqServer(latency=0, tokens_per_second=0, failing_models={"fast"}) as server:
+        services = core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000, max_retries=0),
+            router=ModelRouter(routes={"ideas": ["fast", "big"]}),
+        )
+        text = core.fetch_completion("Ideas", "gsk_a", services=services, generator="ideas")
+        keys = core.request_cache_keys(services.router, "ideas", "Ideas", 800, 0.8, False, "gsk_a")
+        assert not services.cache.contains(keys["fast"])
+        assert services.cache.get(keys["big"]) == text
+        # A repeat is still answered from the fallback model's entry
+        assert core.fetch_completion("Ideas", "gsk_a", services=services, generator="ideas") == text
+        assert server.stats()["models"] == {"fast": 1, "big": 1}
@@ -0,0 +1,69 @@
+import json
+
+from structured_output import RecordStreamParser, normalize_record, parse_records, records_to_text
+
+IDEAS = [
+    {"title": "Latte art", "concept": "Show three pours", "content_type": "reel", "hook": "Can you tell?", "platform": "Instagram"},
+    {"title": "Bean map", "concept": "Where our beans come from"},
+]
+
+
+def stream(kind, text, size=7):
+    """Records emitted when text arrives in chunks of size characters"""
+    parser = RecordStreamParser(kind)
+    records = []
+    for start in range(0, len(text), size):
+        records += parser.feed(text[start:start + size])
+    return records, parser
+
+
+# =========================
+# NORMALIZING / PARSING
+# =========================
+def test_normalize_fills_missing_fields_and_lists():
+    record = normalize_record('caption', {"body": "Hi", "hashtags": "coffee, #brew"})
+    assert record == {"body": "Hi", "cta": "", "hashtags": ["#coffee", "#brew"]}
+    assert normalize_record('idea', {"title": "No concept"}) is None
+    assert normalize_record('idea', ["not", "a", "dict"]) is None
+
+
+def test_parse_records_accepts_collection_array_or_other_key():
+    expected = parse_records('idea', json.dumps({"ideas": IDEAS}))
+    assert [r['title'] for r in expected] == ["Latte art", "Bean map"]
+    assert parse_records('idea', json.dumps(IDEAS)) == expected
+    assert parse_records('idea', json.dumps({"items": IDEAS})) == expected
+    assert parse_records('idea', "not json") == []
+
+
+# =========================
+# STREAMING
+# =========================
+def test_stream_emits_collection_records_as_they_close():
+    text = json.dumps({"ideas": IDEAS})
+    parser = RecordStreamParser('idea')
+    first = parser.feed(text[:text.index('}') + 1])
+    assert [r['title'] for r in first] == ["Latte art"]
+    assert [r['title'] for r in parser.feed(text[text.index('}') + 1:])] == ["Bean map"]
+
+
+def test_stream_handles_bare_top_level_array():
+    records, _ = stream('idea', json.dumps(IDEAS))
+    assert records == parse_records('idea', json.dumps(IDEAS))
+
+
+def test_stream_skips_fences_and_braces_inside_strings():
+    text = '```json\n' + json.dumps({"ideas": [{"title": 'Use {braces} and "quotes"', "concept": "]}"}]}) + '\n```'
+    records, _ = stream('idea', text, size=3)
+    assert records == [normalize_record('idea', {"title": 'Use {braces} and "quotes"', "concept": "]}"})]
+
+
+def test_stream_single_record_kind_and_invalid_records():
+    records, _ = stream('caption', json.dumps({"body": "Fresh brew", "cta": "Visit", "hashtags": ["#coffee"]}))
+    assert records == [{"body": "Fresh brew", "cta": "Visit", "hashtags": ["#coffee"]}]
+    records, parser = stream('idea', json.dumps({"ideas": [{"title": "no concept"}, IDEAS[1]]}))
+    assert [r['title'] for r in records] == ["Bean map"] and parser.skipped == 1
+
+
+def test_records_to_text_numbers_ideas():
+    text = records_to_text('idea', parse_records('idea', json.dumps(IDEAS)), start=3)
+    assert text.startswith("3. **Latte art** (Instagram)") and "4. **Bean map**" in text
@@ -0,0 +1,23 @@
+from datetime import date
+
+import agent_core as core
+import tab_calendar
+
+
+def run_plan(monkeypatch, start_date, end_date):
+    calls = []
+    monkeypatch.setattr(tab_calendar, "generate_calendar_weeks", lambda *args: calls.append('weeks') or {'text': 'weeks'})
+    monkeypatch.setattr(tab_calendar, "stream_job_text", lambda *args: calls.append('single') or 'calendar')
+    tab_calendar.generate_weekly_plan(
+        lambda **progress: None, "cold brew", ["Instagram"], "gsk_test", core.DEFAULT_BRAND_INFO, start_date=start_date, end_date=end_date
+    )
+    return calls
+
+
+def test_seven_day_range_is_one_request(monkeypatch):
+    # Starts on a Saturday, so it spans two calendar weeks
+    assert run_plan(monkeypatch, date(2026, 10, 17), date(2026, 10, 23)) == ['single']
+
+
+def test_longer_range_is_split_into_weeks(monkeypatch):
+    assert run_plan(monkeypatch, date(2026, 10, 17), date(2026, 10, 24)) == ['weeks']
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+import template_engine
+from template_engine import Template, calendar_records, caption_record, idea_records
+
+
+# =========================
+# TEMPLATES
+# =========================
+def test_unknown_slot_is_rejected():
+    with pytest.raises(ValueError):
+        Template("{topic} for {customer}")
+    assert Template("{topic} by {brand}").fields == {'topic', 'brand'}
+
+
+def test_bank_covers_every_platform():
+    compiled = template_engine.compile_bank()
+    assert set(compiled) - {'_shared'} == set(template_engine.PLATFORMS)
+
+
+def test_unknown_platform_raises():
+    with pytest.raises(ValueError):
+        idea_records("cold brew", "MySpace", 3)
+
+
+# =========================
+# IDEAS AND CAPTIONS
+# =========================
+def test_idea_records_are_distinct_and_seeded():
+    records = idea_records("cold brew", "TikTok", 10)
+    assert len(records) == 10
+    assert len({(r['title'], r['concept']) for r in records}) == 10
+    assert records == idea_records("cold brew", "TikTok", 10)
+    assert records != idea_records("cold brew", "TikTok", 10, seed=1)
+
+
+def test_caption_record_fields():
+    record = caption_record("Cold brew at home", "Twitter", {'name': 'Bean Co', 'tone': 'Casual'})
+    assert set(record) == {'body', 'cta', 'hashtags'}
+    assert "#BeanCo" in record['hashtags']
+    # Twitter captions skip the opener and closing line
+    assert "\n\n" not in record['body']
+
+
+# =========================
+# CALENDAR
+# =========================
+DAYS = [date(2026, 3, 1) + timedelta(days=i) for i in range(7)]
+
+
+def test_calendar_has_one_entry_per_platform_per_date():
+    platforms = ["Instagram", "TikTok", "LinkedIn"]
+    records = calendar_records("cold brew", platforms, DAYS)
+    assert len(records) == len(DAYS) * len(platforms)
+    assert [(r['date'], r['platform']) for r in records] == [
+        (day.isoformat(), platform) for day in DAYS for platform in platforms
+    ]
+
+
+def test_calendar_slot_does_not_depend_on_range_or_platform_set():
+    week = calendar_records("cold brew", ["Instagram", "TikTok"], DAYS)
+    day = calendar_records("cold brew", ["TikTok"], DAYS[3:4])
+    assert day == [r for r in week if r['date'] == DAYS[3].isoformat() and r['platform'] == 'TikTok']
+
+
+def test_calendar_angles_do_not_repeat_on_consecutive_days():
+    ideas = [r['idea'] for r in calendar_records("cold brew", ["Instagram"], DAYS)]
+    assert all(a != b for a, b in zip(ideas, ideas[1:]))
+
+
+def test_calendar_seed_gives_another_variant():
+    assert calendar_records("cold brew", ["Instagram"], DAYS) != calendar_records("cold brew", ["Instagram"], DAYS, seed=7)
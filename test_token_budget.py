@@ -0,0 +1,96 @@
+import pytest
+
+import agent_core as core
+import settings
+import token_budget
+from groq_client import GroqClient
+from mock_groq import MockGroqServer
+from rate_limiter import RateLimitScheduler
+from response_cache import ResponseCache
+from token_budget import budget_max_tokens, count_message_tokens, count_tokens, fit_to_context
+
+
+# =========================
+# ESTIMATES
+# =========================
+def test_count_tokens_tracks_text_length():
+    assert count_tokens("") == 0
+    assert count_tokens("cold brew") == 2
+    # Long words and multi-byte characters take more than one token
+    assert count_tokens("internationalization") > 1
+    assert count_tokens("☕") >= 1
+    assert count_tokens("word " * 100) == 100
+
+
+def test_message_tokens_include_template_overhead():
+    assert count_message_tokens("hi", "there") == 2 + 2 * token_budget.MESSAGE_OVERHEAD_TOKENS
+
+
+def test_budget_grows_with_items_and_structure(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_BUDGET_MARGIN", 1.0)
+    assert budget_max_tokens('ideas', 5) == 60 + 5 * 110
+    assert budget_max_tokens('ideas', 10) > budget_max_tokens('ideas', 5)
+    assert budget_max_tokens('ideas', 5, structured=True) == int((60 + 5 * 110) * token_budget.JSON_OVERHEAD)
+    assert budget_max_tokens('caption', platform='LinkedIn') > budget_max_tokens('caption', platform='Twitter')
+    assert budget_max_tokens('caption', platform='Mastodon') == 40 + token_budget.DEFAULT_CAPTION_TOKENS
+
+
+def test_platform_sizes_ideas_and_plans(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_BUDGET_MARGIN", 1.0)
+    assert budget_max_tokens('ideas', 5, 'Twitter') == int(60 + 5 * 110 * 0.8)
+    assert budget_max_tokens('ideas', 5, 'LinkedIn') > budget_max_tokens('ideas', 5, 'Instagram')
+    assert budget_max_tokens('ideas', 5, 'All Platforms') == budget_max_tokens('ideas', 5)
+    assert budget_max_tokens('plan', 7, 'Twitter') < budget_max_tokens('plan', 7, 'LinkedIn')
+    assert budget_max_tokens('calendar', 7, 'Twitter') == budget_max_tokens('calendar', 7)
+
+
+def test_budget_is_clamped(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_COMPLETION_TOKENS", 1000)
+    assert budget_max_tokens('plan', 90) == 1000
+    assert budget_max_tokens('caption', platform='Twitter') >= token_budget.MIN_MAX_TOKENS
+
+
+def test_fit_to_context(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CONTEXT_TOKENS", 8000)
+    assert fit_to_context(1000, 2000) == 2000
+    assert fit_to_context(7000, 2000) == 1000
+    assert fit_to_context(9000, 2000) == 1
+
+
+# =========================
+# CONTINUATIONS
+# =========================
+@pytest.fixture
+def mock_services():
+    # Mock responses are 150 words, one token each
+    with MockGroqServer(latency=0, tokens_per_second=0, completion_tokens=150) as server:
+        yield server, core.Services(
+            client=GroqClient(api_url=server.url),
+            cache=ResponseCache(),
+            scheduler=RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10_000_000),
+        )
+
+
+def test_truncated_completion_is_continued(mock_services, monkeypatch):
+    server, services = mock_services
+    monkeypatch.setattr(settings, "MAX_CONTINUATIONS", 2)
+    text = core.fetch_completion("Ideas", "gsk_test", max_tokens=64, services=services, generator="ideas")
+    assert len(text.split()) == 150
+    assert server.stats()["requests"] == 3
+    assert services.metrics.records()[-1]['continuations'] == 2
+
+
+def test_streamed_completion_is_continued(mock_services, monkeypatch):
+    server, services = mock_services
+    monkeypatch.setattr(settings, "MAX_CONTINUATIONS", 2)
+    tokens = list(core.stream_completion("Ideas", "gsk_test", max_tokens=64, services=services, generator="ideas"))
+    assert len(''.join(tokens).split()) == 150
+    assert server.stats()["requests"] == 3
+
+
+def test_continuations_stop_at_the_limit(mock_services, monkeypatch):
+    server, services = mock_services
+    monkeypatch.setattr(settings, "MAX_CONTINUATIONS", 1)
+    text = core.fetch_completion("Ideas", "gsk_test", max_tokens=64, services=services, generator="ideas")
+    assert len(text.split()) == 128
+    assert server.stats()["requests"] == 2
@@ -0,0 +1,92 @@
+import re
+
+import settings
+
+# Words, 1-3 digit runs and single symbols, roughly how Llama 3's BPE pre-splits text
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+# Chat template tokens added around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Completion tokens for the framing of a response (intro, headings, closing line)
+BASE_TOKENS = {
+    'ideas': 60,
+    'caption': 40,
+    'calendar': 80,
+    'plan': 250,
+}
+
+# Completion tokens per requested item: one idea, one calendar post, one plan day
+ITEM_TOKENS = {
+    'ideas': 110,
+    'calendar': 60,
+    'plan': settings.PLAN_TOKENS_PER_DAY,
+}
+
+# Captions are one item whose length depends on the platform's conventions
+CAPTION_TOKENS = {
+    'Twitter': 110,
+    'TikTok': 180,
+    'Instagram': 260,
+    'Facebook': 260,
+    'LinkedIn': 320,
+}
+DEFAULT_CAPTION_TOKENS = 260
+
+# Ideas and plan days carry draft copy for their platform too, but also fixed
+# fields (titles, formats, times), so they scale less steeply than captions
+PLATFORM_LENGTH = {
+    'Twitter': 0.8,
+    'TikTok': 0.9,
+    'Instagram': 1.0,
+    'Facebook': 1.0,
+    'LinkedIn': 1.15,
+}
+
+# JSON keys, quotes and brackets on top of the same content
+JSON_OVERHEAD = 1.25
+
+MIN_MAX_TOKENS = 64
+
+
+def count_tokens(text):
+    """Local estimate of the Llama 3 token count of text (no tokenizer download)"""
+    tokens = 0
+    for piece in _PIECES.findall(str(text)):
+        if piece.isascii():
+            # Common words are one token; long or rare ones split into several
+            tokens += 1 + len(piece) // 8
+        else:
+            # Emoji and other multi-byte characters usually take 1-2 byte-level tokens
+            tokens += max(len(piece.encode("utf-8")) // 2, 1)
+    return tokens
+
+
+def count_message_tokens(*messages):
+    """Estimated prompt tokens of chat messages, including the template overhead"""
+    return sum(count_tokens(message) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def budget_max_tokens(kind, items=1, platform=None, structured=False):
+    """max_tokens sized to the requested output
+
+    items is the number of ideas, calendar posts or plan days asked for.
+    platform sizes captions, ideas and plans; calendars mix platforms and
+    other platform values ("All Platforms", unknown names) count as average.
+    """
+    if kind == 'caption':
+        per_item = CAPTION_TOKENS.get(platform, DEFAULT_CAPTION_TOKENS)
+    elif kind == 'calendar':
+        per_item = ITEM_TOKENS[kind]
+    else:
+        per_item = ITEM_TOKENS[kind] * PLATFORM_LENGTH.get(platform, 1.0)
+    tokens = BASE_TOKENS[kind] + per_item * max(int(items), 1)
+    if structured:
+        tokens *= JSON_OVERHEAD
+    tokens = int(tokens * settings.TOKEN_BUDGET_MARGIN)
+    return min(max(tokens, MIN_MAX_TOKENS), settings.MAX_COMPLETION_TOKENS)
+
+
+def fit_to_context(prompt_tokens, max_tokens):
+    """Clamp max_tokens so the prompt plus the completion fit in the model's context window"""
+    return max(min(int(max_tokens), settings.MODEL_CONTEXT_TOKENS - int(prompt_tokens)), 1)
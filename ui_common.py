@@ -0,0 +1,341 @@
+import json
+import math
+import os
+import uuid
+
+import requests
+import streamlit as st
+
+import agent_core as core
+import settings
+from groq_client import GroqAPIError
+from history_export import sweep_exports
+from history_store import create_history_store
+from job_queue import JobQueue
+from metrics import serve_prometheus
+from structured_output import records_to_text
+
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css")
+
+# =========================
+# SHARED RESOURCES
+# =========================
+@st.cache_resource
+def get_services():
+    """Pooled client, response cache and rate limiter shared by every tab, rerun and session"""
+    return core.get_services()
+
+@st.cache_resource
+def get_history_db():
+    """SQLite history store shared by every session of this process"""
+    return create_history_store()
+
+@st.cache_resource
+def get_async_engine():
+    """Async request engine (background event loop + httpx) shared across sessions"""
+    # httpx is only imported once fan-out work first needs the engine
+    import async_engine
+    return async_engine.get_async_engine()
+
+def fanout_engine():
+    """Async engine for fan-out work, or None to use a thread pool"""
+    return get_async_engine() if settings.ASYNC_ENGINE else None
+
+@st.cache_resource
+def sweep_stale_exports():
+    """Delete history exports left behind by earlier sessions or processes, once per process"""
+    return sweep_exports(settings.EXPORT_DIR or None, settings.EXPORT_MAX_AGE_SECONDS)
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Prometheus /metrics endpoint for this process, started once"""
+    return serve_prometheus(get_services().metrics, settings.METRICS_PORT)
+
+def new_dedup_index():
+    """Empty near-duplicate index (NumPy is imported on first use)"""
+    from dedup_index import MinHashLSH
+    return MinHashLSH(threshold=settings.DEDUP_THRESHOLD)
+
+@st.cache_resource
+def get_shared_dedup_index():
+    """Near-duplicate index of the shared SQLite history, one per process"""
+    return new_dedup_index()
+
+def get_dedup_index():
+    """Near-duplicate index matching st.session_state.history
+
+    Synced on every use, so evicted or deleted entries stop being flagged and
+    a shared SQLite history picks up entries written by other sessions.
+    """
+    if settings.HISTORY_BACKEND == "sqlite":
+        return core.sync_history_index(get_shared_dedup_index(), get_history_db())
+    if 'dedup_index' not in st.session_state:
+        st.session_state.dedup_index = new_dedup_index()
+    return core.sync_history_index(st.session_state.dedup_index, st.session_state.history)
+
+# =========================
+# STATIC ASSETS
+# =========================
+@st.cache_resource
+def load_css():
+    """Page CSS from style.css, read once per process"""
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+def keep(key):
+    """Register a tab widget key whose value is kept while another tab is shown
+
+    Only the selected tab is rendered, and Streamlit drops the state of widgets
+    missing from a run; app2 re-assigns these keys while their tab is hidden.
+    """
+    st.session_state.setdefault('kept_widget_keys', {})[key] = st.session_state.get('active_tab')
+    return key
+
+def keep_hidden_tab_state(active_tab):
+    """Carry kept widget values of tabs other than active_tab over to this run"""
+    for key, tab in st.session_state.get('kept_widget_keys', {}).items():
+        if tab != active_tab and key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+# =========================
+# GROQ HELPER - FIXED VERSION
+# =========================
+def show_api_error(status_code, error_message):
+    """Show a friendly error for a non-200 Groq response"""
+    if status_code == 400:
+        st.error(f"❌ Bad Request (400): The request was invalid.\n\n**Possible causes:**\n- Invalid model name\n- Incorrect parameter format\n- Malformed request\n\n**Details:** {error_message}")
+    elif status_code == 401:
+        st.error(f"❌ Unauthorized (401): Invalid API key.\n\n**Please check:**\n- Your API key is correct\n- The key hasn't expired\n- You copied the entire key without spaces\n\n**Details:** {error_message}")
+    elif status_code == 429:
+        st.error(f"⚠️ Rate Limit (429): Too many requests.\n\nPlease wait a moment and try again.\n\n**Details:** {error_message}")
+    elif status_code == 503:
+        st.error(f"⚠️ Service Unavailable (503): Groq servers are temporarily unavailable.\n\nPlease try again in a few moments.\n\n**Details:** {error_message}")
+    else:
+        st.error(f"❌ API Error {status_code}: {error_message}")
+
+def show_exception(e):
+    """Show a friendly error for an exception raised by a Groq call"""
+    if isinstance(e, GroqAPIError):
+        show_api_error(e.status_code, e.message)
+    elif isinstance(e, ValueError) and not isinstance(e, json.JSONDecodeError):
+        st.error(f"❌ {str(e)}")
+    elif isinstance(e, requests.exceptions.Timeout):
+        st.error("⏱️ Request timed out. The API took too long to respond. Please try again.")
+    elif isinstance(e, requests.exceptions.ConnectionError):
+        st.error("🌐 Connection error. Please check your internet connection and try again.")
+    elif isinstance(e, json.JSONDecodeError):
+        st.error("❌ Failed to parse API response. The response was not valid JSON.")
+    else:
+        st.error(f"❌ Unexpected error: {str(e)}")
+
+def call_groq_api(prompt, api_key, max_tokens=800, temperature=0.8, use_cache=True, generator=None):
+    """Call Groq Chat Completions API with improved error handling"""
+    try:
+        return core.fetch_completion(
+            prompt,
+            api_key,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            services=get_services(),
+            generator=generator
+        )
+    except Exception as e:
+        show_exception(e)
+        return None
+
+# =========================
+# BACKGROUND JOBS
+# =========================
+@st.cache_resource
+def get_job_queue():
+    """Worker pool running generations for every session of this process"""
+    return JobQueue()
+
+def job_owner():
+    """Id of this browser session's jobs"""
+    if 'job_owner' not in st.session_state:
+        st.session_state.job_owner = uuid.uuid4().hex
+    return st.session_state.job_owner
+
+def submit_job(kind, fn, args, kwargs=None, label=None, **info):
+    """Queue fn(report, *args, **kwargs) for this session and return the job id
+
+    info is stored on the job; 'tab' names the module whose collect(job)
+    picks the result up once the job finishes.
+    """
+    job_id = get_job_queue().submit(kind, fn, args, kwargs, label=label, owner=job_owner(), **info)
+    st.toast(f"🧵 Queued: {label or kind}")
+    return job_id
+
+def stream_job_text(report, request, api_key, use_cache=True, services=None):
+    """Stream a completion inside a job, publishing the text so far as progress"""
+    tokens = []
+    for token in core.stream_completion(api_key=api_key, use_cache=use_cache, services=services, **request):
+        tokens.append(token)
+        report(text=''.join(tokens))
+    return ''.join(tokens)
+
+def stream_job_records(report, kind, request, api_key, use_cache=True, services=None):
+    """Stream structured records inside a job, publishing the records so far as progress"""
+    records = []
+    for record in core.stream_records(kind, request, api_key, use_cache, services):
+        records.append(record)
+        report(text=records_to_text(kind, records))
+    return records
+
+@st.cache_resource
+def get_prefetch_queue():
+    """One low-priority worker for caption prefetching, separate from the job pool"""
+    return JobQueue(workers=1)
+
+def run_prefetch(report, targets, api_key, brand_info, structured=False, services=None):
+    """Job: warm captions for targets and report how many were warmed"""
+    outcome = core.prefetch_captions(targets, api_key, brand_info, structured, services)
+    report(**outcome)
+    return outcome
+
+def prefetch_captions(text, records, platform):
+    """Warm captions for the first ideas of a new idea set when prefetching is on"""
+    if not st.session_state.get('caption_prefetch') or not st.session_state.api_key:
+        return
+    targets = core.prefetch_order(core.idea_targets(text, records, platform), settings.CAPTION_PREFETCH_COUNT)
+    if targets:
+        get_prefetch_queue().submit(
+            'prefetch',
+            run_prefetch,
+            (targets, st.session_state.api_key, dict(st.session_state.brand_info)),
+            {'structured': st.session_state.get('structured_output', False), 'services': get_services()},
+            owner=job_owner()
+        )
+
+def show_job_notices(result):
+    """Show the API error and fallback warning a finished job reported"""
+    if result.get('error') is not None:
+        show_exception(result['error'])
+    if result.get('warning'):
+        st.warning(result['warning'])
+
+# =========================
+# HISTORY LISTS
+# =========================
+def lazy_body(entry, expanded=False):
+    """Full text of a history entry, loaded only once the user opens it"""
+    if expanded or st.toggle("📖 Show full text", key=f"show_{entry.entry_id}"):
+        return st.session_state.history.body(entry)
+    st.caption(entry.summary)
+    return None
+
+def history_page(kind, key, newest_first=True):
+    """Search/filter and page controls for a history list; returns (entries, offset)
+
+    Only the current page is rendered, so reruns stay cheap as history grows.
+    """
+    history = st.session_state.history
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        query = st.text_input("🔍 Search topics", key=f"{key}_query", placeholder="e.g. coffee launch")
+    with col2:
+        platform = st.selectbox("Platform", ["All"] + history.platforms(kind), key=f"{key}_platform")
+    with col3:
+        date_range = st.date_input("Date range", value=(), key=f"{key}_dates")
+    with col4:
+        page_size = st.selectbox("Per page", settings.HISTORY_PAGE_SIZES, key=f"{key}_page_size")
+
+    since = date_range[0] if len(date_range) > 0 else None
+    until = date_range[1] if len(date_range) > 1 else since
+
+    # The page widget's state is the requested page; only that page is loaded
+    page_key = f"{key}_page"
+    items, total = history.page(
+        kind,
+        query=query,
+        platform=None if platform == "All" else platform,
+        since=since,
+        until=until,
+        newest_first=newest_first,
+        page=st.session_state.get(page_key, 1),
+        page_size=page_size
+    )
+    page_count = max(math.ceil(total / page_size), 1)
+    # Filters can shrink the result set below the remembered page
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key=page_key)
+    offset = (page - 1) * page_size
+    with col2:
+        if total:
+            st.caption(f"Showing {offset + 1}-{offset + len(items)} of {total} (page {page} of {page_count})")
+        else:
+            st.caption("No entries match these filters")
+    return items, offset
+
+def get_platform_badge(platform):
+    """Return HTML badge for platform"""
+    badges = {
+        'Instagram': '<span class="platform-badge instagram-badge">📸 Instagram</span>',
+        'Twitter': '<span class="platform-badge twitter-badge">🐦 Twitter</span>',
+        'LinkedIn': '<span class="platform-badge linkedin-badge">💼 LinkedIn</span>',
+        'Facebook': '<span class="platform-badge facebook-badge">👥 Facebook</span>',
+        'TikTok': '<span class="platform-badge tiktok-badge">🎵 TikTok</span>'
+    }
+    return badges.get(platform, '')
+
+# =========================
+# NEAR-DUPLICATE CHECKS
+# =========================
+def describe_duplicate(number, similarity, info):
+    """Meta record of one near-duplicate item and what it repeats"""
+    duplicate = {'number': number, 'similarity': round(similarity, 2), 'matches': core.summarize_item(info['text'], 80)}
+    if 'topic' in info:
+        duplicate.update(topic=info['topic'], date=info['date'], kind=info['kind'])
+    return duplicate
+
+def duplicate_line(duplicate):
+    """One warning line for a near-duplicate item"""
+    if 'topic' in duplicate:
+        source = f"{duplicate['kind']} on '{duplicate['topic']}' from {duplicate['date']}"
+    else:
+        source = "another item of this result"
+    return f"- #{duplicate['number']} ≈ \"{duplicate['matches']}\" ({source}, {duplicate['similarity']:.0%} similar)"
+
+def check_duplicates(kind, topic, platforms, text, records):
+    """Flag ideas or calendar slots that repeat earlier ones; returns (text, records, duplicates)
+
+    With "Regenerate near-duplicates" on, only the repeated items are replaced.
+    """
+    if not settings.DEDUP_ENABLED:
+        return text, records, []
+    index = get_dedup_index()
+    matches = index.check(core.content_items(kind, text, records))
+    positions = [i for i, match in enumerate(matches) if match]
+
+    if positions and st.session_state.get('dedup_regenerate') and st.session_state.api_key:
+        with st.spinner(f"♻️ Regenerating {len(positions)} near-duplicate item(s)..."):
+            try:
+                text, records, replaced = core.regenerate_duplicates(
+                    kind, topic, platforms, text, records, positions,
+                    st.session_state.api_key, st.session_state.brand_info,
+                    services=get_services(),
+                    avoid=[matches[p][1]['text'] for p in positions]
+                )
+            except Exception as e:
+                show_exception(e)
+                replaced = []
+        if replaced:
+            st.info(f"♻️ Regenerated {len(replaced)} near-duplicate item(s).")
+            matches = index.check(core.content_items(kind, text, records))
+
+    duplicates = [
+        describe_duplicate(number, *match)
+        for number, match in enumerate(matches, start=1) if match
+    ]
+    if duplicates:
+        st.warning(
+            f"🔁 {len(duplicates)} item(s) look like near-duplicates of earlier content:\n\n"
+            + "\n".join(duplicate_line(d) for d in duplicates)
+        )
+    return text, records, duplicates